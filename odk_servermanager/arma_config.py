@@ -0,0 +1,248 @@
+import re
+import struct
+from typing import Dict, List, Tuple, Union
+
+RAP_MAGIC = b"\0raP"
+
+
+def get_cfg_patches(data: bytes) -> Dict[str, List[str]]:
+    """Return the CfgPatches of an Arma config (either rapified config.bin or plain text config.cpp) as a dict that
+    maps every addon class name to its requiredAddons list."""
+    try:
+        if data.startswith(RAP_MAGIC):
+            return _get_rapified_cfg_patches(data)
+        return _get_text_cfg_patches(data.decode("utf-8", errors="replace"))
+    except (IndexError, ValueError, struct.error) as err:
+        raise InvalidConfig("Malformed config: {}".format(err))
+
+
+def _get_rapified_cfg_patches(data: bytes) -> Dict[str, List[str]]:
+    """Walk a rapified config only as deep as needed to recover CfgPatches."""
+    reader = _RapReader(data)
+    root = reader.read_class_body(16)
+    cfg_patches = _find_class(root, "CfgPatches")
+    if cfg_patches is None:
+        return {}
+    patches = {}
+    for name, (entry_type, value) in reader.read_class_body(cfg_patches).items():
+        if entry_type != "class":
+            continue
+        addon = reader.read_class_body(value)
+        required = _find_entry(addon, "requiredAddons")
+        patches[name] = [str(x) for x in required[1]] if required is not None and required[0] == "array" else []
+    return patches
+
+
+def get_mission_addons(data: bytes) -> List[str]:
+    """Return the addons required by a mission, from its mission.sqm (either rapified or plain text): the root addons
+    list of the current format and the addOns list in the Mission class of the older one."""
+    try:
+        if data.startswith(RAP_MAGIC):
+            reader = _RapReader(data)
+            root = reader.read_class_body(16)
+            arrays = [_find_entry(root, "addons")]
+            mission = _find_class(root, "Mission")
+            if mission is not None:
+                arrays.append(_find_entry(reader.read_class_body(mission), "addOns"))
+            addons = [x for entry in arrays if entry is not None and entry[0] == "array"
+                      for x in _flatten(entry[1])]
+        else:
+            text = _COMMENTS_REGEX.sub("", data.decode("utf-8", errors="replace"))
+            addons = [x for match in _ADDONS_REGEX.finditer(text) for x in _STRING_REGEX.findall(match.group(1))]
+    except (IndexError, ValueError, struct.error) as err:
+        raise InvalidConfig("Malformed mission: {}".format(err))
+    return list(dict.fromkeys(addons))
+
+
+def _flatten(values: List) -> List[str]:
+    """Return every string in a rapified array, nested arrays included."""
+    result = []
+    for value in values:
+        if isinstance(value, list):
+            result += _flatten(value)
+        elif isinstance(value, str):
+            result.append(value)
+    return result
+
+
+def _find_class(body: Dict[str, Tuple[str, object]], name: str) -> Union[int, None]:
+    """Return the body offset of the named class (ignoring the case), or None."""
+    entry = _find_entry(body, name)
+    return entry[1] if entry is not None and entry[0] == "class" else None
+
+
+def _find_entry(body: Dict[str, Tuple[str, object]], name: str) -> Union[Tuple[str, object], None]:
+    """Return the named entry (ignoring the case), or None."""
+    name = name.lower()
+    for entry_name, entry in body.items():
+        if entry_name.lower() == name:
+            return entry
+    return None
+
+
+class _RapReader:
+    """Minimal reader for the rapified (binarized) config format."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def read_class_body(self, offset: int) -> Dict[str, Tuple[str, object]]:
+        """Read a class body and return its entries. Child classes are not descended: their value is the offset of
+        their body."""
+        _, offset = self._read_asciiz(offset)  # inherited class name
+        count, offset = self._read_compressed_int(offset)
+        entries = {}
+        for _ in range(count):
+            entry_type = self.data[offset]
+            offset += 1
+            if entry_type == 0:
+                name, offset = self._read_asciiz(offset)
+                body_offset = struct.unpack_from("<I", self.data, offset)[0]
+                offset += 4
+                entries[name] = ("class", body_offset)
+            elif entry_type == 1:
+                subtype = self.data[offset]
+                name, offset = self._read_asciiz(offset + 1)
+                value, offset = self._read_value(subtype, offset)
+                entries[name] = ("value", value)
+            elif entry_type == 2:
+                name, offset = self._read_asciiz(offset)
+                value, offset = self._read_array(offset)
+                entries[name] = ("array", value)
+            elif entry_type in (3, 4):
+                # extern class or delete statement
+                name, offset = self._read_asciiz(offset)
+                entries[name] = ("extern" if entry_type == 3 else "delete", None)
+            elif entry_type == 5:
+                # array with flags, used for += statements
+                name, offset = self._read_asciiz(offset + 4)
+                value, offset = self._read_array(offset)
+                entries[name] = ("array", value)
+            else:
+                raise InvalidConfig("Unknown rapified entry type {}.".format(entry_type))
+        return entries
+
+    def _read_array(self, offset: int) -> Tuple[List, int]:
+        """Read an array, nested arrays included."""
+        count, offset = self._read_compressed_int(offset)
+        values = []
+        for _ in range(count):
+            subtype = self.data[offset]
+            offset += 1
+            if subtype == 3:
+                value, offset = self._read_array(offset)
+            else:
+                value, offset = self._read_value(subtype, offset)
+            values.append(value)
+        return values, offset
+
+    def _read_value(self, subtype: int, offset: int) -> Tuple[object, int]:
+        """Read a single value of the given subtype."""
+        if subtype in (0, 4):
+            # string or variable name
+            return self._read_asciiz(offset)
+        if subtype == 1:
+            return struct.unpack_from("<f", self.data, offset)[0], offset + 4
+        if subtype == 2:
+            return struct.unpack_from("<i", self.data, offset)[0], offset + 4
+        if subtype == 6:
+            return struct.unpack_from("<q", self.data, offset)[0], offset + 8
+        raise InvalidConfig("Unknown rapified value subtype {}.".format(subtype))
+
+    def _read_asciiz(self, offset: int) -> Tuple[str, int]:
+        """Read a null terminated string."""
+        end = self.data.index(b"\0", offset)
+        return self.data[offset:end].decode("utf-8", errors="replace"), end + 1
+
+    def _read_compressed_int(self, offset: int) -> Tuple[int, int]:
+        """Read a 7 bit encoded integer."""
+        value = 0
+        shift = 0
+        while True:
+            byte = self.data[offset]
+            offset += 1
+            value |= (byte & 0x7f) << shift
+            if byte & 0x80 == 0:
+                return value, offset
+            shift += 7
+
+
+_COMMENTS_REGEX = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_CLASS_REGEX = re.compile(r"class\s+(\w+)\s*(?::\s*\w+\s*)?([{;])")
+_REQUIRED_ADDONS_REGEX = re.compile(r"requiredAddons\s*\[\s*\]\s*\+?=\s*\{([^}]*)\}", re.IGNORECASE)
+_STRING_REGEX = re.compile(r"\"([^\"]*)\"")
+_ADDONS_REGEX = re.compile(r"\baddons\s*\[\s*\]\s*=\s*\{([^}]*)\}", re.IGNORECASE)
+
+
+def _get_text_cfg_patches(text: str) -> Dict[str, List[str]]:
+    """Recover CfgPatches from a plain text config.cpp."""
+    text = _COMMENTS_REGEX.sub("", text)
+    patches = {}
+    cfg_patches = _find_text_class(text, "CfgPatches", 0, len(text))
+    if cfg_patches is None:
+        return patches
+    start, end = cfg_patches
+    position = start
+    while True:
+        match = _CLASS_REGEX.search(text, position, end)
+        if match is None:
+            break
+        if match.group(2) == ";":
+            position = match.end()
+            continue
+        body_end = _match_brace(text, match.end() - 1)
+        required = _REQUIRED_ADDONS_REGEX.search(text, match.end(), body_end)
+        patches[match.group(1)] = _STRING_REGEX.findall(required.group(1)) if required is not None else []
+        position = body_end + 1
+    return patches
+
+
+def _find_text_class(text: str, name: str, start: int, end: int) -> Union[Tuple[int, int], None]:
+    """Return the (body start, body end) span of the named top level class."""
+    position = start
+    while True:
+        match = _CLASS_REGEX.search(text, position, end)
+        if match is None:
+            return None
+        if match.group(2) == ";":
+            position = match.end()
+            continue
+        body_end = _match_brace(text, match.end() - 1)
+        if match.group(1).lower() == name.lower():
+            return match.end(), body_end
+        position = body_end + 1
+
+
+def _match_brace(text: str, open_position: int) -> int:
+    """Return the position of the brace closing the one at open_position."""
+    depth = 0
+    in_string = False
+    for position in range(open_position, len(text)):
+        char = text[position]
+        if char == "\"":
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return position
+    raise InvalidConfig("Unbalanced braces in config.")
+
+
+def parse_mod_cpp(text: str) -> Dict[str, str]:
+    """Parse the simple key = value; format used by mod.cpp and meta.cpp files."""
+    text = _COMMENTS_REGEX.sub("", text)
+    values = {}
+    for match in re.finditer(r"(\w+)\s*=\s*(\"(?:[^\"]|\"\")*\"|[^;\n]*)\s*;", text):
+        value = match.group(2).strip()
+        if value.startswith("\"") and value.endswith("\""):
+            value = value[1:-1].replace("\"\"", "\"")
+        values[match.group(1)] = value
+    return values
+
+
+class InvalidConfig(Exception):
+    """"""
@@ -0,0 +1,142 @@
+import csv
+import json
+from os.path import abspath, dirname, exists, isabs, isfile, join
+from typing import Dict, List
+
+from odk_servermanager.config_ini import ConfigIni
+from odk_servermanager.planner import ARMA_PORTS_SPAN, get_ports_range, parse_port
+
+
+class BootstrapEntry:
+    """An instance to be bootstrapped, as listed in a manifest file.
+
+    :name: the server instance name
+    :port: the server game port, as a string, or "" to use the default one
+    :preset: the Arma 3 mods preset file, or ""
+    :bat_template: True if the instance needs a custom BAT template
+    :config_template: True if the instance needs a custom CONFIG template
+    :entries: any other config.ini entry, as given in the manifest (like hostname or config.hostname)
+    """
+
+    reserved_fields = ["name", "port", "preset", "bat_template", "config_template"]
+
+    def __init__(self, name: str, port: str = "", preset: str = "", bat_template: bool = False,
+                 config_template: bool = False, entries: Dict[str, str] = None):
+        self.name = name
+        self.port = port
+        self.preset = preset
+        self.bat_template = bat_template
+        self.config_template = config_template
+        self.entries = entries if entries is not None else {}
+
+    @staticmethod
+    def from_dict(fields: Dict, base_folder: str = "") -> "BootstrapEntry":
+        """Build an entry from the fields of a manifest row. Relative preset paths start from base_folder."""
+        fields = {key.strip(): _to_string(value) for key, value in fields.items() if key is not None}
+        preset = fields.get("preset", "")
+        if preset != "" and not isabs(preset):
+            preset = abspath(join(base_folder, preset))
+        return BootstrapEntry(fields.get("name", ""), fields.get("port", ""), preset,
+                              _to_bool(fields.get("bat_template", "")), _to_bool(fields.get("config_template", "")),
+                              {key: value for key, value in fields.items()
+                               if key not in BootstrapEntry.reserved_fields and value != ""})
+
+    def get_port(self, default_data: Dict) -> str:
+        """Return the game port of the instance, falling back to the default config one."""
+        return self.port if self.port != "" else default_data.get("bat", {}).get("server_port", "")
+
+    def get_config_data(self, default_data: Dict) -> Dict:
+        """Return the data of the instance config.ini, starting from a copy of the default config ones."""
+        data = {section: dict(values) for section, values in default_data.items()}
+        for key, value in self.entries.items():
+            section, name = ConfigIni.resolve_entry(key)
+            data.setdefault(section, {})[name] = value
+        if self.port != "":
+            data.setdefault("bat", {})["server_port"] = self.port
+        if self.preset != "":
+            data.setdefault("ODKSM", {})["user_mods_preset"] = self.preset
+        return data
+
+
+class BootstrapManifest:
+    """A list of instances to be bootstrapped together, read from a csv or a json file.
+
+    A csv manifest has a header row and one instance per row, a json one is a list of objects. The fields are name,
+    port, preset, bat_template and config_template (y/n), plus any config.ini entry to be set, like hostname or
+    config.hostname.
+
+    :entries: the instances listed in the manifest
+    """
+
+    def __init__(self, entries: List[BootstrapEntry]):
+        self.entries = entries
+
+    @staticmethod
+    def read_file(manifest_file: str) -> "BootstrapManifest":
+        """Read a manifest file, guessing its format from the extension."""
+        base_folder = dirname(abspath(manifest_file))
+        with open(manifest_file, "r", newline="", encoding="utf-8") as f:
+            if manifest_file.lower().endswith(".json"):
+                rows = json.load(f)
+                if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                    raise InvalidManifest("A json manifest must be a list of objects: {}".format(manifest_file))
+            else:
+                rows = [row for row in csv.DictReader(f)
+                        if any(value is not None and value.strip() != "" for value in row.values())]
+        return BootstrapManifest([BootstrapEntry.from_dict(row, base_folder) for row in rows])
+
+    def validate(self, instances_root: str, default_data: Dict, used_ports: Dict[int, str] = None) -> List[str]:
+        """Return every problem found in the manifest: missing, repeated or already existing names, unknown config.ini
+        entries, missing presets and invalid or colliding ports. Ports can't collide with each other nor with the
+        used_ports, which map a port to the instance already using it."""
+        errors = []
+        names = set()
+        ports: Dict[int, str] = {port: "'{}'".format(name) for port, name in (used_ports or {}).items()}
+        for i, entry in enumerate(self.entries):
+            label = "'{}'".format(entry.name) if entry.name != "" else "in row {}".format(i + 1)
+            if entry.name == "":
+                errors.append("The instance in row {} has no name.".format(i + 1))
+            elif entry.name in names:
+                errors.append("The instance name '{}' is repeated.".format(entry.name))
+            elif any(x in entry.name for x in "\\/:") or entry.name in (".", ".."):
+                errors.append("The instance name '{}' is not a valid folder name.".format(entry.name))
+            elif exists(join(instances_root, entry.name)):
+                errors.append("The instance {} is already present in {}.".format(label, instances_root))
+            names.add(entry.name)
+            for key in entry.entries:
+                if ConfigIni.resolve_entry(key) is None:
+                    errors.append("Unknown config.ini entry '{}' for the instance {}.".format(key, label))
+            if entry.preset != "" and not isfile(entry.preset):
+                errors.append("Could not find the preset '{}' of the instance {}.".format(entry.preset, label))
+            port = parse_port(entry.get_port(default_data))
+            if port is None:
+                errors.append("The instance {} has no valid port.".format(label))
+                continue
+            for used_port in get_ports_range(port):
+                if used_port in ports:
+                    errors.append("The ports of the instance {} ({}-{}) collide with the ones of the instance {}."
+                                  .format(label, port, port + ARMA_PORTS_SPAN - 1, ports[used_port]))
+                    break
+            for used_port in get_ports_range(port):
+                ports.setdefault(used_port, label)
+        return errors
+
+
+def _to_string(value) -> str:
+    """Return a manifest value as a config.ini string."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "y" if value else "n"
+    if isinstance(value, list):
+        return ", ".join(str(x) for x in value)
+    return str(value).strip()
+
+
+def _to_bool(value: str) -> bool:
+    """Parse a yes/no manifest value."""
+    return value.lower() in ("y", "yes", "true", "1")
+
+
+class InvalidManifest(Exception):
+    """"""
@@ -1,95 +1,221 @@
-from functools import reduce
-from typing import Dict
+import csv
+from configparser import ConfigParser
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, Union
 
 import pkg_resources
-import reusables
 import json
-from box import ConfigBox
 
 
 class ConfigIni:
     """Class responsible to deal with config.ini files."""
 
-    content: str = ""
-
     def create_file(self, file_path: str,
                     data: Dict = {}, add_comments: bool = True, add_no_value_entry: bool = True) -> None:
         """Create a config.ini file. Can fill it with data from a dict. Add comments and no value entry by default, but
         can omit them for a cleaner config file."""
+        content = self.render(data, add_comments, add_no_value_entry)
+        with open(file_path, "w+") as f:
+            f.write(content)
+
+    def create_files(self, files_data: Iterable[Tuple[str, Dict]], add_comments: bool = True,
+                     add_no_value_entry: bool = True) -> int:
+        """Create a config.ini file for every (file path, data) couple given. Return how many files were created."""
+        count = 0
+        for file_path, data in files_data:
+            self.create_file(file_path, data, add_comments, add_no_value_entry)
+            count += 1
+        return count
+
+    @staticmethod
+    def update_file(file_path: str, data: Dict[str, Dict[str, str]]) -> None:
+        """Set the given entries in an existing config.ini file, leaving every other line (comments included) as it is.
+        An entry replaces its active line or, failing that, its commented one; otherwise it's added to its section."""
+        with open(file_path, "r") as f:
+            lines = f.read().split("\n")
+        for section_title, entries in data.items():
+            start = next((i for i, line in enumerate(lines)
+                          if line.strip().lower() == "[{}]".format(section_title.lower())), None)
+            if start is None:
+                raise MissingConfigSection("Missing [{}] section in {}".format(section_title, file_path))
+            end = next((i for i in range(start + 1, len(lines)) if lines[i].strip().startswith("[")), len(lines))
+            for name, value in entries.items():
+                line = "{} = {}".format(name, value)
+                active = [i for i in range(start + 1, end) if lines[i].split("=")[0].strip() == name]
+                commented = [i for i in range(start + 1, end) if lines[i].split("=")[0].strip() == ";" + name]
+                if len(active + commented) > 0:
+                    lines[(active + commented)[0]] = line
+                else:
+                    lines.insert(start + 1, line)
+                    end += 1
+        with open(file_path, "w") as f:
+            f.write("\n".join(lines))
+
+    def render(self, data: Dict = {}, add_comments: bool = True, add_no_value_entry: bool = True) -> str:
+        """Return the content of a config.ini file filled with data from a dict, walking the config structure once."""
         config_structure = self._get_config_structure()
-        first_line = True
+        lines = []
         if add_comments:
-            self._add_line(config_structure["header"])
-            first_line = False
+            lines.append(config_structure["header"])
         for section in config_structure["sections"]:
-            if first_line:
-                first_line = False
-            else:
-                self._add_empty_line()
-            self._add_line("[{}]".format(section["title"]))
+            if len(lines) > 0:
+                lines.append("")
+            lines.append("[{}]".format(section["title"]))
             if add_comments:
-                for description_line in section["description"]:
-                    self._add_line(";;; {}".format(description_line))
+                lines += [";;; {}".format(description_line) for description_line in section["description"]]
+            section_data = data.get(section["title"], {})
             for entry in section["entries"]:
                 if add_comments:
-                    self._add_line(";; {}".format(entry["description"]))
-                self._set_entry_value(data, section["title"], entry, add_no_value_entry)
-        with open(file_path, "w+") as f:
-            f.write(self.content)
+                    lines.append(";; {}".format(entry["description"]))
+                line = self._get_entry_line(section_data, entry, add_no_value_entry)
+                if line is not None:
+                    lines.append(line)
+        lines.append("")
+        return "\n".join(lines)
 
-    def _set_entry_value(self, data: Dict, section_title: str, entry: Dict, add_no_value_entry: bool) -> None:
-        """Add to the file content the value, trying to get it from the provided data if possible."""
+    @staticmethod
+    def _get_entry_line(section_data: Dict, entry: Dict, add_no_value_entry: bool) -> Union[str, None]:
+        """Return the entry line, trying to get the value from the provided data if possible."""
         # try to get the actual entry
-        actual_entry = data.get(section_title, {}).get(entry["name"])
+        actual_entry = section_data.get(entry["name"])
         if actual_entry is None:
             if add_no_value_entry:
                 # no custom entry was provided, fallback to commented entry
-                default_value = entry.get("default_value", "")
-                self._add_line(";{} = {}".format(entry["name"], default_value))
-        else:
-            if isinstance(actual_entry, list):
-                if len(actual_entry) > 0:
-                    # The entry is a list, fix it
-                    actual_entry = reduce(lambda x, y: "{}, {}".format(x, y), actual_entry)
-                else:
-                    actual_entry = ""
-            self._add_line("{} = {}".format(entry["name"], actual_entry))
-
-    def _add_line(self, line: str) -> None:
-        """Add a line of text to the file content."""
-        self.content += "{}\n".format(line)
-
-    def _add_empty_line(self) -> None:
-        """Add an empty line to the file content."""
-        self.content += "\n"
+                return ";{} = {}".format(entry["name"], entry.get("default_value", ""))
+            return None
+        if isinstance(actual_entry, list):
+            # The entry is a list, fix it
+            actual_entry = ", ".join(map(str, actual_entry))
+        return "{} = {}".format(entry["name"], actual_entry)
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _get_config_structure() -> Dict:
-        """Return the config.ini structure as a dictionary, parsed from the json file in the templates folder."""
+        """Return the config.ini structure as a dictionary, parsed from the json file in the templates folder. It's
+        parsed only once: do not modify it."""
         config_structure_json = pkg_resources.resource_string('odk_servermanager',
                                                               "templates/config_ini.json").decode("UTF-8")
         return json.loads(config_structure_json)
 
+    @staticmethod
+    def get_entry_section(entry_name: str) -> Union[str, None]:
+        """Return the title of the section holding the given entry, or None if there's no such entry."""
+        return ConfigIni._get_entries_sections().get(entry_name)
+
+    @staticmethod
+    def resolve_entry(entry: str) -> Union[Tuple[str, str], None]:
+        """Return the section and the name of an entry given either plain (like hostname) or with its section (like
+        config.hostname), or None if there's no such entry."""
+        section, _, name = entry.strip().rpartition(".")
+        if section == "":
+            section = ConfigIni.get_entry_section(name)
+        return (section, name) if section is not None else None
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_entries_sections() -> Dict[str, str]:
+        """Map every entry name to its section title. When names clash, the first section wins."""
+        entries_sections = {}
+        for section in ConfigIni._get_config_structure()["sections"]:
+            for entry in section["entries"]:
+                entries_sections.setdefault(entry["name"], section["title"])
+        return entries_sections
+
+    @staticmethod
+    def read_csv(csv_file: str, base_data: Dict = None) -> List[Dict]:
+        """Read a csv file with one config.ini per row and return their data, ready for create_file. The header row
+        holds entry names, either plain (like hostname) or with their section (like config.hostname); every row starts
+        from a copy of base_data."""
+        base_data = base_data if base_data is not None else {}
+        with open(csv_file, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            columns = []
+            for column in header:
+                entry = ConfigIni.resolve_entry(column)
+                if entry is None:
+                    raise UnknownConfigEntry("Unknown config.ini entry '{}' in {}".format(column.strip(), csv_file))
+                columns.append(entry)
+            rows = []
+            for row in reader:
+                if len(row) == 0 or all(cell.strip() == "" for cell in row):
+                    continue
+                data = {section: dict(values) for section, values in base_data.items()}
+                for (section, name), value in zip(columns, row):
+                    if value.strip() != "":
+                        data.setdefault(section, {})[name] = value.strip()
+                rows.append(data)
+        return rows
+
     @staticmethod
     def read_file(file_path: str, bootstrap: bool = False) -> Dict:
         """Read the given file and parse and return raw settings from it."""
-        config = {"mod_fix_settings": {}}
-        settings = ConfigBox(reusables.config_dict(file_path))
-        # extract bat settings
-        config["bat"] = settings.bat.to_dict()
-        # extract arma config settings
-        config["config"] = settings.config.to_dict()
-        # fix list element in odksm settings
-        for el in ["user_mods_list", "mods_to_be_copied", "server_mods_list", "skip_keys"]:
-            if el in settings.ODKSM:
-                el_list = settings.ODKSM.list(el)
-                settings.ODKSM[el] = list(filter(lambda x: x != "", el_list))
-        # now save the odksm section
-        config["ODKSM"] = settings.ODKSM.to_dict()
-        # check for mod fixes
-        config["mod_fix_settings"] = settings.mod_fix_settings.to_dict()
-        if "enabled_fixes" in settings.mod_fix_settings:
-            config["mod_fix_settings"]["enabled_fixes"] = settings.mod_fix_settings.list("enabled_fixes")
-        if bootstrap:
-            config["bootstrap"] = settings.bootstrap.to_dict()
-        return config
+        return ConfigIni.load(file_path, bootstrap=bootstrap).to_dict()
+
+    @staticmethod
+    def load(file_path: str, bootstrap: bool = False) -> "ParsedConfig":
+        """Read the given file with a single configparser pass and return its validated sections."""
+        parser = ConfigParser()
+        parser.read(file_path)
+        sections = {section.lower(): section for section in parser.sections()}
+
+        def get_section(name: str) -> Dict[str, str]:
+            # section names are matched exactly first, then ignoring the case
+            section = name if parser.has_section(name) else sections.get(name.lower())
+            if section is None:
+                raise MissingConfigSection("Missing [{}] section in {}".format(name, file_path))
+            return dict(parser.items(section))
+
+        odksm = get_section("ODKSM")
+        for el in ParsedConfig.odksm_list_fields:
+            if el in odksm:
+                odksm[el] = split_list(odksm[el])
+        mod_fix_settings = get_section("mod_fix_settings")
+        if "enabled_fixes" in mod_fix_settings:
+            mod_fix_settings["enabled_fixes"] = split_list(mod_fix_settings["enabled_fixes"])
+        return ParsedConfig(odksm, get_section("bat"), get_section("config"), mod_fix_settings,
+                            get_section("bootstrap") if bootstrap else None)
+
+
+class ParsedConfig:
+    """The raw settings read from a config.ini file, one plain dict per section. List fields are already split.
+
+    :ODKSM: the main section
+    :bat: the bat file settings
+    :config: the server config file settings
+    :mod_fix_settings: the mod fixes settings, enabled_fixes included
+    :bootstrap: the bootstrap section, only when reading a bootstrap.ini
+    """
+
+    __slots__ = ("ODKSM", "bat", "config", "mod_fix_settings", "bootstrap")
+    odksm_list_fields = ["user_mods_list", "mods_to_be_copied", "server_mods_list", "skip_keys"]
+
+    def __init__(self, odksm: Dict, bat: Dict, config: Dict, mod_fix_settings: Dict,
+                 bootstrap: Union[Dict, None] = None):
+        self.ODKSM = odksm
+        self.bat = bat
+        self.config = config
+        self.mod_fix_settings = mod_fix_settings
+        self.bootstrap = bootstrap
+
+    def to_dict(self) -> Dict:
+        """Return the sections as a dict, like ConfigIni.read_file always did."""
+        data = {"ODKSM": self.ODKSM, "bat": self.bat, "config": self.config,
+                "mod_fix_settings": self.mod_fix_settings}
+        if self.bootstrap is not None:
+            data["bootstrap"] = self.bootstrap
+        return data
+
+
+def split_list(value: str) -> List[str]:
+    """Split a comma separated config value, ignoring surrounding brackets, whitespaces and empty elements."""
+    value = value.strip().lstrip("[").rstrip("]")
+    return [x.strip() for x in value.split(",") if x.strip() != ""]
+
+
+class MissingConfigSection(Exception):
+    """"""
+
+
+class UnknownConfigEntry(Exception):
+    """"""
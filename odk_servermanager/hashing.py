@@ -0,0 +1,165 @@
+import hashlib
+import json
+import mmap
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from os import makedirs, replace, scandir, cpu_count
+from os.path import join, isfile, dirname, relpath
+from typing import Callable, Dict, List, Tuple
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover
+    xxhash = None
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class _Crc32:
+    """hashlib-like wrapper around zlib.crc32, the fastest digest available without extra dependencies."""
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data) -> None:
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self) -> str:
+        return "{:08x}".format(self.value)
+
+
+def get_hasher_factory(algorithm: str) -> Callable:
+    """Return a callable creating a new hasher for the given algorithm: sha256, crc32 or, if the xxhash package is
+    installed, xxh64."""
+    if algorithm == "sha256":
+        return hashlib.sha256
+    if algorithm == "crc32":
+        return _Crc32
+    if algorithm == "xxh64":
+        if xxhash is None:
+            raise UnsupportedHashAlgorithm("The xxh64 algorithm requires the xxhash package.")
+        return xxhash.xxh64
+    raise UnsupportedHashAlgorithm("Unknown hash algorithm '{}'.".format(algorithm))
+
+
+def hash_file(file: str, algorithm: str = "sha256", chunk_size: int = CHUNK_SIZE) -> str:
+    """Return the hex digest of the given file. Big files are memory mapped and fed to the hasher in chunks, so that
+    no data gets copied in between."""
+    hasher = get_hasher_factory(algorithm)()
+    with open(file, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(0)
+        if size <= chunk_size:
+            hasher.update(f.read())
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, chunk_size):
+                        hasher.update(view[offset:offset + chunk_size])
+                finally:
+                    view.release()
+    return hasher.hexdigest()
+
+
+def _hash_file_job(job: Tuple[str, str]) -> str:
+    """Process pool entry point."""
+    return hash_file(*job)
+
+
+class TreeHasher:
+    """Compute the content hash of every file in a folder tree, like a mod folder.
+
+    :algorithm: the digest to use, see get_hasher_factory
+    :cache_file: where to persist the computed hashes; if None, nothing is cached across runs
+    :max_workers: the size of the process pool used to hash the changed files; 1 hashes them in this process
+    :min_parallel_bytes: below this amount of data to hash, the process pool is not worth starting
+
+    Every hash is cached keyed by the file inode, size and modification time: only changed files get hashed again.
+    """
+
+    def __init__(self, algorithm: str = "sha256", cache_file: str = None, max_workers: int = None,
+                 min_parallel_bytes: int = 64 * 1024 * 1024):
+        get_hasher_factory(algorithm)
+        self.algorithm = algorithm
+        self.cache_file = cache_file
+        self.max_workers = max_workers if max_workers is not None else (cpu_count() or 1)
+        self.min_parallel_bytes = min_parallel_bytes
+        self.cache: Dict[str, List] = {}
+        self._dirty = False
+        self._load()
+
+    def hash_tree(self, folder: str) -> Dict[str, str]:
+        """Return a dict mapping the path (relative to the folder, with forward slashes) of every file in the tree to
+        its hex digest."""
+        hashes = {}
+        to_hash: List[Tuple[str, str, List]] = []
+        for path, file_stat in self._walk(folder):
+            rel_path = relpath(path, folder).replace("\\", "/")
+            key = [file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns, self.algorithm]
+            cached = self.cache.get(path)
+            if cached is not None and cached[:4] == key:
+                hashes[rel_path] = cached[4]
+            else:
+                to_hash.append((rel_path, path, key))
+        for (rel_path, path, key), digest in zip(to_hash, self._hash_files([x[1] for x in to_hash],
+                                                                            sum(x[2][1] for x in to_hash))):
+            hashes[rel_path] = digest
+            self.cache[path] = key + [digest]
+            self._dirty = True
+        return hashes
+
+    def hash_tree_digest(self, folder: str) -> str:
+        """Return a single digest summarizing the whole tree: it changes if any file is added, removed or changed."""
+        hasher = get_hasher_factory(self.algorithm)()
+        for rel_path, digest in sorted(self.hash_tree(folder).items()):
+            hasher.update("{}\0{}\n".format(rel_path, digest).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def save(self) -> None:
+        """Persist the cache, if anything changed. Failing to save it is not an error."""
+        if self.cache_file is None or not self._dirty:
+            return
+        try:
+            makedirs(dirname(self.cache_file), exist_ok=True)
+            tmp_file = self.cache_file + ".tmp"
+            with open(tmp_file, "w+") as f:
+                json.dump(self.cache, f)
+            replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _load(self) -> None:
+        """Load the cache from disk, discarding it if unreadable."""
+        if self.cache_file is None or not isfile(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def _hash_files(self, files: List[str], total_bytes: int) -> List[str]:
+        """Hash the given files, in a process pool if there's enough work to do."""
+        if self.max_workers <= 1 or len(files) <= 1 or total_bytes < self.min_parallel_bytes:
+            return [hash_file(file, self.algorithm) for file in files]
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(files))) as executor:
+            return list(executor.map(_hash_file_job, [(file, self.algorithm) for file in files], chunksize=8))
+
+    @staticmethod
+    def _walk(folder: str):
+        """Yield the path and stat of every file in the tree, following symlinks to files but not to folders."""
+        folders = [folder]
+        while len(folders) > 0:
+            with scandir(folders.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path, entry.stat()
+
+
+class UnsupportedHashAlgorithm(Exception):
+    """"""
@@ -0,0 +1,273 @@
+from os import scandir, unlink, mkdir
+from os.path import join, exists, isdir, isfile, islink
+from typing import Callable, Dict, List, Tuple, Union
+
+from odk_servermanager.instance import ServerInstance
+from odk_servermanager.missions import find_missions_folder_name
+from odk_servermanager.utils import symlink
+
+# copied files mtime may be rounded by the filesystem (FAT has a 2 seconds resolution)
+MTIME_TOLERANCE_NS = 2 * 10 ** 9
+
+
+class HealthIssue:
+    """A problem found in a server instance folder.
+
+    :kind: a short machine readable identifier of the problem
+    :path: the path of the element with the problem
+    :message: a human readable description
+    :repair: a callable that fixes the problem, or None if it can't be fixed automatically
+    """
+
+    def __init__(self, kind: str, path: str, message: str, repair: Union[Callable[[], None], None] = None):
+        self.kind = kind
+        self.path = path
+        self.message = message
+        self.repair = repair
+
+    def __repr__(self) -> str:
+        return "HealthIssue({}, {})".format(self.kind, self.path)
+
+
+class InstanceHealthChecker:
+    """Validate an existing server instance folder against its settings, without booting it.
+
+    The instance folder is walked once with scandir, never following symlinks, then checked for: dangling links in the
+    instance root, the linked mods folder and the keys folder, missing core links and folders, missing or unexpected
+    mods, copied mods that drifted from the !Workshop (by file list, size and modification time) and compiled files
+    that differ from what the current settings would produce. Every issue carries its own incremental repair.
+    """
+
+    mod_issues = ["dangling_link", "missing_mod", "unexpected_mod", "drifted_mod"]
+
+    def __init__(self, instance: ServerInstance):
+        self.instance = instance
+        self.S = instance.S
+        self.root = instance.get_server_instance_path()
+        self.workshop_folder = join(self.S.arma_folder, "!Workshop")
+
+    def check(self) -> List[HealthIssue]:
+        """Return every problem found in the instance folder."""
+        if not isdir(self.root):
+            return [HealthIssue("missing_instance", self.root, "The instance folder does not exist.")]
+        top, linked, keys, copied = self._walk_instance()
+        issues = []
+        issues += self._check_core(top)
+        issues += self._check_linked_mods(linked)
+        issues += self._check_keys(keys)
+        issues += self._check_copied_mods(copied)
+        issues += self._check_compiled_files()
+        return issues
+
+    def repair(self, issues: List[HealthIssue]) -> List[HealthIssue]:
+        """Repair the given issues, one by one, and return the ones that could not be repaired. Since mod keys are
+        linked through the mods folders, keys are relinked if any mod was touched."""
+        not_repaired = []
+        for issue in issues:
+            if issue.repair is None:
+                not_repaired.append(issue)
+            else:
+                issue.repair()
+        if any(issue.repair is not None and issue.kind in self.mod_issues for issue in issues):
+            self.instance._update_keys()
+        return not_repaired
+
+    def _walk_instance(self) -> Tuple[Dict, Dict, Dict, Dict[str, Dict[str, Tuple[int, int]]]]:
+        """Walk the instance folder once, recording the DirEntry of the elements in the root, in the linked mods and
+        in the keys folder, and the relative path, size and mtime of every file in the copied mods."""
+        top, linked, keys, copied = {}, {}, {}, {}
+        with scandir(self.root) as it:
+            for entry in it:
+                top[entry.name] = entry
+        for folder_name, entries in [(self.S.linked_mod_folder_name, linked),
+                                     (self.instance.keys_folder_name, keys)]:
+            if folder_name in top and top[folder_name].is_dir(follow_symlinks=False):
+                with scandir(top[folder_name].path) as it:
+                    for entry in it:
+                        entries[entry.name] = entry
+        copied_folder = top.get(self.S.copied_mod_folder_name)
+        if copied_folder is not None and copied_folder.is_dir(follow_symlinks=False):
+            with scandir(copied_folder.path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        copied[entry.name] = self._get_tree_stats(entry.path)
+        return top, linked, keys, copied
+
+    @staticmethod
+    def _get_tree_stats(folder: str) -> Dict[str, Tuple[int, int]]:
+        """Return the relative path, size and mtime of every file in the tree, without following symlinks."""
+        stats = {}
+        folders = [("", folder)]
+        while len(folders) > 0:
+            rel_folder, folder = folders.pop()
+            with scandir(folder) as it:
+                for entry in it:
+                    rel_path = rel_folder + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append((rel_path + "/", entry.path))
+                    else:
+                        entry_stat = entry.stat(follow_symlinks=False)
+                        stats[rel_path] = (entry_stat.st_size, entry_stat.st_mtime_ns)
+        return stats
+
+    def _check_core(self, top: Dict) -> List[HealthIssue]:
+        """Check the core links and folders created by _prepare_server_core."""
+        issues = []
+        for name, entry in top.items():
+            if entry.is_symlink() and not exists(entry.path):
+                issues.append(HealthIssue("dangling_link", entry.path, "'{}' links to a missing target.".format(name),
+                                          self._relink_core(name)))
+        private_missions = self.instance._get_needed_missions() is not None
+        with scandir(self.S.arma_folder) as it:
+            expected_links = [entry.name for entry in it
+                              if self.instance._filter_symlinks(entry.name, private_missions)]
+        for name in expected_links:
+            if name not in top:
+                issues.append(HealthIssue("missing_core_link", join(self.root, name),
+                                          "The link to the Arma '{}' is missing.".format(name),
+                                          self._relink_core(name)))
+        for name in [self.instance.keys_folder_name, self.S.linked_mod_folder_name, self.S.copied_mod_folder_name,
+                     "userconfig"]:
+            if name not in top:
+                issues.append(HealthIssue("missing_folder", join(self.root, name),
+                                          "The '{}' folder is missing.".format(name),
+                                          lambda folder=join(self.root, name): mkdir(folder)))
+        missions_folder = find_missions_folder_name(self.S.arma_folder)
+        if private_missions and not isdir(join(self.root, missions_folder)):
+            issues.append(HealthIssue("missing_folder", join(self.root, missions_folder),
+                                      "The '{}' folder is missing.".format(missions_folder),
+                                      self.instance._link_missions))
+        for key in self.instance.arma_keys:
+            arma_key = join(self.S.arma_folder, self.instance.keys_folder_name, key)
+            if isfile(arma_key) and self.instance.keys_folder_name in top:
+                instance_key = join(self.root, self.instance.keys_folder_name, key)
+                if not exists(instance_key):
+                    issues.append(HealthIssue("missing_core_link", instance_key,
+                                              "The link to the Arma key '{}' is missing.".format(key),
+                                              lambda src=arma_key, dest=instance_key: symlink(src, dest)))
+        return issues
+
+    def _relink_core(self, name: str) -> Callable[[], None]:
+        """Return a repair function that (re)links an element of the Arma folder, or removes it if it's gone."""
+        def repair() -> None:
+            dest = join(self.root, name)
+            if islink(dest):
+                unlink(dest)
+            src = join(self.S.arma_folder, name)
+            if exists(src) and self.instance._filter_symlinks(name):
+                symlink(src, dest)
+        return repair
+
+    def _check_linked_mods(self, linked: Dict) -> List[HealthIssue]:
+        """Check that every mod that should be linked is there and working, and that no other mod is."""
+        issues = []
+        copied = set(self.S.mods_to_be_copied)
+        expected = [mod for mod in dict.fromkeys(self.S.user_mods_list + self.S.server_mods_list)
+                    if mod not in copied]
+        expected_set = set(expected)
+        for name, entry in linked.items():
+            if not entry.is_symlink():
+                continue
+            if not exists(entry.path):
+                issues.append(HealthIssue("dangling_link", entry.path,
+                                          "The linked mod '{}' points to a missing folder.".format(name),
+                                          self._relink_mod(name[1:])))
+            elif name.startswith("@") and name[1:] not in expected_set:
+                issues.append(HealthIssue("unexpected_mod", entry.path,
+                                          "The mod '{}' is linked but not in the mods lists.".format(name[1:]),
+                                          lambda path=entry.path: unlink(path)))
+        for mod in expected:
+            if "@" + mod not in linked:
+                issues.append(HealthIssue("missing_mod", join(self.root, self.S.linked_mod_folder_name, "@" + mod),
+                                          "The mod '{}' is not linked.".format(mod), self._relink_mod(mod)))
+        return issues
+
+    def _relink_mod(self, mod_name: str) -> Callable[[], None]:
+        """Return a repair function that (re)links a mod, or just removes its link if it's no longer needed."""
+        def repair() -> None:
+            link = join(self.root, self.S.linked_mod_folder_name, "@" + mod_name)
+            if islink(link):
+                unlink(link)
+            if mod_name in self.S.user_mods_list + self.S.server_mods_list and \
+                    mod_name not in self.S.mods_to_be_copied:
+                self.instance._symlink_mod(mod_name)
+        return repair
+
+    def _check_keys(self, keys: Dict) -> List[HealthIssue]:
+        """Check the keys folder for dangling links."""
+        issues = []
+        for name, entry in keys.items():
+            if entry.is_symlink() and not exists(entry.path):
+                issues.append(HealthIssue("dangling_link", entry.path,
+                                          "The key '{}' points to a missing file.".format(name),
+                                          lambda path=entry.path: unlink(path)))
+        return issues
+
+    def _check_copied_mods(self, copied: Dict[str, Dict[str, Tuple[int, int]]]) -> List[HealthIssue]:
+        """Check that every mod to be copied is there and still matches the one in the !Workshop. Mods handled by a
+        mod fix are expected to differ, so their content is not compared."""
+        issues = []
+        for mod in dict.fromkeys(self.S.mods_to_be_copied):
+            mod_folder = join(self.root, self.S.copied_mod_folder_name, "@" + mod)
+            if "@" + mod not in copied:
+                issues.append(HealthIssue("missing_mod", mod_folder, "The mod '{}' is not copied.".format(mod),
+                                          self._recopy_mod(mod)))
+                continue
+            workshop_mod_folder = join(self.workshop_folder, "@" + mod)
+            if self.instance._get_mod_fix(mod) is not None or not isdir(workshop_mod_folder):
+                continue
+            drifted = self._get_drifted_files(copied["@" + mod], self._get_tree_stats(workshop_mod_folder))
+            if len(drifted) > 0:
+                issues.append(HealthIssue("drifted_mod", mod_folder,
+                                          "The copied mod '{}' differs from the !Workshop one: {}".format(
+                                              mod, ", ".join(drifted[:5]) + (", ..." if len(drifted) > 5 else "")),
+                                          self._recopy_mod(mod)))
+        copied_set = set(self.S.mods_to_be_copied)
+        for name in copied:
+            if name[1:] not in copied_set:
+                issues.append(HealthIssue("unexpected_mod", join(self.root, self.S.copied_mod_folder_name, name),
+                                          "The mod '{}' is copied but not in the mods to be copied.".format(name[1:]),
+                                          lambda mod=name[1:]: self.instance._clear_copied_mod(mod)))
+        return issues
+
+    @staticmethod
+    def _get_drifted_files(copied: Dict[str, Tuple[int, int]], original: Dict[str, Tuple[int, int]]) -> List[str]:
+        """Return the sorted relative paths of the files added, removed or changed between the two trees."""
+        drifted = []
+        for rel_path in copied.keys() | original.keys():
+            if rel_path not in copied or rel_path not in original or copied[rel_path][0] != original[rel_path][0] \
+                    or abs(copied[rel_path][1] - original[rel_path][1]) > MTIME_TOLERANCE_NS:
+                drifted.append(rel_path)
+        return sorted(drifted)
+
+    def _recopy_mod(self, mod_name: str) -> Callable[[], None]:
+        """Return a repair function that copies a mod again from the !Workshop, mod fixes included."""
+        def repair() -> None:
+            if isdir(join(self.root, self.S.copied_mod_folder_name, "@" + mod_name)):
+                self.instance._clear_copied_mod(mod_name)
+            self.instance._apply_hooks_and_do_op("update", "copy", mod_name)
+        return repair
+
+    def _check_compiled_files(self) -> List[HealthIssue]:
+        """Check that the compiled files match what the current settings would produce."""
+        issues = []
+        compiled_files = [
+            ("run_server.bat", self.instance._render_bat_file, self.instance._compile_bat_file),
+            ("run_server.sh", self.instance._render_sh_file, self.instance._compile_sh_file),
+            (self.S.bat_settings.server_config_file_name, self.instance._render_config_file,
+             self.instance._compile_config_file)]
+        if self.instance._is_basic_cfg_generated():
+            compiled_files.append((self.S.bat_settings.server_cfg_file_name, self.instance._render_basic_cfg_file,
+                                   self.instance._compile_basic_cfg_file))
+        for file_name, render, compile_file in compiled_files:
+            file = join(self.root, file_name)
+            if not isfile(file):
+                issues.append(HealthIssue("missing_compiled_file", file, "The '{}' file is missing.".format(file_name),
+                                          compile_file))
+                continue
+            with open(file, "r") as f:
+                if f.read() != render():
+                    issues.append(HealthIssue("stale_compiled_file", file,
+                                              "The '{}' file is out of date with the settings.".format(file_name),
+                                              compile_file))
+        return issues
@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import time
+import zlib
+from glob import glob
+from os.path import basename, dirname, isfile, join
+from typing import Dict, List, Union
+
+from odk_servermanager.planner import MAX_MEM_STEP, MIN_MAX_MEM, RESERVED_MEMORY
+from odk_servermanager.utils import get_host_memory, parse_cpu_list
+
+# below this write throughput, in MB/s, missions are better kept in memory than read from disk
+SLOW_STORAGE_THROUGHPUT = 100
+STORAGE_PROBE_SIZE = 32 * 1024 ** 2
+STORAGE_PROFILE_FILE = join("__odksm__", "storage_profile.json")
+
+
+def get_cpu_count(cpus: List[int] = None) -> int:
+    """Return how many cores a server can use: the ones it's pinned to, if any, or all the host ones."""
+    if cpus is not None and len(cpus) > 0:
+        return len(cpus)
+    return os.cpu_count() or 1
+
+
+def get_ex_threads(cpu_count: int) -> int:
+    """Return the -exThreads value for a server with the given cores: every extra thread (file operations, texture
+    and geometry loading) needs a core of its own, besides the main one."""
+    if cpu_count >= 4:
+        return 7
+    if cpu_count >= 2:
+        return 3
+    return 0
+
+
+class HostProfile:
+    """What a server can count on from the host it runs on.
+
+    :cpus: the logical CPUs of the host
+    :physical_cores: the physical core of every logical CPU, as a core id shared by its hyper-threads
+    :numa_nodes: the logical CPUs of every NUMA node
+    :memory: the host physical memory in MB
+    :storage_throughput: the write throughput in MB/s of the instances storage, or None if not measured
+    """
+
+    def __init__(self, cpus: List[int], physical_cores: Dict[int, str], numa_nodes: List[List[int]], memory: int,
+                 storage_throughput: Union[float, None] = None):
+        self.cpus = cpus
+        self.physical_cores = physical_cores
+        self.numa_nodes = numa_nodes
+        self.memory = memory
+        self.storage_throughput = storage_throughput
+
+    @staticmethod
+    def detect(storage_folder: str = None) -> "HostProfile":
+        """Profile the host. The storage throughput is read only if a storage folder is given. Topology details
+        come from Linux sysfs: elsewhere every logical CPU counts as a physical core, in a single NUMA node."""
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(get_cpu_count()))
+        physical_cores = {}
+        for cpu in cpus:
+            topology = "/sys/devices/system/cpu/cpu{}/topology".format(cpu)
+            core_id = _read_sys_file(join(topology, "core_id"))
+            package_id = _read_sys_file(join(topology, "physical_package_id"))
+            physical_cores[cpu] = "{}:{}".format(package_id, core_id) if core_id is not None else str(cpu)
+        numa_nodes = []
+        for node in sorted(glob("/sys/devices/system/node/node[0-9]*"), key=lambda x: int(basename(x)[4:])):
+            node_cpus = [x for x in parse_cpu_list(_read_sys_file(join(node, "cpulist")) or "") if x in cpus]
+            if len(node_cpus) > 0:
+                numa_nodes.append(node_cpus)
+        if len(numa_nodes) == 0:
+            numa_nodes = [cpus]
+        storage_throughput = get_storage_throughput(storage_folder) if storage_folder is not None else None
+        return HostProfile(cpus, physical_cores, numa_nodes, get_host_memory() // 1024 ** 2, storage_throughput)
+
+    def count_physical_cores(self, cpus: List[int] = None) -> int:
+        """Return how many physical cores the given logical CPUs (or all of them) belong to."""
+        cpus = cpus if cpus is not None and len(cpus) > 0 else self.cpus
+        return len({self.physical_cores.get(x, str(x)) for x in cpus})
+
+    def pick_numa_node(self, key: str) -> Union[List[int], None]:
+        """Return the CPUs of the NUMA node a server should be pinned to, picked in a stable way from the given key, or
+        None if the host has a single node."""
+        if len(self.numa_nodes) < 2:
+            return None
+        return self.numa_nodes[zlib.crc32(key.encode()) % len(self.numa_nodes)]
+
+    def recommend(self, cpus: List[int] = None, windows_malloc: str = "") -> Dict[str, str]:
+        """Return the recommended performance flags, by name, for a server running on the given CPUs (or all of them).
+        windows_malloc is the allocator to suggest, if any is available."""
+        cpus = cpus if cpus is not None and len(cpus) > 0 else self.cpus
+        physical = self.count_physical_cores(cpus)
+        flags = {"cpuCount": str(physical), "exThreads": str(get_ex_threads(physical))}
+        if len(cpus) > physical:
+            flags["enableHT"] = ""
+        if windows_malloc != "":
+            flags["malloc"] = windows_malloc
+        if self.storage_throughput is not None and self.storage_throughput < SLOW_STORAGE_THROUGHPUT:
+            flags["loadMissionToMemory"] = ""
+        return flags
+
+    def recommend_max_mem(self) -> int:
+        """Return the recommended -maxMem, in MB, for a server having the host to itself."""
+        return max(MIN_MAX_MEM, (self.memory - RESERVED_MEMORY) // MAX_MEM_STEP * MAX_MEM_STEP)
+
+
+def get_storage_throughput(folder: str) -> float:
+    """Return the write throughput, in MB/s, of the storage holding the given folder. It's measured only the first
+    time and then kept in the __odksm__ folder there, so that the flags depending on it don't change from a run to the
+    next: delete that file to measure it again."""
+    profile_file = join(folder, STORAGE_PROFILE_FILE)
+    try:
+        with open(profile_file, "r") as f:
+            return float(json.load(f)["storage_throughput"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    throughput = measure_storage_throughput(folder)
+    try:
+        os.makedirs(dirname(profile_file), exist_ok=True)
+        with open(profile_file, "w+") as f:
+            json.dump({"storage_throughput": throughput}, f)
+    except OSError:
+        pass
+    return throughput
+
+
+def measure_storage_throughput(folder: str) -> float:
+    """Return the write throughput, in MB/s, of the storage holding the given folder, writing and syncing a probe
+    file there."""
+    chunk = os.urandom(1024 ** 2)
+    fd, probe = tempfile.mkstemp(dir=folder, prefix=".odksm_probe_")
+    try:
+        start = time.perf_counter()
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(STORAGE_PROBE_SIZE // len(chunk)):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        elapsed = max(time.perf_counter() - start, 1e-6)
+    finally:
+        os.remove(probe)
+    return STORAGE_PROBE_SIZE / 1024 ** 2 / elapsed
+
+
+def _read_sys_file(file_name: str) -> Union[str, None]:
+    """Return the stripped content of a sysfs file, or None if it's not there."""
+    if not isfile(file_name):
+        return None
+    try:
+        with open(file_name, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
@@ -1,11 +1,26 @@
-from os import mkdir, listdir, unlink, remove
+import shlex
+from collections import Counter
+from functools import partial
+from os import mkdir, listdir, unlink, remove, chmod
 from os.path import isdir, islink, join, splitext, isfile, abspath
-from typing import List
+from threading import Lock
+from typing import Callable, Dict, List, Tuple, Union
 
 import pkg_resources
 
+from odk_servermanager.config_ini import split_list
+from odk_servermanager.host import HostProfile, get_cpu_count, get_ex_threads
+from odk_servermanager.journal import InitJournal
+from odk_servermanager.missions import MissionIndex, find_missions_folder_name, get_missing_addons
+from odk_servermanager.network import get_network_settings
+from odk_servermanager.progress import CopyProgress
+from odk_servermanager.scheduler import HookResources, ModOpScheduler
 from odk_servermanager.settings import ServerInstanceSettings
-from odk_servermanager.utils import symlink, compile_from_template, copytree, rmtree
+from odk_servermanager.signatures import SignaturesVerifier
+from odk_servermanager.utils import symlink, compile_from_template, copytree, rmtree, clonetree, get_folder_size, \
+    render_template, parse_cpu_list
+from odk_servermanager.workshop import WorkshopIndex, ModDependencyGraph, find_addon_conflicts, get_provided_addons, \
+    get_required_addons
 
 
 class ServerInstance:
@@ -15,11 +30,21 @@ class ServerInstance:
     keys_folder_name = "Keys"
     arma_keys = ["a3.bikey", "a3c.bikey", "gm.bikey"]
     warnings: List[str] = []
-
-    def __init__(self, settings: ServerInstanceSettings):
+    base_instance_path: Union[str, None] = None
+    journal: Union[InitJournal, None] = None
+    workshop_index: Union[WorkshopIndex, None] = None
+    mission_index: Union[MissionIndex, None] = None
+    dependency_graph: Union[ModDependencyGraph, None] = None
+    host_profile: Union[HostProfile, None] = None
+    _mod_fix_dispatcher = None
+
+    def __init__(self, settings: ServerInstanceSettings,
+                 progress_listeners: List[Callable[[CopyProgress], None]] = None):
         self.S = settings
+        self.progress = CopyProgress(listeners=progress_listeners)
         from odk_servermanager.modfix import register_fixes
-        self.registered_fix = register_fixes(enabled_fixes=self.S.fix_settings.enabled_fixes)
+        self.registered_fix = register_fixes(enabled_fixes=self.S.fix_settings.enabled_fixes,
+                                             plugins_folder=self.S.fix_settings.plugins_folder)
         for fix in self.registered_fix:
             fix.update_mods_to_be_copied_list(self.S.mods_to_be_copied, self.S.user_mods_list, self.S.server_mods_list)
 
@@ -31,6 +56,10 @@ class ServerInstance:
         """Check if the folder instance is already present."""
         return isdir(self.get_server_instance_path())
 
+    def is_init_interrupted(self) -> bool:
+        """Check if the folder instance is there, but its init was interrupted before completing."""
+        return InitJournal(self.get_server_instance_path()).exists()
+
     def _new_server_folder(self) -> None:
         """Create a new server folder."""
         if not self.is_folder_instance_already_there():
@@ -38,10 +67,17 @@ class ServerInstance:
         else:
             raise DuplicateServerName()
 
-    def _filter_symlinks(self, element: str) -> bool:
-        """Filter out certain directory that won't be symlinked."""
-        not_to_be_symlinked = ["!Workshop", self.keys_folder_name, "run_server.bat", "userconfig",
+    def _filter_symlinks(self, element: str, private_missions: bool = None) -> bool:
+        """Filter out certain directory that won't be symlinked. private_missions tells if the instance has its own
+        MPMissions folder: pass it when filtering a whole folder, so that the missions selection is read only once."""
+        not_to_be_symlinked = ["!Workshop", self.keys_folder_name, "run_server.bat", "run_server.sh", "userconfig",
                                self.S.bat_settings.server_config_file_name, "__odksm__"]
+        if self._is_basic_cfg_generated():
+            not_to_be_symlinked.append(self.S.bat_settings.server_cfg_file_name)
+        if private_missions is None:
+            private_missions = self._get_needed_missions() is not None
+        if private_missions and element.lower() == MissionIndex.missions_folder_name.lower():
+            return False
         return not (element.startswith(self.S.server_instance_prefix) or element in not_to_be_symlinked)
 
     def _prepare_server_core(self) -> None:
@@ -49,24 +85,94 @@ class ServerInstance:
         # make all needed symlink
         server_folder = self.get_server_instance_path()
         arma_folder_list = listdir(self.S.arma_folder)
-        to_be_linked = list(filter(lambda x: self._filter_symlinks(x), arma_folder_list))
+        private_missions = self._get_needed_missions() is not None
+        to_be_linked = list(filter(lambda x: self._filter_symlinks(x, private_missions), arma_folder_list))
         for el in to_be_linked:
             src = join(self.S.arma_folder, el)
             dest = join(server_folder, el)
-            symlink(src, dest)
+            # an interrupted init may have already linked it
+            if not islink(dest):
+                symlink(src, dest)
         # Create the needed folder
         to_be_created = [self.keys_folder_name, self.S.linked_mod_folder_name,
                          self.S.copied_mod_folder_name, "userconfig"]
         for folder in to_be_created:
             folder = join(server_folder, folder)
-            mkdir(folder)
+            if not isdir(folder):
+                mkdir(folder)
         # Copy the arma keyfiles
         for key in self.arma_keys:
             arma_key_folder = join(self.S.arma_folder, self.keys_folder_name)
             instance_key_folder = join(server_folder, self.keys_folder_name)
-            if isfile(join(arma_key_folder, key)):
+            if isfile(join(arma_key_folder, key)) and not islink(join(instance_key_folder, key)):
                 symlink(join(arma_key_folder, key), join(instance_key_folder, key))
 
+    def _get_needed_missions(self) -> Union[List[str], None]:
+        """Return the missions the instance needs (the mission_template one and the missions_list ones), or None if it
+        uses the whole MPMissions folder, with a * in missions_list."""
+        missions = split_list(self.S.config_settings.get("missions_list", ""))
+        if "*" in missions:
+            return None
+        return list(dict.fromkeys([self.S.config_settings.mission_template] + missions))
+
+    def _get_mission_index(self) -> MissionIndex:
+        """Return the MPMissions index, loading it if needed."""
+        if self.mission_index is None:
+            self.mission_index = MissionIndex(self.S.arma_folder)
+        return self.mission_index
+
+    def _link_missions(self) -> None:
+        """Link only the needed missions in the instance private MPMissions folder, so that the server doesn't scan the
+        whole shared one at startup. Missions no longer needed get unlinked, and a link to the whole shared folder
+        (made before the instance had a missions selection) gets replaced. With a * in missions_list, the private
+        folder gets replaced by a link to the whole shared one instead."""
+        missions = self._get_needed_missions()
+        index = self._get_mission_index()
+        instance_folder = join(self.get_server_instance_path(), find_missions_folder_name(self.S.arma_folder))
+        if missions is None:
+            if isdir(instance_folder) and not islink(instance_folder):
+                rmtree(instance_folder)
+            if not islink(instance_folder) and isdir(index.missions_folder):
+                symlink(index.missions_folder, instance_folder)
+            return
+        if islink(instance_folder):
+            unlink(instance_folder)
+        if not isdir(instance_folder):
+            mkdir(instance_folder)
+        found = [x for x in index.find_missions(missions).values() if x is not None]
+        for mission in listdir(instance_folder):
+            if mission not in found and islink(join(instance_folder, mission)):
+                unlink(join(instance_folder, mission))
+        for mission in found:
+            if not islink(join(instance_folder, mission)):
+                symlink(join(index.missions_folder, mission), join(instance_folder, mission))
+
+    def _check_missions(self) -> None:
+        """Check that every needed mission is in the MPMissions folder and that the mods lists provide every addon it
+        requires, so that a mission that can't load gets caught before the server boots."""
+        missions = self._get_needed_missions()
+        if missions is None:
+            return
+        index = self._get_mission_index()
+        workshop_index = self._get_workshop_index()
+        provided = set()
+        for record in workshop_index.get_mods(self.S.user_mods_list + self.S.server_mods_list).values():
+            provided.update(get_provided_addons(record))
+        workshop_index.save()
+        for name, mission in index.find_missions([x for x in missions if x != ""]).items():
+            if mission is None:
+                self._add_warning("Could not find the mission '{}' in the MPMissions folder!".format(name))
+                continue
+            record = index.get_mission(mission)
+            if "error" in record:
+                self._add_warning("Could not read the addons required by the mission '{}': {}".format(
+                    mission, record["error"]))
+            missing = get_missing_addons(record, provided)
+            if len(missing) > 0:
+                self._add_warning("The mission '{}' requires addons not provided by the mods lists: {}".format(
+                    mission, ", ".join(missing)))
+        index.save()
+
     def _symlink_mod(self, mod_name) -> None:
         """Symlink a single mod in the linked mod folder."""
         server_folder = self.get_server_instance_path()
@@ -93,40 +199,95 @@ class ServerInstance:
         mod_folder = "@" + mod_name
         target_folder = join(server_folder, self.S.copied_mod_folder_name)
         if not isdir(join(target_folder, mod_folder)):
-            # The mod is not already copied, so copy it
-            copytree(join(workshop_folder, mod_folder), join(target_folder, mod_folder))
+            base_mod_folder = self._get_base_instance_copied_mod(mod_name)
+            if base_mod_folder is not None:
+                # We are cloning and the base instance already has this mod, so clone it from there
+                clonetree(base_mod_folder, join(target_folder, mod_folder), progress_callback=self.progress.update)
+            else:
+                # The mod is not already copied, so copy it
+                copytree(join(workshop_folder, mod_folder), join(target_folder, mod_folder),
+                         progress_callback=self.progress.update)
+
+    def _get_base_instance_copied_mod(self, mod_name: str) -> Union[str, None]:
+        """Return the path of the given mod in the base instance copied mods folder, if cloning and if it's there."""
+        if self.base_instance_path is None:
+            return None
+        base_mod_folder = join(self.base_instance_path, self.S.copied_mod_folder_name, "@" + mod_name)
+        return base_mod_folder if isdir(base_mod_folder) else None
 
     def _start_op_on_mods(self, stage: str, mods_list: List[str]) -> None:
         """Start an init or update operation on a mod. The flow is:
-        _start_op_on_mods >> _apply_hooks_and_do_op >> hooks || _do_default_op"""
+        _start_op_on_mods >> _apply_hooks_and_do_op >> hooks || _do_default_op
+        When an init journal is active, completed mods are skipped and every mod is recorded in it."""
+        journaled = stage == "init" and self.journal is not None
+        journal_lock = Lock()
+
+        def do_op(mod_name: str, operation: str) -> None:
+            if journaled:
+                with journal_lock:
+                    self.journal.mark_mod_started(mod_name)
+            self._apply_hooks_and_do_op(stage, operation, mod_name)
+            if journaled:
+                with journal_lock:
+                    self.journal.mark_mod_done(mod_name)
+
+        jobs = []
         for mod in mods_list:
-            if mod in self.S.mods_to_be_copied:
-                self._apply_hooks_and_do_op(stage, "copy", mod)
-            else:
-                self._apply_hooks_and_do_op(stage, "link", mod)
+            if journaled and self.journal.is_mod_done(mod):
+                continue
+            operation = "copy" if mod in self.S.mods_to_be_copied else "link"
+            jobs.append((self._get_mod_op_resources(stage, operation, mod), partial(do_op, mod, operation)))
+        ModOpScheduler(self.S.mods_workers).run(jobs)
         self._symlink_warning_folder()
 
+    def _get_mod_op_resources(self, stage: str, operation: str, mod_name: str) -> HookResources:
+        """Return the paths touched by an operation on a mod: the default operation and every hook of its mod fixes."""
+        mods_folder = self.S.copied_mod_folder_name if operation == "copy" else self.S.linked_mod_folder_name
+        reads = [join(self.S.arma_folder, "!Workshop", "@" + mod_name)]
+        base_mod_folder = self._get_base_instance_copied_mod(mod_name) if operation == "copy" else None
+        if base_mod_folder is not None:
+            reads.append(base_mod_folder)
+        resources = HookResources(reads=reads, writes=[join(self.get_server_instance_path(), mods_folder,
+                                                            "@" + mod_name)])
+        hooks_resources = self._get_mod_fix_dispatcher().get_resources(mod_name, stage, operation, self)
+        return resources.merge(hooks_resources) if hooks_resources is not None else resources
+
+    def _clear_interrupted_mods(self) -> None:
+        """Remove whatever an interrupted init left behind for the mods it was working on, so they can be redone."""
+        server_folder = self.get_server_instance_path()
+        for mod in self.journal.get_interrupted_mods():
+            linked_mod = join(server_folder, self.S.linked_mod_folder_name, "@" + mod)
+            copied_mod = join(server_folder, self.S.copied_mod_folder_name, "@" + mod)
+            if islink(linked_mod):
+                unlink(linked_mod)
+            if isdir(copied_mod):
+                rmtree(copied_mod)
+
+    def _get_mod_fix_dispatcher(self):
+        """Return the dispatch table of the registered mod fixes, building it again if they changed."""
+        if self._mod_fix_dispatcher is None or self._mod_fix_dispatcher.registered_fix is not self.registered_fix:
+            from odk_servermanager.modfix import ModFixDispatcher
+            self._mod_fix_dispatcher = ModFixDispatcher(self.registered_fix)
+        return self._mod_fix_dispatcher
+
+    def _get_mod_fix(self, mod_name: str):
+        """Return the first registered mod fix that applies to the given mod, or None."""
+        mod_fix = self._get_mod_fix_dispatcher().get_fixes(mod_name)
+        return mod_fix[0] if len(mod_fix) > 0 else None
+
     def _apply_hooks_and_do_op(self, stage: str, operation: str, mod_name: str) -> None:
         """Method that calls hooks if present, otherwise call _do_default_op."""
-        # Check if mod fixes are registered for this mod
-        mod_fix = list(filter(lambda x: x.does_apply_to_mod(mod_name), self.registered_fix))
-        mod_fix = mod_fix[0] if len(mod_fix) > 0 else None
-        # Compose the hooks names and call data
-        pre_hook_name = "{}_{}_pre".format(stage, operation)
-        replace_hook_name = "{}_{}_replace".format(stage, operation)
-        post_hook_name = "{}_{}_post".format(stage, operation)
+        pre_hooks, replace_hook, post_hooks = self._get_mod_fix_dispatcher().get_hooks(mod_name, stage, operation)
         call_data = [stage, operation, mod_name]
-        # If available, call its pre hook
-        if mod_fix is not None and getattr(mod_fix, "hook_{}".format(pre_hook_name)) is not None:
-            mod_fix.hook_caller(pre_hook_name, self, call_data)
-        # If available, call its replace hook, else execute the correct function
-        if mod_fix is not None and getattr(mod_fix, "hook_{}".format(replace_hook_name)) is not None:
-            mod_fix.hook_caller(replace_hook_name, self, call_data)
+        for hook in pre_hooks:
+            hook(self, call_data)
+        # If available, call the replace hook, else execute the correct function
+        if replace_hook is not None:
+            replace_hook(self, call_data)
         else:
             self._do_default_op(stage, operation, mod_name)
-        # If available, call its post hook
-        if mod_fix is not None and getattr(mod_fix, "hook_{}".format(post_hook_name)) is not None:
-            mod_fix.hook_caller(post_hook_name, self, call_data)
+        for hook in post_hooks:
+            hook(self, call_data)
 
     def _do_default_op(self, stage: str, operation: str, mod_name: str) -> None:
         """Perform default link and copy operation, both on init and on update."""
@@ -146,6 +307,28 @@ class ServerInstance:
                 else:
                     self._copy_mod(mod_name)
 
+    def _start_progress(self, stage: str) -> None:
+        """Compute how many bytes the default copy operations will need to copy and start tracking the progress."""
+        copied_mods_folder = join(self.get_server_instance_path(), self.S.copied_mod_folder_name)
+        total_bytes = 0
+        for mod in set(self.S.user_mods_list + self.S.server_mods_list):
+            if mod not in self.S.mods_to_be_copied:
+                continue
+            if self._get_mod_fix_dispatcher().get_hooks(mod, stage, "copy")[1] is not None:
+                # the default copy won't run for this mod
+                continue
+            if stage == "init" and isdir(join(copied_mods_folder, "@" + mod)):
+                # already there, it won't be copied again
+                continue
+            base_mod_folder = self._get_base_instance_copied_mod(mod)
+            source = base_mod_folder if base_mod_folder is not None else join(self.S.arma_folder, "!Workshop",
+                                                                              "@" + mod)
+            if isdir(source):
+                total_bytes += get_folder_size(source)
+        self.progress.total_bytes = total_bytes
+        self.progress.copied_bytes = 0
+        self.progress.start()
+
     def _add_warning(self, message: str) -> None:
         """Add a warning to the warnings list."""
         if message not in self.warnings:
@@ -159,10 +342,26 @@ class ServerInstance:
         """Helper used in bat compilation. Generate a copied mod paths."""
         return self.S.copied_mod_folder_name + "/@" + mod_name
 
+    def _get_workshop_index(self) -> WorkshopIndex:
+        """Return the !Workshop index, loading it if needed."""
+        if self.workshop_index is None:
+            self.workshop_index = WorkshopIndex(self.S.arma_folder)
+        return self.workshop_index
+
+    def _get_dependency_graph(self) -> ModDependencyGraph:
+        """Return the dependency graph of the selected mods, building it from the !Workshop index if needed."""
+        if self.dependency_graph is None:
+            mods = self.S.user_mods_list + self.S.server_mods_list
+            index = self._get_workshop_index()
+            self.dependency_graph = ModDependencyGraph(index.get_mods(mods), mods)
+            index.save()
+        return self.dependency_graph
+
     def _compose_relative_path_mods(self, mods_list: List[str]) -> str:
-        """Helper used in bat compilation. Generate a full mod paths list."""
+        """Helper used in bat compilation. Generate a full mod paths list, sorted so that every mod gets loaded after
+        the mods it depends on."""
         user_mods = ""
-        for mod in mods_list:
+        for mod in self._get_dependency_graph().order(mods_list):
             if mod in self.S.mods_to_be_copied:
                 path = self._compose_relative_path_copied_mods(mod)
             else:
@@ -170,38 +369,204 @@ class ServerInstance:
             user_mods += path + ";"
         return user_mods
 
-    def _compile_bat_file(self) -> None:
-        """Compile an instance specific bat file to run the server."""
-        # recover template file and prepare composed bat file path
-        if self.S.bat_settings.bat_template == "":
-            template_file_content = self._read_resource_file('templates/run_server_template.txt')
-        else:
-            with open(self.S.bat_settings.bat_template, "r") as template:
-                template_file_content = template.read()
-        compiled_bat_path = join(self.get_server_instance_path(), "run_server.bat")
-        # prepare settings
+    def _get_launch_settings(self, linux: bool = False) -> Dict:
+        """Return the settings shared by every way of launching the server: the bat and sh files and the command.
+
+        server_cpus becomes the list of CPUs the server gets pinned to and performance_flags the flags tuned on the
+        host (see _get_performance_flags); a server_max_mem of 'auto' gets computed from the host memory."""
         settings = self.S.bat_settings.copy()
         settings.user_mods = self._compose_relative_path_mods(self.S.user_mods_list)
         settings.server_mods = self._compose_relative_path_mods(self.S.server_mods_list)
         settings.server_drive = self.S.server_drive
         settings.server_root = self.get_server_instance_path()
         settings.instance_name = self.S.server_instance_name
+        settings.server_hugepages = self._is_true(settings.get("server_hugepages", ""))
+        if str(settings.server_max_mem).lower() == "auto":
+            settings.server_max_mem = str(self._get_host_profile().recommend_max_mem())
+        cpus, performance_flags = self._get_performance_flags(settings, linux)
+        settings.server_cpus = ",".join(str(x) for x in cpus)
+        settings.performance_flags = " ".join(performance_flags)
+        return settings
+
+    def _get_performance_flags(self, settings: Dict, linux: bool) -> Tuple[List[int], List[str]]:
+        """Return the CPUs the server gets pinned to and its performance flags.
+
+        With server_autotune, the flags (-cpuCount, -exThreads, -enableHT, -malloc, -loadMissionToMemory) come from the
+        host profile and, on a NUMA Linux host, a server with no server_cpus gets pinned to a single node. Otherwise
+        only the Linux launch gets -cpuCount and -exThreads, tuned on its cores. A flag already in server_flags always
+        wins over the computed one."""
+        cpus = parse_cpu_list(settings.server_cpus)
+        if self._is_true(settings.get("server_autotune", "")):
+            profile = self._get_host_profile()
+            if linux and len(cpus) == 0:
+                cpus = profile.pick_numa_node(self.S.server_instance_name) or []
+            wanted = profile.recommend(cpus, windows_malloc="" if linux else self._get_windows_malloc())
+        elif linux:
+            cpu_count = get_cpu_count(cpus)
+            wanted = {"cpuCount": str(cpu_count), "exThreads": str(get_ex_threads(cpu_count))}
+        else:
+            wanted = {}
+        if linux and settings.server_hugepages:
+            wanted["hugepages"] = ""
+        if len(wanted) == 0:
+            return cpus, []
+        overridden = {x.strip("\"'").split("=")[0].lower() for x in self._split_flags(settings.server_flags)}
+        return cpus, ["-{}{}".format(name, "=" + value if value != "" else "") for name, value in wanted.items()
+                      if "-" + name.lower() not in overridden]
+
+    @staticmethod
+    def _split_flags(flags: str, posix: bool = False) -> List[str]:
+        """Split some flags like a command line, falling back to splitting them on whitespace if they are not a valid
+        one (like with a stray quote). Non posix splitting keeps backslashes and quotes untouched."""
+        try:
+            return shlex.split(flags, posix=posix)
+        except ValueError:
+            return flags.split()
+
+    def _get_host_profile(self) -> HostProfile:
+        """Return the host profile, detecting it if needed. The storage throughput is used only if autotune is on: it
+        gets measured once and kept in the instances root (see get_storage_throughput)."""
+        if self.host_profile is None:
+            autotune = self._is_true(self.S.bat_settings.get("server_autotune", ""))
+            self.host_profile = HostProfile.detect(self.S.server_instance_root if autotune else None)
+        return self.host_profile
+
+    def _get_windows_malloc(self) -> str:
+        """Return the name of the Arma 3 scalable allocator, if it's in the game Dll folder."""
+        malloc = "tbb4malloc_bi_x64"
+        return malloc if isfile(join(self.S.arma_folder, "Dll", malloc + ".dll")) else ""
+
+    @staticmethod
+    def _is_true(value) -> bool:
+        """Parse a boolean config entry."""
+        return str(value).lower() in ["true", "yes", "y", "1"]
+
+    def _get_bat_template_and_settings(self) -> Tuple[str, Dict]:
+        """Return the bat template content and the settings to compile it with."""
+        # recover template file
+        if self.S.bat_settings.bat_template == "":
+            template_file_content = self._read_resource_file('templates/run_server_template.txt')
+        else:
+            with open(self.S.bat_settings.bat_template, "r") as template:
+                template_file_content = template.read()
+        return template_file_content, self._get_launch_settings()
+
+    def _render_bat_file(self) -> str:
+        """Return the content the instance bat file should have."""
+        return render_template(*self._get_bat_template_and_settings())
+
+    def _compile_bat_file(self) -> None:
+        """Compile an instance specific bat file to run the server."""
+        template_file_content, settings = self._get_bat_template_and_settings()
+        compiled_bat_path = join(self.get_server_instance_path(), "run_server.bat")
         # compose and save the bat
         compile_from_template(template_file_content, compiled_bat_path, settings)
 
-    def _compile_config_file(self) -> None:
-        """Compile an instance specific cfg file that will be passed as -config flag to the server."""
-        # recover template file and prepare composed bat file path
+    def _get_sh_template_and_settings(self) -> Tuple[str, Dict]:
+        """Return the sh template content and the settings to compile it with: the Linux launch settings, with CPU
+        pinning and the hugepages switch."""
+        if self.S.bat_settings.get("sh_template", "") == "":
+            template_file_content = self._read_resource_file('templates/run_server_sh_template.txt')
+        else:
+            with open(self.S.bat_settings.sh_template, "r") as template:
+                template_file_content = template.read()
+        return template_file_content, self._get_launch_settings(linux=True)
+
+    def _render_sh_file(self) -> str:
+        """Return the content the instance sh file should have."""
+        return render_template(*self._get_sh_template_and_settings())
+
+    def _compile_sh_file(self) -> None:
+        """Compile an instance specific sh file to run the server with the Linux dedicated server."""
+        compiled_sh_path = join(self.get_server_instance_path(), "run_server.sh")
+        # unix line endings, whatever os is compiling it
+        with open(compiled_sh_path, "w+", newline="\n") as f:
+            f.write(self._render_sh_file())
+        chmod(compiled_sh_path, 0o755)
+
+    def get_server_command(self, executable: str = "arma3server_x64") -> List[str]:
+        """Return the Linux command line that starts the server, built from the same settings as the sh file."""
+        settings = self._get_launch_settings(linux=True)
+        return [join(settings.server_root, executable),
+                "-name={}".format(settings.instance_name),
+                "-port={}".format(settings.server_port),
+                "-config={}".format(settings.server_config_file_name),
+                "-cfg={}".format(settings.server_cfg_file_name),
+                "-maxMem={}".format(settings.server_max_mem),
+                *settings.performance_flags.split(),
+                *self._split_flags(settings.server_flags, posix=True),
+                "-mod={}".format(settings.user_mods),
+                "-servermod={}".format(settings.server_mods)]
+
+    def get_server_cpus(self) -> List[int]:
+        """Return the CPUs the Linux server gets pinned to, or an empty list."""
+        return parse_cpu_list(self._get_launch_settings(linux=True).server_cpus)
+
+    def _get_config_template_and_settings(self) -> Tuple[str, Dict]:
+        """Return the config template content and the settings to compile it with."""
+        # recover template file
         if self.S.config_settings.config_template == "":
             template_file_content = self._read_resource_file('templates/server_cfg_template.txt')
         else:
             with open(self.S.config_settings.config_template, "r") as template:
                 template_file_content = template.read()
-        compiled_config_path = join(self.get_server_instance_path(), self.S.bat_settings.server_config_file_name)
         # prepare settings
         settings = self.S.config_settings.to_dict()
-        # compose and save the bat
+        return template_file_content, settings
+
+    def _render_config_file(self) -> str:
+        """Return the content the instance cfg file should have."""
+        return render_template(*self._get_config_template_and_settings())
+
+    def _compile_config_file(self) -> None:
+        """Compile an instance specific cfg file that will be passed as -config flag to the server."""
+        template_file_content, settings = self._get_config_template_and_settings()
+        compiled_config_path = join(self.get_server_instance_path(), self.S.bat_settings.server_config_file_name)
+        # compose and save the config
         compile_from_template(template_file_content, compiled_config_path, settings)
+        if self._is_basic_cfg_generated():
+            self._compile_basic_cfg_file()
+        else:
+            self._link_basic_cfg_file()
+
+    def _is_basic_cfg_generated(self) -> bool:
+        """Check if the cfg file gets generated from a network profile, instead of being linked from the Arma folder."""
+        return self.S.bat_settings.get("network_profile", "") != ""
+
+    def _get_basic_cfg_template_and_settings(self) -> Tuple[str, Dict]:
+        """Return the basic cfg template content and the settings to compile it with."""
+        if self.S.bat_settings.get("cfg_template", "") == "":
+            template_file_content = self._read_resource_file('templates/basic_cfg_template.txt')
+        else:
+            with open(self.S.bat_settings.cfg_template, "r") as template:
+                template_file_content = template.read()
+        bat = self.S.bat_settings
+        settings = get_network_settings(bat.network_profile, bat.get("network_uplink", ""),
+                                        bat.get("network_players", ""))
+        settings["network_profile"] = bat.network_profile
+        return template_file_content, settings
+
+    def _render_basic_cfg_file(self) -> str:
+        """Return the content the instance basic cfg file should have."""
+        return render_template(*self._get_basic_cfg_template_and_settings())
+
+    def _compile_basic_cfg_file(self) -> None:
+        """Compile an instance specific cfg file with the network settings, that will be passed as -cfg flag to the
+        server. A cfg file linked from the Arma folder gets replaced, leaving the original one untouched."""
+        template_file_content, settings = self._get_basic_cfg_template_and_settings()
+        compiled_cfg_path = join(self.get_server_instance_path(), self.S.bat_settings.server_cfg_file_name)
+        if islink(compiled_cfg_path):
+            unlink(compiled_cfg_path)
+        compile_from_template(template_file_content, compiled_cfg_path, settings)
+
+    def _link_basic_cfg_file(self) -> None:
+        """Link the cfg file from the Arma folder, if it's not already there: the instance may have used a generated
+        one before its network profile was turned off."""
+        cfg_file_name = self.S.bat_settings.server_cfg_file_name
+        arma_cfg_path = join(self.S.arma_folder, cfg_file_name)
+        compiled_cfg_path = join(self.get_server_instance_path(), cfg_file_name)
+        if isfile(arma_cfg_path) and not isfile(compiled_cfg_path) and not islink(compiled_cfg_path):
+            symlink(arma_cfg_path, compiled_cfg_path)
 
     @staticmethod
     def _read_resource_file(file: str) -> str:
@@ -243,7 +608,7 @@ class ServerInstance:
 
     def _check_mods_folders(self) -> None:
         """Check that every specified mod is present in the main !Workshop dir."""
-        mods_folders_name = listdir(join(self.S.arma_folder, "!Workshop"))
+        mods_folders_name = set(listdir(join(self.S.arma_folder, "!Workshop")))
         mods = self.S.user_mods_list + self.S.server_mods_list + self.S.mods_to_be_copied
         for mod in mods:
             if "@" + mod not in mods_folders_name:
@@ -251,35 +616,123 @@ class ServerInstance:
 
     def _check_mods_duplicate(self) -> None:
         """Check for mods duplicates in the mods lists."""
-        mods = self.S.user_mods_list + self.S.server_mods_list
-        for mod in mods:
-            if mods.count(mod) > 1:
-                op = "copy" if mod in self.S.mods_to_be_copied else "link"
+        counter = Counter(self.S.user_mods_list + self.S.server_mods_list)
+        mods_to_be_copied = set(self.S.mods_to_be_copied)
+        for mod, count in counter.items():
+            if count > 1:
+                op = "copy" if mod in mods_to_be_copied else "link"
                 self._add_warning("Tried to {} the mod '{}' more than once! There's a duplicate "
                                   "somewhere!".format(op, mod))
 
+    def _check_mods_addons(self) -> None:
+        """Index (incrementally) the selected mods, then check their addons. The whole !Workshop gets indexed only if
+        they require addons that neither they nor the game provide, to trace them back to the mods providing them."""
+        index = self._get_workshop_index()
+        records = index.get_mods(list(dict.fromkeys(self.S.user_mods_list + self.S.server_mods_list)))
+        provided, required = set(), set()
+        for record in records.values():
+            provided.update(get_provided_addons(record))
+            required.update(get_required_addons(record))
+        if len(get_missing_addons({"required_addons": sorted(required)}, provided)) > 0:
+            records = index.get_all_mods()
+        index.save()
+        self._check_mods_dependencies(records)
+        self._check_mods_conflicts(records)
+
+    def _check_mods_dependencies(self, records: Dict[str, Dict]) -> None:
+        """Check that every addon required by the mods is provided by a mod in the mods lists. Missing addons can be
+        traced back to the mod providing them only if records holds every mod in the !Workshop."""
+        self.dependency_graph = ModDependencyGraph(records, self.S.user_mods_list + self.S.server_mods_list)
+        for mod, addon, provider in self.dependency_graph.missing:
+            self._add_warning("The mod '{}' requires the addon '{}' provided by the mod '{}', which is not in the mods "
+                              "lists!".format(mod, addon, provider))
+
+    def _check_mods_conflicts(self, records: Dict[str, Dict]) -> None:
+        """Check that no two mods in the mods lists ship the same pbo prefix, pbo file or addon, since one of them
+        would silently override the other."""
+        selected = dict.fromkeys(self.S.user_mods_list + self.S.server_mods_list)
+        for kind, name, mods in find_addon_conflicts({mod: records.get(mod, {}) for mod in selected}):
+            self._add_warning("The mods {} all provide the {} '{}': only one of them will be used!".format(
+                ", ".join("'{}'".format(mod) for mod in mods), kind, name))
+
+    def _check_mods_signatures(self) -> None:
+        """Check that every pbo of the mods whose keys get linked is signed by one of those keys, since clients
+        loading a pbo without a valid signature get kicked."""
+        verifier = SignaturesVerifier(self.S.arma_folder)
+        mods = list(filter(self._should_link_mod_key, self.S.user_mods_list))
+        for result in verifier.verify_mods(mods):
+            if len(result.bad_pbos) > 0:
+                self._add_warning("The mod '{}' has pbos not signed by any of its keys ({}): {}".format(
+                    result.mod_name, ", ".join(result.keys) if len(result.keys) > 0 else "no keys found",
+                    ", ".join(result.bad_pbos)))
+            if len(result.errors) > 0:
+                self._add_warning("The mod '{}' has unreadable keys or signatures: {}".format(
+                    result.mod_name, ", ".join(result.errors)))
+        verifier.save()
+
     def _check_mods(self) -> None:
         """Perform some test on the mods lists."""
         self._check_mods_folders()
         self._check_mods_duplicate()
+        self._check_mods_addons()
+        self._check_mods_signatures()
 
     def init(self) -> None:
-        """Create the new instance folder, filled with everything needed to start it."""
+        """Create the new instance folder, filled with everything needed to start it. Every completed phase is recorded
+        in a journal inside the instance folder: if a previous init was interrupted, this resumes it."""
         # check mods folder
         self._check_mods()
-        # create the folder
-        self._new_server_folder()
+        self._check_missions()
+        self.journal = InitJournal(self.get_server_instance_path())
+        if self.journal.exists():
+            # resume the interrupted init
+            self.journal.load()
+            self._clear_interrupted_mods()
+        else:
+            # create the folder
+            self._new_server_folder()
+            self.journal.start()
         # prepare all arma files and folder
-        self._prepare_server_core()
+        self._do_init_phase("core", self._prepare_server_core)
+        # link the needed missions
+        self._do_init_phase("missions", self._link_missions)
         # symlink or copy user and server mods
-        self._start_op_on_mods("init", self.S.user_mods_list)
-        self._start_op_on_mods("init", self.S.server_mods_list)
+        self._do_init_phase("mods", self._init_all_mods)
         # link keys
-        self._link_keys()
+        self._do_init_phase("keys", self._link_keys)
         # compile the bat
-        self._compile_bat_file()
+        self._do_init_phase("bat", self._compile_bat_file)
+        self._do_init_phase("sh", self._compile_sh_file)
         # compile the config file
-        self._compile_config_file()
+        self._do_init_phase("config", self._compile_config_file)
+        self.journal.complete()
+        self.journal = None
+
+    def _do_init_phase(self, phase: str, phase_function: Callable[[], None]) -> None:
+        """Execute an init phase, unless the journal says it's already done, and record it."""
+        if not self.journal.is_phase_done(phase):
+            phase_function()
+            self.journal.mark_phase_done(phase)
+
+    def _init_all_mods(self) -> None:
+        """Init both user and server mods."""
+        self._start_progress("init")
+        self._start_op_on_mods("init", self.S.user_mods_list)
+        self._start_op_on_mods("init", self.S.server_mods_list)
+        self.progress.finish()
+
+    def clone(self, base_instance_path: str) -> None:
+        """Create the new instance folder like init does, but use an already built instance as base: every copied mod
+        that's also in the base instance gets cloned from there (copy-on-write when the filesystem supports it) instead
+        of being copied again from the !Workshop folder. Everything else is created from this instance settings."""
+        base_instance_path = abspath(base_instance_path)
+        if not isdir(join(base_instance_path, self.S.copied_mod_folder_name)):
+            raise InvalidBaseInstance("Could not find a valid server instance in {}".format(base_instance_path))
+        self.base_instance_path = base_instance_path
+        try:
+            self.init()
+        finally:
+            self.base_instance_path = None
 
     def _clear_old_linked_mods(self) -> None:
         """Clear the linked mods folder."""
@@ -304,8 +757,10 @@ class ServerInstance:
         """Update both user and server mods and perform some cleanup tasks."""
         self._clear_old_linked_mods()
         self._clear_old_copied_mods()
+        self._start_progress("update")
         self._start_op_on_mods("update", self.S.user_mods_list)
         self._start_op_on_mods("update", self.S.server_mods_list)
+        self.progress.finish()
         self._symlink_warning_folder()
 
     def _clear_keys(self) -> None:
@@ -325,22 +780,30 @@ class ServerInstance:
         self._link_keys()
 
     def _clear_compiled_files(self) -> None:
-        """Delete all compiled files."""
-        for file in ["run_server.bat", self.S.bat_settings.server_config_file_name]:
-            remove(join(self.get_server_instance_path(), file))
+        """Delete all compiled files. The cfg file is a compiled one only if it's not a link to the Arma one, whatever
+        the current network profile."""
+        files = ["run_server.bat", "run_server.sh", self.S.bat_settings.server_config_file_name]
+        if not islink(join(self.get_server_instance_path(), self.S.bat_settings.server_cfg_file_name)):
+            files.append(self.S.bat_settings.server_cfg_file_name)
+        for file in files:
+            if isfile(join(self.get_server_instance_path(), file)):
+                remove(join(self.get_server_instance_path(), file))
 
     def _update_compiled_files(self) -> None:
         """Delete and regenerate all compiled files"""
         self._clear_compiled_files()
         self._compile_bat_file()
+        self._compile_sh_file()
         self._compile_config_file()
 
     def update(self) -> None:
         """Update an existing instance. This method assumes that the server instance is already there and functioning!
-        This will relink all linked mods and keys. It will REPLACE compiled files like run_server.bat and the server
-        config file with newly generated ones. By default this will also REPLACE all copied mod."""
+        This will relink all linked mods, missions and keys. It will REPLACE compiled files like run_server.bat and the
+        server config file with newly generated ones. By default this will also REPLACE all copied mod."""
         self._check_mods()
+        self._check_missions()
         self._update_all_mods()
+        self._link_missions()
         self._update_keys()
         self._update_compiled_files()
 
@@ -351,3 +814,7 @@ class DuplicateServerName(Exception):
 
 class ModNotFound(Exception):
     """"""
+
+
+class InvalidBaseInstance(Exception):
+    """"""
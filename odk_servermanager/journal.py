@@ -0,0 +1,87 @@
+import json
+from os import makedirs, remove, replace, listdir, rmdir
+from os.path import join, isfile, isdir
+from typing import Dict, List
+
+
+class InitJournal:
+    """Keep track of the progress of an instance init, so that an interrupted init can be resumed.
+
+    The journal lives in the __odksm__ folder inside the instance folder. It records every completed init phase and,
+    during the mods phase, which mods have been started and which have been completed: a mod started but not
+    completed was interrupted halfway through and must be redone. The journal is deleted when the init completes.
+    """
+
+    folder_name = "__odksm__"
+    file_name = "init_journal.json"
+
+    def __init__(self, instance_path: str):
+        self.folder = join(instance_path, self.folder_name)
+        self.file = join(self.folder, self.file_name)
+        self.data: Dict[str, List[str]] = self._empty_data()
+
+    def exists(self) -> bool:
+        """Return True if an unfinished init journal is present."""
+        return isfile(self.file)
+
+    def start(self) -> None:
+        """Start a new, empty journal."""
+        makedirs(self.folder, exist_ok=True)
+        self.data = self._empty_data()
+        self._save()
+
+    def load(self) -> None:
+        """Load the journal from disk."""
+        with open(self.file, "r") as f:
+            data = json.load(f)
+        self.data = self._empty_data()
+        self.data.update(data)
+
+    def is_phase_done(self, phase: str) -> bool:
+        """Return True if the given phase was already completed."""
+        return phase in self.data["phases"]
+
+    def mark_phase_done(self, phase: str) -> None:
+        """Record the given phase as completed."""
+        if phase not in self.data["phases"]:
+            self.data["phases"].append(phase)
+            self._save()
+
+    def is_mod_done(self, mod_name: str) -> bool:
+        """Return True if the given mod was already completed."""
+        return mod_name in self.data["mods_done"]
+
+    def mark_mod_started(self, mod_name: str) -> None:
+        """Record that the operation on the given mod is starting."""
+        if mod_name not in self.data["mods_started"]:
+            self.data["mods_started"].append(mod_name)
+            self._save()
+
+    def mark_mod_done(self, mod_name: str) -> None:
+        """Record that the operation on the given mod is completed."""
+        if mod_name not in self.data["mods_done"]:
+            self.data["mods_done"].append(mod_name)
+            self._save()
+
+    def get_interrupted_mods(self) -> List[str]:
+        """Return the mods that were started but never completed."""
+        return list(filter(lambda x: x not in self.data["mods_done"], self.data["mods_started"]))
+
+    def complete(self) -> None:
+        """The init is done: delete the journal, and its folder if nothing else is there."""
+        if isfile(self.file):
+            remove(self.file)
+        if isdir(self.folder) and len(listdir(self.folder)) == 0:
+            rmdir(self.folder)
+
+    def _save(self) -> None:
+        """Atomically write the journal to disk."""
+        tmp_file = self.file + ".tmp"
+        with open(tmp_file, "w+") as f:
+            json.dump(self.data, f)
+        replace(tmp_file, self.file)
+
+    @staticmethod
+    def _empty_data() -> Dict[str, List[str]]:
+        """Return the data of a brand new journal."""
+        return {"phases": [], "mods_started": [], "mods_done": []}
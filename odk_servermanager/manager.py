@@ -1,17 +1,26 @@
+import signal
 import sys
 import time
 import traceback
-from os import mkdir
-from os.path import join, abspath, isdir
-from typing import List, Union
+from functools import partial
+from os import mkdir, makedirs
+from os.path import join, abspath, isdir, dirname, basename
+from typing import Dict, List, Union
 
 import pkg_resources
 from bs4 import BeautifulSoup
 
+from odk_servermanager.bootstrap import BootstrapManifest, InvalidManifest
 from odk_servermanager.config_ini import ConfigIni
-from odk_servermanager.instance import ServerInstance, ModNotFound
+from odk_servermanager.health import InstanceHealthChecker
+from odk_servermanager.instance import ServerInstance, ModNotFound, InvalidBaseInstance
 from odk_servermanager.modfix import MisconfiguredModFix, NonExistingFixFile, ErrorInModFix
-from odk_servermanager.settings import ServerBatSettings, ServerConfigSettings, ServerInstanceSettings, ModFixSettings
+from odk_servermanager.planner import InstancesPlanner
+from odk_servermanager.progress import ConsoleProgressRenderer, JsonProgressWriter
+from odk_servermanager.scheduler import HookResources, ModOpScheduler
+from odk_servermanager.settings import ServerBatSettings, ServerConfigSettings, ServerInstanceSettings, ModFixSettings, \
+    validate_config_data
+from odk_servermanager.supervisor import ServerSupervisor
 from odk_servermanager.utils import compile_from_template, copy
 
 
@@ -21,24 +30,14 @@ class ServerManager:
     instance: ServerInstance
     config_file: str
 
-    def __init__(self, debug_logs_path: Union[str, None] = None):
+    def __init__(self, debug_logs_path: Union[str, None] = None, progress_json_path: Union[str, None] = None):
         self.debug_logs_path = debug_logs_path
+        self.progress_json_path = progress_json_path
 
     def bootstrap(self, default_config_file: str = None) -> None:
         """Interactive UI to start building a new server instance."""
         print("\n ======[ WELCOME TO ODKSM! ]======\n")
-        try:
-            # try and read the config
-            data = ConfigIni.read_file(default_config_file, bootstrap=True)
-            # check for needed fields
-            if data["bootstrap"].get("instances_root", "") == "":
-                raise ValueError("'instances_root' field can't be empty in the [bootstrap] section!")
-            if data["bootstrap"].get("odksm_folder_path", "") == "":
-                raise ValueError("'odksm_folder_path' field can't be empty in the [bootstrap] section!")
-        except Exception as err:
-            self._ui_abort("\n [ERR] Error while reading the default config file!\n\n {}\n\n "
-                           "Check the documentation in the wiki, in the bootstrap.ini example file, in the README.md or"
-                           " in the odksm_servermanager/settings.py.\n Bye!\n".format(err))
+        data = self._read_bootstrap_config(default_config_file)
         try:
             # Check the instances_root exists
             instances_root = data["bootstrap"]["instances_root"]
@@ -58,32 +57,8 @@ class ServerManager:
                 custom_config_template_needed_string = input(" ... will you need a custom CONFIG template? (y/n) ")
                 if custom_config_template_needed_string == "y":
                     custom_config_template_needed = True
-            # create the folder
-            instance_dir = join(instances_root, instance_name)
-            mkdir(instance_dir)
-            # copy templates if needed
-            if custom_bat_template_needed:
-                bat_template_file_name = "run_server_template.txt"
-                bat_template_file = join(instance_dir, bat_template_file_name)
-                template_file = self._get_resource_file("templates/{}".format(bat_template_file_name))
-                copy(template_file, bat_template_file)
-                data["bat"]["bat_template"] = abspath(bat_template_file)
-            if custom_config_template_needed:
-                config_template_file_name = "server_cfg_template.txt"
-                config_template_file = join(instance_dir, config_template_file_name)
-                template_file = self._get_resource_file("templates/{}".format(config_template_file_name))
-                copy(template_file, config_template_file)
-                data["config"]["config_template"] = abspath(config_template_file)
-            # prepare some fields for the config file
-            data["ODKSM"]["server_instance_name"] = instance_name
-            data["ODKSM"]["server_instance_root"] = abspath(instance_dir)
-            # generate the config.ini file
-            ConfigIni().create_file(join(instance_dir, "config.ini"), data)
-            # compile the ODKSM.bat file
-            bat_template = pkg_resources.resource_string("odk_servermanager",
-                                                         "templates/ODKSM_bat_template.txt").decode("UTF-8")
-            bat_file = join(instance_dir, "ODKSM.bat")
-            compile_from_template(bat_template, bat_file, {"odksm_folder_path": data["bootstrap"]["odksm_folder_path"]})
+            self._create_instance_folder(join(instances_root, instance_name), data, custom_bat_template_needed,
+                                         custom_config_template_needed, self._get_odksm_bat_template())
             print("\n Instance folder created!\n\n [WARNING] IMPORTANT! YOU ARE NOT DONE! You still need to edit the\n"
                   " config.ini file in the folder and to run the actual ODKSM.bat tool.\n Bye!\n")
         except Exception as err:
@@ -91,18 +66,133 @@ class ServerManager:
                            "Check the documentation in the wiki, in the bootstrap.ini example file, in the README.md or"
                            " in the odksm_servermanager/settings.py.\n Bye!\n".format(err))
 
+    def bulk_bootstrap(self, manifest_file: str, default_config_file: str = None, workers: int = 4) -> None:
+        """Non interactive version of bootstrap: create an instance folder, with its config.ini and ODKSM.bat files,
+        for every instance listed in a csv or json manifest file. Every instance is validated, ports included, before
+        any folder gets created."""
+        print("\n ======[ WELCOME TO ODKSM! ]======\n")
+        data = self._read_bootstrap_config(default_config_file)
+        try:
+            instances_root = data["bootstrap"]["instances_root"]
+            if not isdir(instances_root):
+                raise Exception("Could not find the instances_folder '{}'".format(instances_root))
+            manifest = BootstrapManifest.read_file(manifest_file)
+            errors = manifest.validate(instances_root, data, InstancesPlanner(instances_root).get_used_ports())
+            if len(errors) > 0:
+                raise InvalidManifest("\n ".join(errors))
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while reading the manifest file!\n\n {}\n Bye!\n".format(err))
+        try:
+            odksm_bat_template = self._get_odksm_bat_template()
+            jobs = []
+            for entry in manifest.entries:
+                instance_dir = join(instances_root, entry.name)
+                jobs.append((HookResources(writes=[instance_dir]),
+                             partial(self._create_instance_folder, instance_dir, entry.get_config_data(data),
+                                     entry.bat_template, entry.config_template, odksm_bat_template)))
+            ModOpScheduler(workers).run(jobs)
+            print(" Created {} instance folders in {}.\n\n [WARNING] IMPORTANT! YOU ARE NOT DONE! You still need to "
+                  "check their config.ini files\n and to run their ODKSM.bat tool.\n Bye!\n".format(
+                      len(jobs), instances_root))
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while bootstrapping the instances!\n\n {}\n Bye!\n".format(err))
+
+    def _read_bootstrap_config(self, default_config_file: str) -> Dict:
+        """Read the bootstrap default config file, checking its needed fields."""
+        try:
+            data = ConfigIni.read_file(default_config_file, bootstrap=True)
+            # check for needed fields
+            if data["bootstrap"].get("instances_root", "") == "":
+                raise ValueError("'instances_root' field can't be empty in the [bootstrap] section!")
+            if data["bootstrap"].get("odksm_folder_path", "") == "":
+                raise ValueError("'odksm_folder_path' field can't be empty in the [bootstrap] section!")
+            return data
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while reading the default config file!\n\n {}\n\n "
+                           "Check the documentation in the wiki, in the bootstrap.ini example file, in the README.md or"
+                           " in the odksm_servermanager/settings.py.\n Bye!\n".format(err))
+
+    @staticmethod
+    def _get_odksm_bat_template() -> str:
+        """Return the ODKSM.bat template."""
+        return pkg_resources.resource_string("odk_servermanager", "templates/ODKSM_bat_template.txt").decode("UTF-8")
+
+    def _create_instance_folder(self, instance_dir: str, data: Dict, custom_bat_template_needed: bool,
+                                custom_config_template_needed: bool, odksm_bat_template: str) -> None:
+        """Create a new instance folder with its config.ini and ODKSM.bat files and, if needed, its custom templates.
+        The data of the bootstrap config file gets updated with the instance ones."""
+        # create the folder
+        mkdir(instance_dir)
+        # copy templates if needed
+        if custom_bat_template_needed:
+            bat_template_file_name = "run_server_template.txt"
+            bat_template_file = join(instance_dir, bat_template_file_name)
+            template_file = self._get_resource_file("templates/{}".format(bat_template_file_name))
+            copy(template_file, bat_template_file)
+            data["bat"]["bat_template"] = abspath(bat_template_file)
+        if custom_config_template_needed:
+            config_template_file_name = "server_cfg_template.txt"
+            config_template_file = join(instance_dir, config_template_file_name)
+            template_file = self._get_resource_file("templates/{}".format(config_template_file_name))
+            copy(template_file, config_template_file)
+            data["config"]["config_template"] = abspath(config_template_file)
+        # prepare some fields for the config file
+        data["ODKSM"]["server_instance_name"] = basename(instance_dir)
+        data["ODKSM"]["server_instance_root"] = abspath(instance_dir)
+        # generate the config.ini file
+        ConfigIni().create_file(join(instance_dir, "config.ini"), data)
+        # compile the ODKSM.bat file
+        bat_file = join(instance_dir, "ODKSM.bat")
+        compile_from_template(odksm_bat_template, bat_file,
+                              {"odksm_folder_path": data["bootstrap"]["odksm_folder_path"]})
+
+    def bulk_create_configs(self, csv_file: str, output_folder: str, default_config_file: str = None) -> None:
+        """Create a config.ini file for every row of a csv file, each one in its own instance folder inside the output
+        folder. Values missing from a row are taken from the default config file, if given."""
+        print("\n ======[ WELCOME TO ODKSM! ]======\n")
+        try:
+            base_data = {}
+            if default_config_file is not None:
+                base_data = ConfigIni.read_file(default_config_file, bootstrap=True)
+                base_data.pop("bootstrap", None)
+            if not isdir(output_folder):
+                raise Exception("Could not find the output folder '{}'".format(output_folder))
+            rows = ConfigIni.read_csv(csv_file, base_data)
+            files_data = []
+            names = set()
+            for i, data in enumerate(rows):
+                name = data.get("ODKSM", {}).get("server_instance_name", "")
+                if name == "":
+                    raise ValueError("Missing 'server_instance_name' in the row {} of the csv file.".format(i + 1))
+                if name in names:
+                    raise ValueError("The server instance name '{}' is repeated in the csv file.".format(name))
+                names.add(name)
+                instance_dir = join(output_folder, name)
+                data["ODKSM"].setdefault("server_instance_root", abspath(instance_dir))
+                files_data.append((join(instance_dir, "config.ini"), data))
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while reading the csv file!\n\n {}\n Bye!\n".format(err))
+        try:
+            for config_file, _ in files_data:
+                makedirs(dirname(config_file), exist_ok=True)
+            count = ConfigIni().create_files(files_data)
+            print(" Created {} config.ini files in {}.\n Bye!\n".format(count, output_folder))
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while creating the config files!\n\n {}\n Bye!\n".format(err))
+
     @staticmethod
     def _get_resource_file(file: str) -> str:
         """Return the actual file path of a resource file."""
         return pkg_resources.resource_filename('odk_servermanager', file)
 
-    def manage_instance(self, config_file: str) -> None:
-        """Offer a basic ui so that the user can distinguish between instance's init and update."""
+    def manage_instance(self, config_file: str, base_instance: Union[str, None] = None) -> None:
+        """Offer a basic ui so that the user can distinguish between instance's init and update. If a base_instance
+        folder is provided, a new instance will be cloned from it instead of being built from scratch."""
         self.config_file = config_file
         print("\n ======[ WELCOME TO ODKSM! ]======\n")
         try:
             self._recover_settings()
-            self.instance = ServerInstance(self.settings)
+            self.instance = ServerInstance(self.settings, progress_listeners=self._get_progress_listeners())
         except (NonExistingFixFile, MisconfiguredModFix) as err:
             self._ui_abort("\n [ERR] Error while loading mod fix: {}\n Bye!\n".format(err.args[0]))
         except Exception as err:
@@ -114,12 +204,16 @@ class ServerManager:
             print("\n Loaded config file: {}\n Instance name: {}"
                   "\n Server title: {}\n".format(self.config_file, self.instance.S.server_instance_name,
                                                  self.instance.S.config_settings.hostname))
-            if not self.instance.is_folder_instance_already_there():
+            if base_instance is not None:
+                self._ui_clone(base_instance)
+            elif not self.instance.is_folder_instance_already_there() or self.instance.is_init_interrupted():
                 self._ui_init()
             else:
                 self._ui_update()
         except ModNotFound as err:
             self._ui_abort("\n [ERR] Error while loading mods: {}\n Bye!\n".format(err.args[0]))
+        except InvalidBaseInstance as err:
+            self._ui_abort("\n [ERR] Error while cloning the instance: {}\n Bye!\n".format(err.args[0]))
         except ErrorInModFix as err:
             self._ui_abort("\n [ERR] Error while executing mod fix: {}\nYOUR SERVER INSTANCE MAY BE CORRUPTED! You "
                            "should delete it and generate it again.\n Bye!\n".format(err.args[0]))
@@ -128,8 +222,115 @@ class ServerManager:
                            "odksm team on github!\nYOUR SERVER INSTANCE MAY BE CORRUPTED! You should delete it and "
                            "generate it again.\n Bye!\n".format(err))
 
+    def check_instance(self, config_file: str, repair: bool = False) -> None:
+        """Validate an existing instance folder against its config file, optionally repairing the problems found."""
+        self.config_file = config_file
+        print("\n ======[ WELCOME TO ODKSM! ]======\n")
+        try:
+            self._recover_settings()
+            self.instance = ServerInstance(self.settings, progress_listeners=self._get_progress_listeners())
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while loading the configuration file.\n\n {}\n Bye!\n".format(err))
+        name = self.instance.S.server_instance_name
+        if not self.instance.is_folder_instance_already_there():
+            self._ui_abort("\n [ERR] Could not find a server instance called {}.\n Bye!\n".format(name))
+        try:
+            checker = InstanceHealthChecker(self.instance)
+            issues = checker.check()
+            if len(issues) == 0:
+                print(" [OK] The server instance {} is healthy! Bye!\n".format(name))
+                return
+            print(" Found {} problems in the server instance {}:".format(len(issues), name))
+            for issue in issues:
+                print(" [{}] {}".format("FIXABLE" if issue.repair is not None else "ERR", issue.message))
+            if not repair:
+                print("\n Run again with --repair to fix them. Bye!\n")
+                exit(1)
+            print("\n > Repairing...")
+            not_repaired = checker.repair(issues)
+            remaining = checker.check()
+            if len(not_repaired) > 0 or len(remaining) > 0:
+                for issue in remaining:
+                    print(" [ERR] Still there: {}".format(issue.message))
+                self._ui_abort("\n [ERR] Could not repair everything.\n Bye!\n")
+            print("\n [OK] Repair done! Bye!\n")
+        except (ModNotFound, ErrorInModFix) as err:
+            self._ui_abort("\n [ERR] Error while repairing mods: {}\n Bye!\n".format(err.args[0]))
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while checking the instance.\n\n {}\n Bye!\n".format(err))
+
+    def supervise_instance(self, config_file: str, executable: str = "arma3server_x64",
+                           max_restarts: int = None) -> None:
+        """Launch the server of an existing instance and keep it running until ODKSM gets stopped (Linux dedicated
+        server only)."""
+        self.config_file = config_file
+        print("\n ======[ WELCOME TO ODKSM! ]======\n")
+        try:
+            self._recover_settings()
+            self.instance = ServerInstance(self.settings)
+            cpus = self.instance.get_server_cpus()
+            memory_limit = self.settings.bat_settings.server_memory_limit
+            memory_limit = int(memory_limit) if memory_limit != "" else None
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while loading the configuration file.\n\n {}\n Bye!\n".format(err))
+        name = self.instance.S.server_instance_name
+        if not self.instance.is_folder_instance_already_there():
+            self._ui_abort("\n [ERR] Could not find a server instance called {}.\n Bye!\n".format(name))
+        try:
+            instance_path = self.instance.get_server_instance_path()
+            makedirs(join(instance_path, "logs"), exist_ok=True)
+            supervisor = ServerSupervisor(self.instance.get_server_command(executable), instance_path,
+                                          join(instance_path, "logs", "server.log"), cpus=cpus,
+                                          memory_limit=memory_limit, max_restarts=max_restarts)
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while preparing the server launch.\n\n {}\n Bye!\n".format(err))
+        for signal_number in [signal.SIGINT, signal.SIGTERM]:
+            signal.signal(signal_number, lambda *_: supervisor.stop())
+        print(" Supervising the server instance {}. Stop it with CTRL+C.\n".format(name))
+        supervisor.run()
+        print("\n [OK] The server instance {} is down. Bye!\n".format(name))
+
+    def plan_instances(self, instances_root: str, memory_budget: int = None, apply: bool = False) -> None:
+        """Check the ports and the memory of every instance under the instances root, planning a new port for the
+        colliding ones and fitting their max memory in the budget. The plan is written back only if apply is True."""
+        print("\n ======[ WELCOME TO ODKSM! ]======\n")
+        try:
+            planner = InstancesPlanner(instances_root, memory_budget=memory_budget)
+            instances = planner.read_instances()
+            collisions = planner.find_collisions(instances)
+            plan = planner.plan()
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while planning the instances!\n\n {}\n Bye!\n".format(err))
+        for warn in planner.warnings:
+            print(" [WARN] {}".format(warn))
+        for a, b in collisions:
+            print(" [ERR] The ports of '{}' ({}) and '{}' ({}) collide.".format(a.name, a.port, b.name, b.port))
+        if len(plan) == 0:
+            print(" [OK] The {} instances in {} fit together! Bye!\n".format(len(instances), instances_root))
+            return
+        print(" Planned changes:")
+        for name, entries in plan.items():
+            print(" {}: {}".format(name, ", ".join("{} = {}".format(k, v) for k, v in entries.items())))
+        if not apply:
+            print("\n Run again with --apply to write them into the config files. Bye!\n")
+            return
+        try:
+            planner.apply(plan)
+        except Exception as err:
+            self._ui_abort("\n [ERR] Error while writing the config files!\n\n {}\n Bye!\n".format(err))
+        print("\n [OK] Config files updated! Bye!\n")
+
+    def _get_progress_listeners(self) -> List:
+        """Return the listeners that will report the mods copy progress."""
+        listeners = [ConsoleProgressRenderer()]
+        if self.progress_json_path is not None:
+            listeners.append(JsonProgressWriter(self.progress_json_path))
+        return listeners
+
     def _ui_init(self):
         """UI to init an instance."""
+        if self.instance.is_init_interrupted():
+            print(" [WARNING] A previous init of this server instance was interrupted: it will be resumed.\n")
         user_answer = input(" Do you want to continue? (y/n) ")
         if self._is_positive_answer(user_answer):
             print("\n > Starting server instance INIT for {}!".format(self.instance.S.server_instance_name))
@@ -139,6 +340,21 @@ class ServerManager:
         else:
             self._ui_abort()
 
+    def _ui_clone(self, base_instance: str):
+        """UI to clone an instance from an already existing one."""
+        if self.instance.is_folder_instance_already_there():
+            self._ui_abort("\n [ERR] A server instance called {} is already present, can't clone over it.\n"
+                           " Bye!\n".format(self.instance.S.server_instance_name))
+        user_answer = input(" The new instance will be cloned from {}.\n Do you want to continue? (y/n) ".format(
+            base_instance))
+        if self._is_positive_answer(user_answer):
+            print("\n > Starting server instance CLONE for {}!".format(self.instance.S.server_instance_name))
+            self.instance.clone(base_instance)
+            self._ui_print_warnings()
+            print("\n [OK] Clone done! Bye!\n")
+        else:
+            self._ui_abort()
+
     def _ui_update(self):
         """UI to update an instance."""
         name = self.instance.S.server_instance_name
@@ -177,38 +393,33 @@ class ServerManager:
         self._parse_config()
         if self.settings.user_mods_preset != "":
             mods = self._parse_mods_preset(self.settings.user_mods_preset)
-            # do not use shorthand += here: there's a bug in Box that will break things
-            self.settings.user_mods_list = self.settings.user_mods_list + mods
+            self.settings.user_mods_list += mods
 
     def _parse_config(self) -> None:
         """Parse the config file and create all settings container object."""
         # Recover data in the file
         data = ConfigIni.read_file(self.config_file)
+        # Check every required field at once, before building anything
+        validate_config_data(data)
         # Create settings containers
         config_settings = ServerConfigSettings(**data["config"])
         bat_settings = ServerBatSettings(**data["bat"])
         enabled_fixes = []
         if "enabled_fixes" in data["mod_fix_settings"]:
             enabled_fixes = data["mod_fix_settings"].pop("enabled_fixes")
+        plugins_folder = data["mod_fix_settings"].pop("plugins_folder", "")
         fix_settings = ModFixSettings(enabled_fixes=enabled_fixes,
-                                      mod_fix_settings=data["mod_fix_settings"])
+                                      mod_fix_settings=data["mod_fix_settings"], plugins_folder=plugins_folder)
         # create the global settings container
         self.settings = ServerInstanceSettings(**data["ODKSM"],
                                                bat_settings=bat_settings, config_settings=config_settings,
                                                fix_settings=fix_settings)
         # add missing mod_fix mods to mods_to_be_copied
         from odk_servermanager.modfix import register_fixes
-        mod_fixes = register_fixes(fix_settings.enabled_fixes)
+        mod_fixes = register_fixes(fix_settings.enabled_fixes, plugins_folder=fix_settings.plugins_folder)
         for fix in mod_fixes:
-            # Check that it's a required mod:
-            if fix.name in self.settings.user_mods_list + self.settings.server_mods_list:
-                copy_hooks = ["hook_init_copy_pre", "hook_init_copy_replace", "hook_init_copy_post",
-                              "hook_update_copy_pre", "hook_update_copy_replace", "hook_update_copy_post"]
-                for copy_hook in copy_hooks:
-                    # Check if there's a copy hook enabled...
-                    if getattr(fix, copy_hook) is not None and fix.name not in self.settings.mods_to_be_copied:
-                        # ... if so, add the mod to mods_to_be_copied
-                        self.settings.mods_to_be_copied.append(fix.name)
+            fix.update_mods_to_be_copied_list(self.settings.mods_to_be_copied, self.settings.user_mods_list,
+                                              self.settings.server_mods_list)
 
     def _parse_mods_preset(self, filename: str) -> List[str]:
         """Parse an Arma 3 preset and return the List of all selected mods names."""
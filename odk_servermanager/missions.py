@@ -0,0 +1,145 @@
+import json
+from os import makedirs, replace, scandir, stat
+from os.path import join, isdir, isfile, dirname
+from typing import Dict, List, Set, Union
+
+from odk_servermanager.arma_config import get_mission_addons, InvalidConfig
+from odk_servermanager.pbo import PboFile, InvalidPbo
+
+# the CfgPatches of the base game and of its DLCs, always loaded by the server
+VANILLA_ADDONS = {"core", "a3data", "3den"}
+VANILLA_ADDONS_PREFIXES = ("a3_", "curatoronly_")
+
+
+class MissionIndex:
+    """Persistent cache of information about the missions in the MPMissions folder, stored in the __odksm__ folder in
+    the Arma root.
+
+    Missions are either pbo files or unpacked mission folders. Every mission record holds its size and modification
+    time (of the mission.sqm, for a folder) and the addons it requires (from its mission.sqm): only the missions whose
+    size or modification time changed get parsed again.
+    """
+
+    folder_name = "__odksm__"
+    file_name = "missions_index.json"
+    missions_folder_name = "MPMissions"
+    version = 1
+
+    def __init__(self, arma_folder: str):
+        self.missions_folder = join(arma_folder, find_missions_folder_name(arma_folder))
+        self.file = join(arma_folder, self.folder_name, self.file_name)
+        self.missions: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+
+    def list_missions(self) -> List[str]:
+        """Return the name of every mission pbo or folder in the MPMissions folder."""
+        if not isdir(self.missions_folder):
+            return []
+        with scandir(self.missions_folder) as it:
+            return sorted(entry.name for entry in it
+                          if (entry.is_file() and entry.name.lower().endswith(".pbo")) or entry.is_dir())
+
+    def find_missions(self, names: List[str]) -> Dict[str, Union[str, None]]:
+        """Map every given mission (like a mission_template, with or without the .pbo) to its pbo or folder name in
+        the MPMissions folder, ignoring the case, or to None if it's not there."""
+        available = {name.lower(): name for name in self.list_missions()}
+        found = {}
+        for name in names:
+            lower_name = name.lower()
+            found[name] = available.get(lower_name) or available.get(lower_name + ".pbo")
+        return found
+
+    def get_mission(self, mission_name: str) -> Dict:
+        """Return the up to date record of the given mission pbo or folder, parsing it again only if it changed."""
+        mission = join(self.missions_folder, mission_name)
+        mission_file = join(mission, "mission.sqm") if isdir(mission) else mission
+        if not isfile(mission_file):
+            return {}
+        file_stat = stat(mission_file)
+        old_record = self.missions.get(mission_name, {})
+        if old_record.get("size") == file_stat.st_size and old_record.get("mtime") == file_stat.st_mtime_ns:
+            return old_record
+        record = self._index_mission(mission_file, file_stat.st_size, file_stat.st_mtime_ns)
+        self.missions[mission_name] = record
+        self._dirty = True
+        return record
+
+    def get_missions(self, missions: List[str]) -> Dict[str, Dict]:
+        """Return the up to date records of the given missions."""
+        return {mission: self.get_mission(mission) for mission in missions}
+
+    def get_all_missions(self) -> Dict[str, Dict]:
+        """Return the up to date records of every mission in the MPMissions folder, forgetting the removed ones."""
+        missions = self.list_missions()
+        for removed in set(self.missions) - set(missions):
+            del self.missions[removed]
+            self._dirty = True
+        return self.get_missions(missions)
+
+    def save(self) -> None:
+        """Persist the index, if anything changed. The index is only a cache, so failing to save it is not an error."""
+        if not self._dirty:
+            return
+        try:
+            makedirs(dirname(self.file), exist_ok=True)
+            tmp_file = self.file + ".tmp"
+            with open(tmp_file, "w+") as f:
+                json.dump({"version": self.version, "missions": self.missions}, f)
+            replace(tmp_file, self.file)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _load(self) -> None:
+        """Load the index from disk, discarding it if unreadable or outdated."""
+        if not isfile(self.file):
+            return
+        try:
+            with open(self.file, "r") as f:
+                data = json.load(f)
+            if data.get("version") == self.version:
+                self.missions = data["missions"]
+        except (OSError, ValueError, KeyError):
+            self.missions = {}
+
+    @staticmethod
+    def _index_mission(mission_file: str, size: int, mtime: int) -> Dict:
+        """Recover the addons required by a mission pbo or mission.sqm file. Only the pbo header and the mission.sqm
+        entry are actually read from disk."""
+        record = {"size": size, "mtime": mtime, "required_addons": []}
+        try:
+            if mission_file.lower().endswith(".pbo"):
+                with PboFile(mission_file) as pbo:
+                    entries = [x for x in pbo.header.find_entries("mission.sqm")
+                               if "\\" not in x.name.replace("/", "\\")]
+                    if len(entries) == 0:
+                        raise InvalidPbo("No mission.sqm in the pbo.")
+                    data = pbo.read_entry(entries[0])
+                    if data is None:
+                        raise InvalidPbo("The mission.sqm is compressed.")
+            else:
+                with open(mission_file, "rb") as f:
+                    data = f.read()
+            record["required_addons"] = get_mission_addons(data)
+        except (OSError, InvalidPbo, InvalidConfig) as err:
+            record["error"] = str(err)
+        return record
+
+
+def find_missions_folder_name(arma_folder: str) -> str:
+    """Return the name of the MPMissions folder in the Arma root, whatever its case."""
+    if isdir(arma_folder):
+        with scandir(arma_folder) as it:
+            for entry in it:
+                if entry.name.lower() == MissionIndex.missions_folder_name.lower() and entry.is_dir():
+                    return entry.name
+    return MissionIndex.missions_folder_name
+
+
+def get_missing_addons(record: Dict, provided_addons: Set[str]) -> List[str]:
+    """Return the addons required by a mission record that are neither in the base game nor in provided_addons,
+    ignoring the case."""
+    provided = {x.lower() for x in provided_addons} | VANILLA_ADDONS
+    return [addon for addon in record.get("required_addons", [])
+            if addon.lower() not in provided and not addon.lower().startswith(VANILLA_ADDONS_PREFIXES)]
@@ -1,3 +1,2 @@
-from odk_servermanager.modfix.modfix import ModFix, register_fixes, NonExistingFixFile, MisconfiguredModFix, ErrorInModFix
-
-
+from odk_servermanager.modfix.modfix import ModFix, ModFixDispatcher, ModFixRegistry, get_registry, register_fixes, \
+    NonExistingFixFile, MisconfiguredModFix, ErrorInModFix
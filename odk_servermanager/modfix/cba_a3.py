@@ -4,6 +4,7 @@ from typing import List
 
 from odk_servermanager.instance import ServerInstance
 from odk_servermanager.modfix import ModFix
+from odk_servermanager.scheduler import HookResources
 from odk_servermanager.utils import copy, symlink
 
 
@@ -21,6 +22,15 @@ class ModFixCBA(ModFix):
     """
 
     name: str = "CBA_A3"
+    thread_safe: bool = True
+
+    def get_hook_resources(self, hook_name: str, server_instance: ServerInstance,
+                           call_data: List[str]) -> HookResources:
+        """Hooks also read the custom cba_settings.sqf file and write the instance one."""
+        resources = super().get_hook_resources(hook_name, server_instance, call_data)
+        default_cba = server_instance.S.fix_settings.mod_fix_settings.get("cba_settings", "")
+        return resources.merge(HookResources(reads=[default_cba] if default_cba != "" else [],
+                                             writes=[self._get_cba_path(server_instance)]))
 
     def hook_init_link_post(self, server_instance: ServerInstance, call_data: List[str]) -> None:
         """Copy the cba_settings.sqf file in the right dir."""
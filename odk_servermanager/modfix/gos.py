@@ -1,10 +1,7 @@
-from os import mkdir
-from os.path import join, isdir
 from typing import List
 
 from odk_servermanager.instance import ServerInstance
 from odk_servermanager.modfix import ModFix
-from odk_servermanager.utils import symlink, symlink_everything_from_folder, rmtree
 
 
 class ModFixGOS(ModFix):
@@ -14,6 +11,7 @@ class ModFixGOS(ModFix):
     mods: List[str] = ["G.O.S Al Rayak", "G.O.S Dariyah", "G.O.S Gunkizli", "G.O.S Kalu Khan", "G.O.S Leskovets",
                        "G.O.S N'ziwasogo", "G.O.S Song Bin Tahn", "G.O.S Song Bin Tanh 2.0 (APEX)"]
     keys_folder_name: str = "PublicKey_GOS_Makhno"
+    thread_safe: bool = True
 
     def does_apply_to_mod(self, mod_name: str) -> bool:
         """Check that the mod is in the supported mods list."""
@@ -28,31 +26,12 @@ class ModFixGOS(ModFix):
                 mods_to_be_copied_list.append(requested_mod)
 
     def hook_init_copy_replace(self, server_instance: ServerInstance, call_data: List[str]) -> None:
-        """Put the mod in copied_mods folder and symlink everything from the original mod, then simulate a regular
-        folder structure."""
-        mod_name = call_data[2]
-        target_mod_folder = join(server_instance.get_server_instance_path(), server_instance.S.copied_mod_folder_name,
-                                 "@{}".format(mod_name))
-        self._do_op(mod_name, server_instance.S.arma_folder, target_mod_folder)
+        """Overlay the mod in the copied_mods folder, adding a regular Keys folder alias."""
+        self.sync_mod_overlay(server_instance, call_data[2], {"Keys": self.keys_folder_name})
 
     def hook_update_copy_replace(self, server_instance: ServerInstance, call_data: List[str]) -> None:
-        """Exactly the same as the init_copy, but ensure the folder is deleted first, to start anew."""
-        mod_name = call_data[2]
-        target_mod_folder = join(server_instance.get_server_instance_path(), server_instance.S.copied_mod_folder_name,
-                                 "@{}".format(mod_name))
-        if isdir(target_mod_folder):
-            # Delete the old folder, it's better to start anew
-            rmtree(target_mod_folder)
-        self._do_op(mod_name, server_instance.S.arma_folder, target_mod_folder)
-
-    def _do_op(self, mod_name, arma_folder, target_mod_folder) -> None:
-        """Actually create the folder, symlink everything and symlink the keys folder."""
-        mod_folder = join(arma_folder, "!Workshop", "@{}".format(mod_name))
-        mkdir(target_mod_folder)
-        symlink_everything_from_folder(mod_folder, target_mod_folder)
-        unusual_keys_folder = join(target_mod_folder, self.keys_folder_name)
-        correct_keys_folder = join(target_mod_folder, "Keys")
-        symlink(unusual_keys_folder, correct_keys_folder)
+        """Bring the overlay up to date, touching only the entries of the mod that changed."""
+        self.sync_mod_overlay(server_instance, call_data[2], {"Keys": self.keys_folder_name})
 
 
 to_be_registered = ModFixGOS()
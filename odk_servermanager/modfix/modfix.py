@@ -1,10 +1,22 @@
 import os
+from functools import lru_cache, partial
 from importlib import import_module
-from os.path import isfile, join
-from typing import Callable, Union, List
+from importlib.util import module_from_spec, spec_from_file_location
+from inspect import ismodule
+from os.path import isdir, join, splitext
+from types import ModuleType
+from typing import Callable, Dict, Union, List, Tuple
+
+import pkg_resources
+
 from odk_servermanager.instance import ServerInstance
+from odk_servermanager.scheduler import HookResources
+from odk_servermanager.utils import sync_overlay
 
 HOOK_TYPE = Union[Callable[[ServerInstance, List[str]], None], None]
+ENTRY_POINT_GROUP = "odk_servermanager.modfix"
+STAGES = ["init", "update"]
+OPERATIONS = ["copy", "link"]
 
 
 class ModFix:
@@ -26,9 +38,13 @@ class ModFix:
     :hook_update_link_replace: This hook gets called instead of the usual mod update link.
     :hook_update_link_post: This hook gets called after the mod update link ends.
 
+    :thread_safe: Set it to True only if every hook touches nothing but the paths declared by get_hook_resources: the
+    hooks can then run alongside the operations on other mods. Default False: hooks run alone.
+
     TAKE NOTICE: DO NOT OVERRIDE hook_caller. It's the wrapper used to to call hooks and manage errors.
     """
     name: str = ""
+    thread_safe: bool = False
     hook_init_copy_pre: HOOK_TYPE = None
     hook_init_copy_replace: HOOK_TYPE = None
     hook_init_copy_post: HOOK_TYPE = None
@@ -50,6 +66,31 @@ class ModFix:
             # This is intentionally broad to defend against all kind of errors inside user mod fix
             raise ErrorInModFix("Error when executing the '{}' mod fix.".format(self.name))
 
+    def get_hook_resources(self, hook_name: str, server_instance: ServerInstance,
+                           call_data: List[str]) -> HookResources:
+        """Return the paths the given hook reads and writes.
+
+        By default a hook reads the mod in the !Workshop folder and writes the mod in the server instance.
+        Modfixes touching anything else should overwrite this, before declaring themselves thread safe."""
+        stage, operation, mod_name = call_data
+        mods_folder = server_instance.S.copied_mod_folder_name if operation == "copy" else \
+            server_instance.S.linked_mod_folder_name
+        return HookResources(reads=[join(server_instance.S.arma_folder, "!Workshop", "@" + mod_name)],
+                             writes=[join(server_instance.get_server_instance_path(), mods_folder, "@" + mod_name)],
+                             thread_safe=self.thread_safe)
+
+    @staticmethod
+    def sync_mod_overlay(server_instance: ServerInstance, mod_name: str,
+                         aliases: Dict[str, str] = None) -> List[str]:
+        """Make the copied mod folder a lightweight overlay of the !Workshop mod: a real folder with a symlink to every
+        entry of the mod, plus the given aliases (alias name -> mod entry name), e.g. to expose an oddly named keys
+        folder as 'Keys' without copying anything. Only the entries that changed are touched, so it's cheap to call it
+        again on every update. Return the names of the changed entries."""
+        mod_folder = join(server_instance.S.arma_folder, "!Workshop", "@{}".format(mod_name))
+        target_mod_folder = join(server_instance.get_server_instance_path(), server_instance.S.copied_mod_folder_name,
+                                 "@{}".format(mod_name))
+        return sync_overlay(mod_folder, target_mod_folder, aliases)
+
     def does_apply_to_mod(self, mod_name: str) -> bool:
         """Return True if this modfix apply to the given mod name.
 
@@ -73,24 +114,134 @@ class ModFix:
         return False
 
 
-def register_fixes(enabled_fixes: List[str]) -> List[ModFix]:
-    """Return a list of ModFix objects dynamically recovered from the list passed as argument."""
-    registered_fix = []
+class ModFixDispatcher:
+    """Dispatch table between the registered mod fixes and the mods they apply to.
+
+    The hooks of a mod are resolved only once, the first time the mod is looked up, into a (pre, replace, post) tuple
+    for every stage and operation. When more than one fix applies to the same mod, they are chained in registration
+    order: every pre hook gets called, then the first replace hook found, then every post hook.
+
+    :registered_fix: the list of ModFix objects this table was built from
+    """
+
+    def __init__(self, registered_fix: List["ModFix"]):
+        self.registered_fix = registered_fix
+        self._fixes: Dict[str, List[ModFix]] = {}
+        self._table: Dict[Tuple[str, str, str], Tuple[List[Callable], Union[Callable, None], List[Callable]]] = {}
+        self._hooks: Dict[Tuple[str, str, str], List[Tuple[ModFix, str]]] = {}
+
+    def get_fixes(self, mod_name: str) -> List["ModFix"]:
+        """Return all registered mod fixes that apply to the given mod, in registration order."""
+        if mod_name not in self._fixes:
+            self._fixes[mod_name] = list(filter(lambda x: x.does_apply_to_mod(mod_name), self.registered_fix))
+            self._resolve(mod_name)
+        return self._fixes[mod_name]
+
+    def get_hooks(self, mod_name: str, stage: str,
+                  operation: str) -> Tuple[List[Callable], Union[Callable, None], List[Callable]]:
+        """Return the (pre hooks, replace hook, post hooks) tuple for the given mod, stage and operation. Every hook
+        is already wrapped by its fix hook_caller and takes the server instance and the call data."""
+        self.get_fixes(mod_name)
+        return self._table[(mod_name, stage, operation)]
+
+    def get_resources(self, mod_name: str, stage: str, operation: str,
+                      server_instance: ServerInstance) -> Union[HookResources, None]:
+        """Return the resources declared by all the hooks for the given mod, stage and operation, merged together, or
+        None if there's no hook."""
+        self.get_fixes(mod_name)
+        resources = None
+        call_data = [stage, operation, mod_name]
+        for fix, hook_name in self._hooks[(mod_name, stage, operation)]:
+            hook_resources = fix.get_hook_resources(hook_name, server_instance, call_data)
+            resources = hook_resources if resources is None else resources.merge(hook_resources)
+        return resources
+
+    def _resolve(self, mod_name: str) -> None:
+        """Fill the table entries of the given mod."""
+        for stage in STAGES:
+            for operation in OPERATIONS:
+                hooks = {}
+                self._hooks[(mod_name, stage, operation)] = []
+                for time in ["pre", "replace", "post"]:
+                    hook_name = "{}_{}_{}".format(stage, operation, time)
+                    fixes = [fix for fix in self._fixes[mod_name]
+                             if getattr(fix, "hook_{}".format(hook_name)) is not None]
+                    hooks[time] = [partial(fix.hook_caller, hook_name) for fix in fixes]
+                    self._hooks[(mod_name, stage, operation)] += [(fix, hook_name) for fix in fixes]
+                replace = hooks["replace"][0] if len(hooks["replace"]) > 0 else None
+                self._table[(mod_name, stage, operation)] = (hooks["pre"], replace, hooks["post"])
+
+
+class ModFixRegistry:
+    """Index of every available mod fix, by name.
+
+    Fixes are found, in order of precedence, in the plugins folder (one .py file per fix), among the installed packages
+    entry points in the 'odk_servermanager.modfix' group and in the modfix package folder. Building the registry only
+    records where every fix lives: a fix gets imported when it's actually enabled.
+
+    :plugins_folder: an optional folder with additional mod fix files
+    :sources: maps every fix name to a (kind, source) tuple, kind being 'module', 'entry_point' or 'file'
+    """
+
     to_skip = ["__init__", "modfix"]
-    for fix_name in enabled_fixes:
+
+    def __init__(self, plugins_folder: str = ""):
+        self.plugins_folder = plugins_folder
+        self.sources: Dict[str, Tuple[str, object]] = {}
+        self._plugin_modules: Dict[str, ModuleType] = {}
+        for fix_name in self._scan_folder(os.path.dirname(__file__)):
+            self.sources[fix_name] = ("module", "odk_servermanager.modfix.{}".format(fix_name))
+        for entry_point in pkg_resources.iter_entry_points(ENTRY_POINT_GROUP):
+            self.sources[entry_point.name] = ("entry_point", entry_point)
+        if plugins_folder != "":
+            for fix_name in self._scan_folder(plugins_folder):
+                self.sources[fix_name] = ("file", join(plugins_folder, "{}.py".format(fix_name)))
+
+    def load(self, fix_name: str) -> "ModFix":
+        """Import the given fix, if needed, and return its ModFix object."""
+        if fix_name not in self.sources:
+            raise NonExistingFixFile("Could not find the {} mod fix in the modfix folder, in the plugins folder or "
+                                     "among the installed plugins.".format(fix_name))
+        kind, source = self.sources[fix_name]
         try:
-            if not isfile(join(os.path.dirname(__file__), "{}.py".format(fix_name))):
-                raise NonExistingFixFile("Could not find the file {}.py in the modfix folder.".format(fix_name))
-            if fix_name not in to_skip:
-                module = import_module("odk_servermanager.modfix.{}".format(fix_name))
-                mod_fix = module.to_be_registered
-                registered_fix.append(mod_fix)
-        except NonExistingFixFile:
-            raise
+            if kind == "module":
+                return import_module(source).to_be_registered
+            if kind == "file":
+                return self._load_plugin_module(fix_name, source).to_be_registered
+            mod_fix = source.load()
+            return mod_fix.to_be_registered if ismodule(mod_fix) else mod_fix
         except Exception:
             # This is intentionally broad to defend against all kind of errors inside user mod fix
             raise MisconfiguredModFix("General error when importing {} mod fix.".format(fix_name))
-    return registered_fix
+
+    def _load_plugin_module(self, fix_name: str, file: str) -> ModuleType:
+        """Import a mod fix file from the plugins folder, only once."""
+        if fix_name not in self._plugin_modules:
+            spec = spec_from_file_location("odk_servermanager_plugins.{}".format(fix_name), file)
+            module = module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self._plugin_modules[fix_name] = module
+        return self._plugin_modules[fix_name]
+
+    def _scan_folder(self, folder: str) -> List[str]:
+        """Return the name of every mod fix file in the given folder."""
+        if not isdir(folder):
+            return []
+        with os.scandir(folder) as it:
+            names = [splitext(entry.name)[0] for entry in it if entry.name.endswith(".py") and entry.is_file()]
+        return sorted(filter(lambda x: x not in self.to_skip, names))
+
+
+@lru_cache(maxsize=None)
+def get_registry(plugins_folder: str = "") -> ModFixRegistry:
+    """Return the mod fix registry for the given plugins folder. It's built only once per process."""
+    return ModFixRegistry(plugins_folder)
+
+
+def register_fixes(enabled_fixes: List[str], plugins_folder: str = "") -> List[ModFix]:
+    """Return a list of ModFix objects dynamically recovered from the list passed as argument."""
+    registry = get_registry(plugins_folder)
+    return [registry.load(fix_name) for fix_name in enabled_fixes if fix_name not in ModFixRegistry.to_skip]
 
 
 class NonExistingFixFile(Exception):
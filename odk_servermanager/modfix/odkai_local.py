@@ -4,6 +4,7 @@ from typing import List
 
 from odk_servermanager.instance import ServerInstance
 from odk_servermanager.modfix import ModFix
+from odk_servermanager.scheduler import HookResources
 from odk_servermanager.utils import symlink
 
 
@@ -16,6 +17,15 @@ class ModFixODKAILocal(ModFix):
     """
 
     name: str = "ODKAI"
+    thread_safe: bool = True
+
+    def get_hook_resources(self, hook_name: str, server_instance: ServerInstance,
+                           call_data: List[str]) -> HookResources:
+        """Hooks read the local copy instead of the !Workshop one."""
+        resources = super().get_hook_resources(hook_name, server_instance, call_data)
+        local_folder = server_instance.S.fix_settings.mod_fix_settings.get("odkai_local_path", "")
+        return HookResources(reads=[abspath(local_folder)] if local_folder != "" else [], writes=resources.writes,
+                             thread_safe=self.thread_safe)
 
     def hook_init_link_replace(self, server_instance: ServerInstance, call_data: List[str]) -> None:
         """Used to symlink a local version of ODKAI in the instance."""
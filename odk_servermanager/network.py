@@ -0,0 +1,61 @@
+from typing import Dict, Union
+
+# the presets of the basic.cfg network settings: the uplink in Mbit/s, the max size in bytes of guaranteed and non
+# guaranteed messages and the min error a unit update needs to be sent
+NETWORK_PROFILES = {
+    "lan": {"uplink": 1000, "max_size_guaranteed": 1024, "max_size_nonguaranteed": 512, "min_error_to_send": 0.001},
+    "1gbit": {"uplink": 1000, "max_size_guaranteed": 512, "max_size_nonguaranteed": 256, "min_error_to_send": 0.001},
+    "100mbit": {"uplink": 100, "max_size_guaranteed": 512, "max_size_nonguaranteed": 256, "min_error_to_send": 0.003},
+}
+# the maxPlayers of the default server config template
+DEFAULT_PLAYERS = 65
+# the bandwidth, in bit/s, every player should be guaranteed
+PLAYER_BANDWIDTH = 512 * 1000
+# the simulation cycles a server runs every second, more or less its fps cap
+SIMULATION_CYCLES = 50
+MIN_MSG_SEND = 128
+MAX_MSG_SEND = 2048
+ARMA_MIN_BANDWIDTH = 131072
+
+
+def get_network_settings(profile: str, uplink: str = "", players: str = "") -> Dict[str, str]:
+    """Return the basic.cfg network settings for the given profile, tuned on the declared uplink (in Mbit/s, by default
+    the profile one) and on the expected players.
+
+    MaxBandwidth is the whole uplink, while MinBandwidth guarantees PLAYER_BANDWIDTH to every player, within 80% of the
+    uplink. MaxMsgSend is how many guaranteed messages fill the uplink in a simulation cycle."""
+    if profile.lower() not in NETWORK_PROFILES:
+        raise InvalidNetworkSettings("Unknown network profile '{}': use one of {}."
+                                     .format(profile, ", ".join(NETWORK_PROFILES)))
+    preset = NETWORK_PROFILES[profile.lower()]
+    uplink_mbit = _parse_positive(uplink, "network_uplink") or preset["uplink"]
+    players_count = _parse_positive(players, "network_players") or DEFAULT_PLAYERS
+    max_bandwidth = int(uplink_mbit * 1000 ** 2)
+    min_bandwidth = max(ARMA_MIN_BANDWIDTH, min(max_bandwidth * 8 // 10, int(players_count * PLAYER_BANDWIDTH)))
+    max_msg_send = max_bandwidth // 8 // SIMULATION_CYCLES // preset["max_size_guaranteed"]
+    return {
+        "max_msg_send": str(min(MAX_MSG_SEND, max(MIN_MSG_SEND, max_msg_send))),
+        "max_size_guaranteed": str(preset["max_size_guaranteed"]),
+        "max_size_nonguaranteed": str(preset["max_size_nonguaranteed"]),
+        "min_bandwidth": str(min_bandwidth),
+        "max_bandwidth": str(max_bandwidth),
+        "min_error_to_send": "{:g}".format(preset["min_error_to_send"]),
+        "min_error_to_send_near": "{:g}".format(preset["min_error_to_send"] * 10),
+    }
+
+
+def _parse_positive(value: str, name: str) -> Union[float, None]:
+    """Return the given positive number, None if empty, or raise an error if it's not valid."""
+    if str(value).strip() == "":
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise InvalidNetworkSettings("'{}' must be a positive number, not '{}'.".format(name, value))
+    return number
+
+
+class InvalidNetworkSettings(Exception):
+    """"""
@@ -0,0 +1,143 @@
+import mmap
+import struct
+from typing import Dict, List, Tuple, Union
+
+PBO_VERSION_MAGIC = 0x56657273  # "Vers"
+PBO_COMPRESSED_MAGIC = 0x43707273  # "Cprs"
+_ENTRY_FIELDS = struct.Struct("<5I")
+
+
+class PboEntry:
+    """A single file entry in a PBO header table.
+
+    :name: the entry file name, relative to the pbo prefix, with backslash separators
+    :packing_method: 0 if stored, PBO_COMPRESSED_MAGIC if compressed
+    :original_size: the uncompressed size
+    :timestamp: the entry timestamp
+    :data_size: the size of the data stored in the pbo
+    :offset: the absolute offset of the entry data in the pbo file
+    """
+
+    __slots__ = ("name", "packing_method", "original_size", "timestamp", "data_size", "offset")
+
+    def __init__(self, name: str, packing_method: int, original_size: int, timestamp: int, data_size: int,
+                 offset: int = 0):
+        self.name = name
+        self.packing_method = packing_method
+        self.original_size = original_size
+        self.timestamp = timestamp
+        self.data_size = data_size
+        self.offset = offset
+
+    def is_compressed(self) -> bool:
+        """Return True if the entry data is compressed."""
+        return self.packing_method == PBO_COMPRESSED_MAGIC
+
+
+class PboHeader:
+    """The header of a PBO file: its properties (like the prefix) and its entries table."""
+
+    def __init__(self, properties: Dict[str, str], entries: List[PboEntry]):
+        self.properties = properties
+        self.entries = entries
+
+    @property
+    def prefix(self) -> str:
+        """Return the pbo prefix property, or an empty string."""
+        return self.properties.get("prefix", "")
+
+    def find_entries(self, file_name: str) -> List[PboEntry]:
+        """Return all entries whose base name matches the given one, ignoring the case."""
+        file_name = file_name.lower()
+        return list(filter(lambda x: x.name.replace("/", "\\").split("\\")[-1].lower() == file_name, self.entries))
+
+
+class PboFile:
+    """A memory mapped pbo file, to be used as a context manager.
+
+    Only the header table gets parsed when the file is opened: the pages holding the payload are never touched
+    unless an entry data is explicitly read.
+    """
+
+    def __init__(self, pbo_file: str):
+        self.pbo_file = pbo_file
+        self.header: Union[PboHeader, None] = None
+        self._file = None
+        self._map: Union[mmap.mmap, None] = None
+
+    def __enter__(self) -> "PboFile":
+        self._file = open(self.pbo_file, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            self._file.close()
+            raise InvalidPbo("Empty pbo file.")
+        try:
+            self.header = read_pbo_header(self._map)
+        except InvalidPbo:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read_entry(self, entry: PboEntry) -> Union[bytes, None]:
+        """Return the data of an uncompressed entry, or None if the entry is compressed."""
+        if entry.is_compressed():
+            return None
+        if entry.offset + entry.data_size > len(self._map):
+            raise InvalidPbo("Entry '{}' goes past the end of the file.".format(entry.name))
+        return self._map[entry.offset:entry.offset + entry.data_size]
+
+
+def read_pbo_header(data: Union[bytes, mmap.mmap]) -> PboHeader:
+    """Parse the header table of a pbo, given its content as a buffer, without looking at its payload."""
+    properties = {}
+    entries = []
+    offset = 0
+    first = True
+    while True:
+        name, offset = _read_asciiz(data, offset)
+        if offset + _ENTRY_FIELDS.size > len(data):
+            raise InvalidPbo("Unexpected end of the header table.")
+        packing_method, original_size, _, timestamp, data_size = _ENTRY_FIELDS.unpack_from(data, offset)
+        offset += _ENTRY_FIELDS.size
+        if name == "":
+            if first and packing_method == PBO_VERSION_MAGIC:
+                # the properties entry: a list of key, value strings ending with an empty one
+                while True:
+                    key, offset = _read_asciiz(data, offset)
+                    if key == "":
+                        break
+                    value, offset = _read_asciiz(data, offset)
+                    properties[key.lower()] = value
+                first = False
+                continue
+            # an empty entry terminates the table
+            break
+        first = False
+        entries.append(PboEntry(name, packing_method, original_size, timestamp, data_size))
+    # data blocks follow the header table, in the same order
+    for entry in entries:
+        entry.offset = offset
+        offset += entry.data_size
+    return PboHeader(properties, entries)
+
+
+def _read_asciiz(data: Union[bytes, mmap.mmap], offset: int) -> Tuple[str, int]:
+    """Read a null terminated string, returning it along with the offset right after it."""
+    end = data.find(b"\0", offset)
+    if end == -1:
+        raise InvalidPbo("Unexpected end of the file while reading a string.")
+    return data[offset:end].decode("utf-8", errors="replace"), end + 1
+
+
+class InvalidPbo(Exception):
+    """"""
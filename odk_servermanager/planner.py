@@ -0,0 +1,195 @@
+from os import scandir
+from os.path import isfile, join
+from typing import Dict, List, Tuple, Union
+
+from odk_servermanager.config_ini import ConfigIni
+from odk_servermanager.utils import get_host_memory
+
+# an Arma 3 server listens on its game port and on the following ones (Steam query, Steam, VON and BattlEye)
+ARMA_PORTS_SPAN = 5
+# memory, in MB, left to the OS and to everything else running on the host
+RESERVED_MEMORY = 2048
+MIN_MAX_MEM = 1024
+MAX_MEM_STEP = 256
+
+
+class PlannedInstance:
+    """A server instance found under the instances root.
+
+    :name: the instance folder name
+    :config_file: its config.ini file
+    :port: its game port, or None if missing or invalid
+    :max_mem: its server_max_mem in MB, or None if missing, invalid or auto
+    :auto_mem: True if its server_max_mem is auto, so that it's derived from the host when the server starts
+    """
+
+    def __init__(self, name: str, config_file: str, port: Union[int, None], max_mem: Union[int, None],
+                 auto_mem: bool = False):
+        self.name = name
+        self.config_file = config_file
+        self.port = port
+        self.max_mem = max_mem
+        self.auto_mem = auto_mem
+
+    def __repr__(self) -> str:
+        return "PlannedInstance({}, {}, {})".format(self.name, self.port, self.max_mem)
+
+
+class InstancesPlanner:
+    """Plan the ports and the memory of every server instance under an instances root, so that they can all run on
+    the same host.
+
+    Instances keep their port ranges unless they collide with the range of an instance that comes before them (by
+    name) or they have no valid port: those get the first free range, starting from base_port in steps of port_step.
+    Every instance keeps its server_max_mem (instances without one get an equal share of the budget) unless their sum
+    is over the memory budget: then they are all scaled down to fit it. Instances with an auto server_max_mem are left
+    alone and out of the budget, with a warning.
+
+    :instances_root: the folder holding the instances folders
+    :memory_budget: the memory in MB the instances can use, by default the host one minus RESERVED_MEMORY
+    :base_port: the first port that can be assigned
+    :port_step: the distance between assigned game ports
+    """
+
+    def __init__(self, instances_root: str, memory_budget: int = None, base_port: int = 2302, port_step: int = 10):
+        self.instances_root = instances_root
+        self.memory_budget = memory_budget
+        self.base_port = base_port
+        self.port_step = max(port_step, ARMA_PORTS_SPAN)
+        self.warnings: List[str] = []
+
+    def read_instances(self) -> List[PlannedInstance]:
+        """Return every instance with a config.ini file under the instances root, sorted by name."""
+        instances = []
+        self.warnings = []
+        with scandir(self.instances_root) as it:
+            entries = sorted((x for x in it if x.is_dir()), key=lambda x: x.name)
+        for entry in entries:
+            config_file = join(entry.path, "config.ini")
+            if not isfile(config_file):
+                continue
+            try:
+                bat = ConfigIni.read_file(config_file)["bat"]
+            except Exception as err:
+                self.warnings.append("Could not read the config file of '{}': {}".format(entry.name, err))
+                continue
+            max_mem = bat.get("server_max_mem", "")
+            instances.append(PlannedInstance(entry.name, config_file, parse_port(bat.get("server_port", "")),
+                                             _parse_int(max_mem), max_mem.strip().lower() == "auto"))
+        return instances
+
+    def get_used_ports(self) -> Dict[int, str]:
+        """Map every port used by an instance under the instances root to the instance name."""
+        used_ports = {}
+        for instance in self.read_instances():
+            if instance.port is not None:
+                for port in get_ports_range(instance.port):
+                    used_ports.setdefault(port, instance.name)
+        return used_ports
+
+    @staticmethod
+    def find_collisions(instances: List[PlannedInstance]) -> List[Tuple[PlannedInstance, PlannedInstance]]:
+        """Return every couple of instances whose port ranges overlap."""
+        with_port = [x for x in instances if x.port is not None]
+        return [(a, b) for i, a in enumerate(with_port) for b in with_port[i + 1:]
+                if abs(a.port - b.port) < ARMA_PORTS_SPAN]
+
+    def plan_ports(self, instances: List[PlannedInstance]) -> Dict[str, int]:
+        """Return the new game port of every instance that needs one."""
+        used_ports = set()
+        to_assign = []
+        for instance in instances:
+            ports = get_ports_range(instance.port) if instance.port is not None else []
+            if len(ports) == 0 or any(port in used_ports for port in ports):
+                to_assign.append(instance)
+            else:
+                used_ports.update(ports)
+        plan = {}
+        port = self.base_port
+        for instance in to_assign:
+            while any(x in used_ports for x in get_ports_range(port)):
+                port += self.port_step
+            if parse_port(str(port)) is None:
+                raise PlanningError("There are no free ports left for the instance '{}'.".format(instance.name))
+            used_ports.update(get_ports_range(port))
+            plan[instance.name] = port
+        return plan
+
+    def plan_memory(self, instances: List[PlannedInstance]) -> Dict[str, int]:
+        """Return the new server_max_mem of every instance that needs one."""
+        for instance in instances:
+            if instance.auto_mem:
+                self.warnings.append("The instance '{}' has server_max_mem = auto: it can take the whole host memory, "
+                                     "outside of the memory budget.".format(instance.name))
+        instances = [x for x in instances if not x.auto_mem]
+        if len(instances) == 0:
+            return {}
+        budget = self.memory_budget
+        if budget is None:
+            budget = get_host_memory() // 1024 ** 2 - RESERVED_MEMORY
+        if budget < MIN_MAX_MEM * len(instances):
+            raise PlanningError("A memory budget of {} MB can't fit {} instances: they need at least {} MB each."
+                                .format(budget, len(instances), MIN_MAX_MEM))
+        share = budget // len(instances)
+        wanted = {x.name: x.max_mem if x.max_mem is not None else _round_mem(share) for x in instances}
+        if sum(wanted.values()) > budget:
+            wanted = self._scale_memory(wanted, budget)
+        return {x.name: wanted[x.name] for x in instances if wanted[x.name] != x.max_mem}
+
+    @staticmethod
+    def _scale_memory(wanted: Dict[str, int], budget: int) -> Dict[str, int]:
+        """Scale the wanted memory of every instance down to fit the budget. The instances that would go below
+        MIN_MAX_MEM get it first, then the others share what's left of the budget."""
+        clamped: List[str] = []
+        while True:
+            to_scale = {name: mem for name, mem in wanted.items() if name not in clamped}
+            left = budget - MIN_MAX_MEM * len(clamped)
+            total = sum(to_scale.values())
+            scaled = {name: _round_mem(mem * left // total) for name, mem in to_scale.items()}
+            too_small = [name for name, mem in scaled.items() if mem < MIN_MAX_MEM]
+            if len(too_small) == 0:
+                return {**scaled, **{name: MIN_MAX_MEM for name in clamped}}
+            clamped += too_small
+
+    def plan(self) -> Dict[str, Dict[str, str]]:
+        """Return the [bat] entries to be changed in every instance config file, by instance name."""
+        instances = self.read_instances()
+        plan: Dict[str, Dict[str, str]] = {}
+        for name, port in self.plan_ports(instances).items():
+            plan.setdefault(name, {})["server_port"] = str(port)
+        for name, max_mem in self.plan_memory(instances).items():
+            plan.setdefault(name, {})["server_max_mem"] = str(max_mem)
+        return plan
+
+    def apply(self, plan: Dict[str, Dict[str, str]]) -> None:
+        """Write the planned entries back into the instances config files."""
+        for name, entries in plan.items():
+            ConfigIni.update_file(join(self.instances_root, name, "config.ini"), {"bat": entries})
+
+
+def parse_port(value: str) -> Union[int, None]:
+    """Return the given game port, or None if it's not a valid one."""
+    port = _parse_int(value)
+    return port if port is not None and 0 < port and port + ARMA_PORTS_SPAN - 1 <= 65535 else None
+
+
+def get_ports_range(port: int) -> List[int]:
+    """Return every port used by a server with the given game port."""
+    return list(range(port, port + ARMA_PORTS_SPAN))
+
+
+def _parse_int(value: str) -> Union[int, None]:
+    """Return the given integer, or None if it's not a valid one."""
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _round_mem(mem: int) -> int:
+    """Round the given memory down to a multiple of MAX_MEM_STEP."""
+    return mem // MAX_MEM_STEP * MAX_MEM_STEP
+
+
+class PlanningError(Exception):
+    """"""
@@ -0,0 +1,146 @@
+import json
+import sys
+import time
+from threading import Lock
+from os import replace
+from typing import Callable, Dict, List, Union
+
+
+class CopyProgress:
+    """Keep track of the bytes copied during a long operation, possibly spanning more than one mod, and compute the
+    overall speed and ETA. Every registered listener gets called with this object each time a file is copied.
+
+    :total_bytes: the number of bytes the whole operation is expected to copy
+    :listeners: a list of callables that will receive this object at every update
+    """
+
+    def __init__(self, total_bytes: int = 0, listeners: List[Callable[["CopyProgress"], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.total_bytes = total_bytes
+        self.copied_bytes = 0
+        self.current_file = ""
+        self.listeners = listeners if listeners is not None else []
+        self._clock = clock
+        self._start_time: Union[float, None] = None
+        self._lock = Lock()
+        self.done = False
+
+    def start(self) -> None:
+        """Start the clock used to compute speed and ETA."""
+        self._start_time = self._clock()
+        self.done = False
+        self._notify()
+
+    def update(self, file: str, copied_bytes: int) -> None:
+        """Register that copied_bytes more bytes of the given file have been copied. Safe to call from more threads."""
+        with self._lock:
+            if self._start_time is None:
+                self._start_time = self._clock()
+            self.current_file = file
+            self.copied_bytes += copied_bytes
+            self._notify()
+
+    def finish(self) -> None:
+        """Mark the operation as done."""
+        self.done = True
+        self._notify()
+
+    def elapsed(self) -> float:
+        """Return the seconds elapsed since the start."""
+        if self._start_time is None:
+            return 0.0
+        return self._clock() - self._start_time
+
+    def bytes_per_second(self) -> float:
+        """Return the average copy speed."""
+        elapsed = self.elapsed()
+        return self.copied_bytes / elapsed if elapsed > 0 else 0.0
+
+    def eta(self) -> Union[float, None]:
+        """Return the estimated seconds to completion, or None if it can't be computed yet."""
+        speed = self.bytes_per_second()
+        if speed <= 0:
+            return None
+        return max(self.total_bytes - self.copied_bytes, 0) / speed
+
+    def percent(self) -> float:
+        """Return the completion percentage."""
+        if self.total_bytes <= 0:
+            return 100.0 if self.done else 0.0
+        return min(self.copied_bytes / self.total_bytes * 100, 100.0)
+
+    def to_dict(self) -> Dict:
+        """Return a json serializable snapshot of the progress."""
+        return {
+            "total_bytes": self.total_bytes,
+            "copied_bytes": self.copied_bytes,
+            "percent": round(self.percent(), 2),
+            "bytes_per_second": round(self.bytes_per_second(), 2),
+            "eta": None if self.eta() is None else round(self.eta(), 2),
+            "elapsed": round(self.elapsed(), 2),
+            "current_file": self.current_file,
+            "done": self.done,
+        }
+
+    def _notify(self) -> None:
+        """Call every listener."""
+        for listener in self.listeners:
+            listener(self)
+
+
+class ConsoleProgressRenderer:
+    """Progress listener that keeps a single updated progress line on the console."""
+
+    def __init__(self, stream=None, min_interval: float = 0.2, clock: Callable[[], float] = time.monotonic):
+        self.stream = stream if stream is not None else sys.stdout
+        self.min_interval = min_interval
+        self._clock = clock
+        self._last_render = None
+
+    def __call__(self, progress: CopyProgress) -> None:
+        if progress.total_bytes <= 0:
+            # nothing to copy, nothing to show
+            return
+        now = self._clock()
+        if not progress.done and self._last_render is not None and now - self._last_render < self.min_interval:
+            return
+        self._last_render = now
+        eta = progress.eta()
+        eta_string = "--:--" if eta is None else "{:02d}:{:02d}".format(int(eta // 60), int(eta % 60))
+        line = "\r > Copying mods: {:5.1f}% {} / {}  {}/s  ETA {}".format(
+            progress.percent(), format_bytes(progress.copied_bytes), format_bytes(progress.total_bytes),
+            format_bytes(progress.bytes_per_second()), eta_string)
+        self.stream.write(line)
+        if progress.done:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+class JsonProgressWriter:
+    """Progress listener that keeps a json snapshot of the progress in the given file, so that dashboards can poll
+    it. The file is replaced atomically so that readers never see a half written snapshot."""
+
+    def __init__(self, file_path: str, min_interval: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.file_path = file_path
+        self.min_interval = min_interval
+        self._clock = clock
+        self._last_write = None
+
+    def __call__(self, progress: CopyProgress) -> None:
+        now = self._clock()
+        if not progress.done and self._last_write is not None and now - self._last_write < self.min_interval:
+            return
+        self._last_write = now
+        tmp_file = self.file_path + ".tmp"
+        with open(tmp_file, "w+") as f:
+            json.dump(progress.to_dict(), f)
+        replace(tmp_file, self.file_path)
+
+
+def format_bytes(size: float) -> str:
+    """Return a human readable representation of the given bytes count."""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(size) < 1024:
+            return "{:.1f} {}".format(size, unit)
+        size /= 1024
+    return "{:.1f} TB".format(size)
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from os.path import normcase, normpath, sep
+from typing import Callable, List, Tuple
+
+
+class HookResources:
+    """The paths touched by a mod operation or a mod fix hook.
+
+    :reads: the paths that are only read
+    :writes: the paths that are created, changed or deleted
+    :thread_safe: if False, the operation can't run alongside any other one
+
+    Paths are whole trees: declaring a folder covers everything inside it.
+    """
+
+    __slots__ = ("reads", "writes", "thread_safe")
+
+    def __init__(self, reads: List[str] = None, writes: List[str] = None, thread_safe: bool = True):
+        self.reads = [_normalize(x) for x in reads] if reads is not None else []
+        self.writes = [_normalize(x) for x in writes] if writes is not None else []
+        self.thread_safe = thread_safe
+
+    def merge(self, other: "HookResources") -> "HookResources":
+        """Return the resources needed to run both operations, one after the other."""
+        merged = HookResources(thread_safe=self.thread_safe and other.thread_safe)
+        merged.reads = self.reads + other.reads
+        merged.writes = self.writes + other.writes
+        return merged
+
+    def conflicts_with(self, other: "HookResources") -> bool:
+        """Return True if the two operations can't safely run at the same time: either one is not thread safe or one
+        writes a path the other reads or writes."""
+        if not self.thread_safe or not other.thread_safe:
+            return True
+        return _overlap(self.writes, other.reads + other.writes) or _overlap(other.writes, self.reads)
+
+
+def _normalize(path: str) -> str:
+    """Return the path in a form that can be compared with others."""
+    return normcase(normpath(path))
+
+
+def _overlap(paths: List[str], other_paths: List[str]) -> bool:
+    """Return True if any path of the first list is the same as, inside or a parent of any path of the second."""
+    for path in paths:
+        for other in other_paths:
+            if path == other or path.startswith(other.rstrip(sep) + sep) or other.startswith(path.rstrip(sep) + sep):
+                return True
+    return False
+
+
+class ModOpScheduler:
+    """Run a list of jobs, each one with its declared resources, on up to max_workers threads.
+
+    A job starts only when it doesn't conflict with any running job nor with any job that comes before it in the list,
+    so conflicting jobs keep their relative order. With a single worker, jobs simply run one after the other. The
+    first error stops the scheduling of new jobs and is raised once the running ones are done.
+
+    :max_workers: the maximum number of jobs running at the same time
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max(1, max_workers)
+
+    def run(self, jobs: List[Tuple[HookResources, Callable[[], None]]]) -> None:
+        """Run all given jobs."""
+        if self.max_workers == 1 or len(jobs) < 2:
+            for _, job in jobs:
+                job()
+            return
+        pending = list(jobs)
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(pending) > 0 or len(running) > 0:
+                if error is None:
+                    self._start_ready_jobs(executor, pending, running)
+                else:
+                    pending = []
+                if len(running) == 0:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    if future.exception() is not None and error is None:
+                        error = future.exception()
+        if error is not None:
+            raise error
+
+    def _start_ready_jobs(self, executor: ThreadPoolExecutor, pending: List[Tuple[HookResources, Callable]],
+                          running: dict) -> None:
+        """Submit every pending job that can start now, in order, removing it from the pending ones."""
+        blocked: List[HookResources] = list(running.values())
+        for resources, job in list(pending):
+            if len(running) >= self.max_workers:
+                break
+            if not any(resources.conflicts_with(x) for x in blocked):
+                running[executor.submit(job)] = resources
+                pending.remove((resources, job))
+            blocked.append(resources)
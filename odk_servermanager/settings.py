@@ -1,9 +1,75 @@
 import os
+from inspect import signature, Parameter
 from os.path import splitdrive
-from typing import List, Dict
+from typing import Iterable, List, Dict
 
 from box import Box
 
+from odk_servermanager.network import get_network_settings, InvalidNetworkSettings
+from odk_servermanager.utils import parse_cpu_list, InvalidCpuList
+
+
+class ModList(list):
+    """A list of mod names that also keeps a set view of its elements, so that membership tests are O(1). The set is
+    rebuilt lazily after any change to the list."""
+
+    __slots__ = ("_members",)
+
+    def __init__(self, iterable: Iterable[str] = ()):
+        super().__init__(iterable)
+        self._members = None
+
+    def __contains__(self, item) -> bool:
+        if self._members is None:
+            self._members = frozenset(self)
+        return item in self._members
+
+    def _changed(self) -> None:
+        self._members = None
+
+    def append(self, item) -> None:
+        super().append(item)
+        self._changed()
+
+    def extend(self, iterable) -> None:
+        super().extend(iterable)
+        self._changed()
+
+    def insert(self, index, item) -> None:
+        super().insert(index, item)
+        self._changed()
+
+    def remove(self, item) -> None:
+        super().remove(item)
+        self._changed()
+
+    def pop(self, *args):
+        item = super().pop(*args)
+        self._changed()
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, other) -> "ModList":
+        result = super().__iadd__(other)
+        self._changed()
+        return result
+
+    def __imul__(self, other) -> "ModList":
+        result = super().__imul__(other)
+        self._changed()
+        return result
+
 
 class ServerConfigSettings(Box):
     """Config container for the serverConfig.cfg file.
@@ -19,16 +85,18 @@ class ServerConfigSettings(Box):
     OPTIONAL FIELDS
     ---------------
     :config_template: path of the custom template file for the cfg
+    :missions_list: the other missions linked in the instance MPMissions folder; * links the whole shared folder
     """
 
     def __init__(self, hostname: str, password: str, password_admin: str, mission_template: str,
-                 config_template: str = "", **kwargs):
+                 config_template: str = "", missions_list: str = "", **kwargs):
         super(Box, self).__init__(hostname=hostname, password=password, password_admin=password_admin,
-                                  mission_template=mission_template, config_template=config_template, **kwargs)
+                                  mission_template=mission_template, config_template=config_template,
+                                  missions_list=missions_list, **kwargs)
 
 
 class ServerBatSettings(Box):
-    """Config container for the run_server.bat file.
+    """Config container for the run_server.bat and run_server.sh files.
     Other than the required and optional arguments, any additional named arguments will be saved.
 
     REQUIRED FIELDS
@@ -37,20 +105,36 @@ class ServerBatSettings(Box):
     :server_port: The port the server is running on
     :server_config_file_name: The name of the config file, located in the instance folder
     :server_cfg_file_name: The name of the cfg file, located in the instance folder
-    :server_max_mem: The max memory that the server will be able to allocate
+    :server_max_mem: The max memory that the server will be able to allocate, or auto to derive it from the host
 
     OPTIONAL FIELDS
     ---------------
     :server_flags: Default to empty, any addition flag to be passed to the server
     :bat_template: path of the custom template file for the bat
+    :server_cpus: Linux only, the CPUs a supervised server is pinned to, like 0-3,8
+    :server_memory_limit: Linux only, the hard memory limit in MB of a supervised server process
+    :sh_template: path of the custom template file for the Linux run_server.sh
+    :server_hugepages: Linux only, if True the server allocates its memory on huge pages
+    :server_autotune: if True the performance flags are derived from the host profile; server_flags still win
+    :network_profile: lan, 1gbit or 100mbit to generate the cfg file with network settings tuned for it
+    :network_uplink: the server upload bandwidth in Mbit/s, default to the network profile one
+    :network_players: the expected players the network settings are tuned for
+    :cfg_template: path of the custom template file for the generated cfg file
     """
 
     def __init__(self, server_title: str, server_port: str, server_config_file_name: str, server_cfg_file_name: str,
-                 server_max_mem: str, server_flags: str = "", bat_template: str = "", **kwargs):
+                 server_max_mem: str, server_flags: str = "", bat_template: str = "", server_cpus: str = "",
+                 server_memory_limit: str = "", sh_template: str = "", server_hugepages: str = "False",
+                 server_autotune: str = "False", network_profile: str = "", network_uplink: str = "",
+                 network_players: str = "", cfg_template: str = "", **kwargs):
         super(Box, self).__init__(server_title=server_title, server_port=server_port,
                                   server_config_file_name=server_config_file_name,
                                   server_cfg_file_name=server_cfg_file_name, server_max_mem=server_max_mem,
-                                  server_flags=server_flags, bat_template=bat_template, **kwargs)
+                                  server_flags=server_flags, bat_template=bat_template, server_cpus=server_cpus,
+                                  server_memory_limit=server_memory_limit, sh_template=sh_template,
+                                  server_hugepages=server_hugepages, server_autotune=server_autotune,
+                                  network_profile=network_profile, network_uplink=network_uplink,
+                                  network_players=network_players, cfg_template=cfg_template, **kwargs)
 
 
 class ModFixSettings(Box):
@@ -60,13 +144,15 @@ class ModFixSettings(Box):
     ---------------
     :enabled_fixes: all enabled fix file names (without the .py); will automatically put these mods in mods_to_be_copied
     :mod_fix_settings: a Dict that may contain specific ModFix settings. Default empty.
+    :plugins_folder: a folder with additional mod fix files. Default empty.
     """
 
-    def __init__(self, enabled_fixes: List[str] = [], mod_fix_settings: Dict[str, str] = {}):
-        super(Box, self).__init__(enabled_fixes=enabled_fixes, mod_fix_settings=mod_fix_settings)
+    def __init__(self, enabled_fixes: List[str] = [], mod_fix_settings: Dict[str, str] = {}, plugins_folder: str = ""):
+        super(Box, self).__init__(enabled_fixes=enabled_fixes, mod_fix_settings=mod_fix_settings,
+                                  plugins_folder=plugins_folder)
 
 
-class ServerInstanceSettings(Box):
+class ServerInstanceSettings:
     """Config container for the ODKSM module.
 
     REQUIRED FIELDS
@@ -88,8 +174,18 @@ class ServerInstanceSettings(Box):
     :server_mods_list: the list of the server mods
     :skip_keys: which key will be skipped and not linked to the main Keys folder
     :user_mods_preset: the path of an xml preset generated by the Arma 3 launcher
+    :mods_workers: how many mods can be linked or copied at the same time, default to 1
+
+    Mods lists are stored as ModList, so that membership tests don't scan them; assigning a plain list to them converts
+    it. Every problem found in the given values is reported at once, with an InvalidSettings exception.
     """
 
+    __slots__ = ("server_instance_name", "arma_folder", "bat_settings", "config_settings", "fix_settings",
+                 "linked_mod_folder_name", "copied_mod_folder_name", "server_instance_prefix", "server_instance_root",
+                 "server_drive", "user_mods_preset", "mods_workers", "_mods_to_be_copied", "_user_mods_list",
+                 "_server_mods_list", "_skip_keys")
+    mods_lists = ["mods_to_be_copied", "user_mods_list", "server_mods_list", "skip_keys"]
+
     def __init__(self, server_instance_name: str,
                  bat_settings: ServerBatSettings, config_settings: ServerConfigSettings,
                  fix_settings: ModFixSettings = ModFixSettings(),
@@ -97,19 +193,148 @@ class ServerInstanceSettings(Box):
                  linked_mod_folder_name: str = "!Mods_linked", copied_mod_folder_name: str = "!Mods_copied",
                  server_instance_prefix: str = "__server__", server_instance_root: str = "",
                  user_mods_list: List[str] = [], server_mods_list: List[str] = [], skip_keys: List[str] = [],
-                 user_mods_preset: str = ""):
+                 user_mods_preset: str = "", mods_workers: int = 1):
+        errors = self._validate(server_instance_name, bat_settings, config_settings, fix_settings,
+                                {"mods_to_be_copied": mods_to_be_copied, "user_mods_list": user_mods_list,
+                                 "server_mods_list": server_mods_list, "skip_keys": skip_keys}, mods_workers)
+        if len(errors) > 0:
+            raise InvalidSettings("Invalid settings:\n - {}".format("\n - ".join(errors)))
         if arma_folder == "":
             arma_folder = os.path.join(os.getenv("ProgramFiles(x86)"), r"Steam\steamapps\common\Arma 3")
         if server_instance_root == "":
             server_instance_root = arma_folder
-        server_drive = splitdrive(server_instance_root)[0]
-        super(Box, self).__init__(server_instance_name=server_instance_name, arma_folder=arma_folder,
-                                  bat_settings=bat_settings, config_settings=config_settings,
-                                  mods_to_be_copied=mods_to_be_copied, linked_mod_folder_name=linked_mod_folder_name,
-                                  copied_mod_folder_name=copied_mod_folder_name,
-                                  server_instance_prefix=server_instance_prefix,
-                                  server_instance_root=server_instance_root,
-                                  user_mods_list=user_mods_list, server_mods_list=server_mods_list,
-                                  skip_keys=skip_keys + ["!DO_NOT_CHANGE_FILES_IN_THESE_FOLDERS"],
-                                  server_drive=server_drive, fix_settings=fix_settings,
-                                  user_mods_preset=user_mods_preset)
+        self.server_instance_name = server_instance_name
+        self.arma_folder = arma_folder
+        self.bat_settings = bat_settings
+        self.config_settings = config_settings
+        self.fix_settings = fix_settings
+        self.mods_to_be_copied = mods_to_be_copied
+        self.linked_mod_folder_name = linked_mod_folder_name
+        self.copied_mod_folder_name = copied_mod_folder_name
+        self.server_instance_prefix = server_instance_prefix
+        self.server_instance_root = server_instance_root
+        self.user_mods_list = user_mods_list
+        self.server_mods_list = server_mods_list
+        self.skip_keys = list(skip_keys) + ["!DO_NOT_CHANGE_FILES_IN_THESE_FOLDERS"]
+        self.server_drive = splitdrive(server_instance_root)[0]
+        self.user_mods_preset = user_mods_preset
+        self.mods_workers = int(mods_workers)
+
+    @property
+    def mods_to_be_copied(self) -> ModList:
+        return self._mods_to_be_copied
+
+    @mods_to_be_copied.setter
+    def mods_to_be_copied(self, value: List[str]) -> None:
+        self._mods_to_be_copied = ModList(value)
+
+    @mods_to_be_copied.deleter
+    def mods_to_be_copied(self) -> None:
+        del self._mods_to_be_copied
+
+    @property
+    def user_mods_list(self) -> ModList:
+        return self._user_mods_list
+
+    @user_mods_list.setter
+    def user_mods_list(self, value: List[str]) -> None:
+        self._user_mods_list = ModList(value)
+
+    @user_mods_list.deleter
+    def user_mods_list(self) -> None:
+        del self._user_mods_list
+
+    @property
+    def server_mods_list(self) -> ModList:
+        return self._server_mods_list
+
+    @server_mods_list.setter
+    def server_mods_list(self, value: List[str]) -> None:
+        self._server_mods_list = ModList(value)
+
+    @server_mods_list.deleter
+    def server_mods_list(self) -> None:
+        del self._server_mods_list
+
+    @property
+    def skip_keys(self) -> ModList:
+        return self._skip_keys
+
+    @skip_keys.setter
+    def skip_keys(self, value: List[str]) -> None:
+        self._skip_keys = ModList(value)
+
+    @skip_keys.deleter
+    def skip_keys(self) -> None:
+        del self._skip_keys
+
+    def copy(self) -> "ServerInstanceSettings":
+        """Return a copy of these settings, with its own mods lists."""
+        new = object.__new__(ServerInstanceSettings)
+        for field in self.__slots__:
+            value = getattr(self, field)
+            setattr(new, field, ModList(value) if isinstance(value, ModList) else value)
+        return new
+
+    def to_dict(self) -> Dict:
+        """Return the settings as a dict."""
+        data = {field.lstrip("_"): getattr(self, field) for field in self.__slots__}
+        for field in self.mods_lists:
+            data[field] = list(data[field])
+        return data
+
+    @staticmethod
+    def _validate(server_instance_name: str, bat_settings: ServerBatSettings, config_settings: ServerConfigSettings,
+                  fix_settings: ModFixSettings, mods_lists: Dict[str, List[str]], mods_workers: int) -> List[str]:
+        """Return a list with every problem found in the given values."""
+        errors = []
+        if not isinstance(server_instance_name, str) or server_instance_name.strip() == "":
+            errors.append("'server_instance_name' must be a non empty string")
+        elif any(char in server_instance_name for char in '<>:"/\\|?*'):
+            errors.append("'server_instance_name' can't contain any of <>:\"/\\|?*")
+        for name, value, container in [("bat_settings", bat_settings, ServerBatSettings),
+                                       ("config_settings", config_settings, ServerConfigSettings),
+                                       ("fix_settings", fix_settings, ModFixSettings)]:
+            if not isinstance(value, container):
+                errors.append("'{}' must be a {}".format(name, container.__name__))
+        if isinstance(bat_settings, ServerBatSettings):
+            try:
+                parse_cpu_list(str(bat_settings.get("server_cpus", "")))
+            except InvalidCpuList:
+                errors.append("'server_cpus' must be a CPU list like 0-3,8")
+            if bat_settings.get("network_profile", "") != "":
+                try:
+                    get_network_settings(str(bat_settings.network_profile), str(bat_settings.get("network_uplink", "")),
+                                         str(bat_settings.get("network_players", "")))
+                except InvalidNetworkSettings as err:
+                    errors.append(str(err).rstrip("."))
+        for name, value in mods_lists.items():
+            if not isinstance(value, (list, tuple)) or not all(isinstance(x, str) for x in value):
+                errors.append("'{}' must be a list of mod names".format(name))
+        try:
+            if int(mods_workers) < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append("'mods_workers' must be a positive integer")
+        return errors
+
+
+def validate_config_data(data: Dict[str, Dict]) -> None:
+    """Check that the sections read from a config file hold every field required by the settings containers, raising
+    a single InvalidSettings exception that lists every missing field."""
+    errors = []
+    for section, container in [("ODKSM", ServerInstanceSettings), ("bat", ServerBatSettings),
+                               ("config", ServerConfigSettings)]:
+        fields = data.get(section, {})
+        for name, parameter in signature(container.__init__).parameters.items():
+            if name in ["self", "bat_settings", "config_settings"] or parameter.default is not Parameter.empty or \
+                    parameter.kind in [Parameter.VAR_KEYWORD, Parameter.VAR_POSITIONAL]:
+                continue
+            if name not in fields:
+                errors.append("'{}' field is missing in the [{}] section".format(name, section))
+    if len(errors) > 0:
+        raise InvalidSettings("Invalid settings:\n - {}".format("\n - ".join(errors)))
+
+
+class InvalidSettings(Exception):
+    """"""
@@ -1,4 +1,8 @@
-from typing import List, Dict
+from typing import Iterable, List, Dict
+
+
+class ModList(List[str]):
+    def __init__(self, iterable: Iterable[str] = ...) -> None: ...
 
 
 class ServerConfigSettings:
@@ -7,6 +11,7 @@ class ServerConfigSettings:
     password_admin: str
     template: str
     config_template: str
+    missions_list: str
 
 
 class ServerBatSettings:
@@ -17,11 +22,21 @@ class ServerBatSettings:
     server_max_mem: str
     server_flags: str
     bat_template: str
+    server_cpus: str
+    server_memory_limit: str
+    sh_template: str
+    server_hugepages: str
+    server_autotune: str
+    network_profile: str
+    network_uplink: str
+    network_players: str
+    cfg_template: str
 
 
 class ModFixSettings:
     enabled_fixes: List[str]
     mod_fix_settings: Dict[str, str]
+    plugins_folder: str
 
 
 class ServerInstanceSettings:
@@ -35,8 +50,31 @@ class ServerInstanceSettings:
     server_instance_prefix: str
     linked_mod_folder_name: str
     copied_mod_folder_name: str
-    mods_to_be_copied: List[str]
-    user_mods_list: List[str]
-    server_mods_list: List[str]
-    skip_keys: List[str]
     user_mods_preset: str
+    mods_workers: int
+    mods_lists: List[str]
+
+    @property
+    def mods_to_be_copied(self) -> ModList: ...
+    @mods_to_be_copied.setter
+    def mods_to_be_copied(self, value: List[str]) -> None: ...
+    @property
+    def user_mods_list(self) -> ModList: ...
+    @user_mods_list.setter
+    def user_mods_list(self, value: List[str]) -> None: ...
+    @property
+    def server_mods_list(self) -> ModList: ...
+    @server_mods_list.setter
+    def server_mods_list(self, value: List[str]) -> None: ...
+    @property
+    def skip_keys(self) -> ModList: ...
+    @skip_keys.setter
+    def skip_keys(self, value: List[str]) -> None: ...
+    def copy(self) -> ServerInstanceSettings: ...
+    def to_dict(self) -> Dict: ...
+
+
+def validate_config_data(data: Dict[str, Dict]) -> None: ...
+
+
+class InvalidSettings(Exception): ...
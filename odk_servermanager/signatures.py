@@ -0,0 +1,148 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, replace, scandir
+from os.path import join, isfile, isdir, dirname
+from typing import Dict, List, Tuple, Union
+
+
+def read_authority(file: str) -> str:
+    """Return the authority name stored at the start of a .bikey or .bisign file."""
+    with open(file, "rb") as f:
+        data = f.read(1024)
+    end = data.find(b"\0")
+    if end <= 0:
+        raise InvalidSignatureFile("Could not find an authority name in {}.".format(file))
+    return data[:end].decode("utf-8", errors="replace")
+
+
+class ModSignatures:
+    """The outcome of the signatures verification of a mod.
+
+    :mod_name: the verified mod
+    :keys: the authorities of the .bikey files shipped by the mod
+    :bad_pbos: the pbos without a .bisign matching one of the keys
+    :errors: the unreadable key or signature files
+    """
+
+    def __init__(self, mod_name: str, keys: List[str] = None, bad_pbos: List[str] = None, errors: List[str] = None):
+        self.mod_name = mod_name
+        self.keys = keys if keys is not None else []
+        self.bad_pbos = bad_pbos if bad_pbos is not None else []
+        self.errors = errors if errors is not None else []
+
+
+class SignaturesVerifier:
+    """Cross-reference the .bisign files of every pbo of a mod with the .bikey files it ships.
+
+    Only the authority name at the start of those files is needed: it's cached, keyed by file path, size and
+    modification time, in the __odksm__ folder in the Arma root, so that unchanged files never get read again. Mods are
+    verified in parallel.
+    """
+
+    folder_name = "__odksm__"
+    file_name = "signatures_cache.json"
+
+    def __init__(self, arma_folder: str, max_workers: int = 8):
+        self.workshop_folder = join(arma_folder, "!Workshop")
+        self.file = join(arma_folder, self.folder_name, self.file_name)
+        self.max_workers = max_workers
+        self.cache: Dict[str, List] = {}
+        self._dirty = False
+        self._load()
+
+    def verify_mods(self, mods: List[str]) -> List[ModSignatures]:
+        """Verify the given mods in parallel, returning their results in the same order."""
+        mods = list(dict.fromkeys(mods))
+        if len(mods) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(mods))) as executor:
+            outcomes = list(executor.map(self._verify_mod, mods))
+        results = []
+        for result, new_cache_entries in outcomes:
+            if len(new_cache_entries) > 0:
+                self.cache.update(new_cache_entries)
+                self._dirty = True
+            results.append(result)
+        return results
+
+    def save(self) -> None:
+        """Persist the cache, if anything changed. Failing to save it is not an error."""
+        if not self._dirty:
+            return
+        try:
+            makedirs(dirname(self.file), exist_ok=True)
+            tmp_file = self.file + ".tmp"
+            with open(tmp_file, "w+") as f:
+                json.dump(self.cache, f)
+            replace(tmp_file, self.file)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _load(self) -> None:
+        """Load the cache from disk, discarding it if unreadable."""
+        if not isfile(self.file):
+            return
+        try:
+            with open(self.file, "r") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def _verify_mod(self, mod_name: str) -> Tuple[ModSignatures, Dict[str, List]]:
+        """Verify a single mod. The cache is only read here: new entries are returned, to be merged by the caller."""
+        result = ModSignatures(mod_name)
+        new_cache_entries = {}
+        mod_folder = join(self.workshop_folder, "@" + mod_name)
+        if not isdir(mod_folder):
+            return result, new_cache_entries
+
+        def get_authority(entry) -> Union[str, None]:
+            signature = [entry.stat().st_size, entry.stat().st_mtime_ns]
+            cached = self.cache.get(entry.path)
+            if cached is not None and cached[:2] == signature:
+                return cached[2]
+            try:
+                authority = read_authority(entry.path)
+            except (OSError, InvalidSignatureFile):
+                result.errors.append(entry.name)
+                return None
+            new_cache_entries[entry.path] = signature + [authority]
+            return authority
+
+        keys_files = []
+        addons_files = []
+        with scandir(mod_folder) as it:
+            for entry in it:
+                if entry.is_dir() and entry.name.lower() in ("keys", "key"):
+                    keys_files += self._scan(entry.path, ".bikey")
+                elif entry.is_dir() and entry.name.lower() == "addons":
+                    addons_files += self._scan(entry.path, ".pbo", ".bisign")
+        keys = set()
+        for entry in keys_files:
+            authority = get_authority(entry)
+            if authority is not None:
+                keys.add(authority)
+        result.keys = sorted(keys)
+        signed_pbos = set()
+        for entry in filter(lambda x: x.name.lower().endswith(".bisign"), addons_files):
+            # signatures are named after their pbo: <name>.pbo.<authority>.bisign
+            pbo_name_end = entry.name.lower().find(".pbo.")
+            if pbo_name_end == -1:
+                continue
+            pbo_name = entry.name[:pbo_name_end + 4].lower()
+            if pbo_name not in signed_pbos and get_authority(entry) in keys:
+                signed_pbos.add(pbo_name)
+        result.bad_pbos = sorted(entry.name for entry in addons_files
+                                 if entry.name.lower().endswith(".pbo") and entry.name.lower() not in signed_pbos)
+        return result, new_cache_entries
+
+    @staticmethod
+    def _scan(folder: str, *extensions: str) -> List:
+        """Return the DirEntry of every file in the folder with one of the given extensions."""
+        with scandir(folder) as it:
+            return [entry for entry in it if entry.name.lower().endswith(extensions) and entry.is_file()]
+
+
+class InvalidSignatureFile(Exception):
+    """"""
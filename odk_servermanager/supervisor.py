@@ -0,0 +1,144 @@
+import logging
+import os
+import subprocess
+import time
+from logging.handlers import RotatingFileHandler
+from threading import Event, Lock, Timer
+from typing import List, Union
+
+
+class ServerSupervisor:
+    """Launch a server process and keep it running, like the restart loop of run_server.bat does on Windows.
+
+    The server gets restarted whenever it exits, waiting backoff_start seconds the first time and doubling the wait,
+    up to backoff_max, every time it exits again before having run for stable_after seconds. Its output goes to
+    log_file, rotated every log_max_bytes into log_file.1, log_file.2... On Linux the server can be pinned to some CPUs
+    and its memory can be capped.
+
+    :command: the server command line
+    :cwd: the folder the server runs in
+    :log_file: the file the server output is written to
+    :cpus: the CPUs the server is pinned to, or None
+    :memory_limit: the hard memory limit of the server process in MB, or None
+    :max_restarts: how many times the server can be restarted, or None to restart it forever
+    :backoff_start: the seconds to wait before the first restart
+    :backoff_max: the max seconds to wait before a restart
+    :stable_after: the seconds of uptime after which the server is considered stable and the backoff resets
+    :stop_timeout: the seconds a stopping server has to exit before getting killed
+    :log_max_bytes: the size of a log file before it gets rotated
+    :log_backups: how many rotated log files are kept
+    """
+
+    def __init__(self, command: List[str], cwd: str, log_file: str, cpus: List[int] = None, memory_limit: int = None,
+                 max_restarts: int = None, backoff_start: float = 5, backoff_max: float = 300,
+                 stable_after: float = 600, stop_timeout: float = 30, log_max_bytes: int = 10 * 1024 ** 2,
+                 log_backups: int = 5):
+        self.command = command
+        self.cwd = cwd
+        self.log_file = log_file
+        self.cpus = cpus if cpus is not None and len(cpus) > 0 else None
+        self.memory_limit = memory_limit
+        self.max_restarts = max_restarts
+        self.backoff_start = backoff_start
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.stop_timeout = stop_timeout
+        self.restarts = 0
+        self._stopping = Event()
+        self._process: Union[subprocess.Popen, None] = None
+        self._process_lock = Lock()
+        self.logger = logging.getLogger("odksm.supervisor.{}".format(id(self)))
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self._handler = RotatingFileHandler(log_file, maxBytes=log_max_bytes, backupCount=log_backups)
+        self._handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self.logger.addHandler(self._handler)
+
+    def run(self) -> Union[int, None]:
+        """Run the server until it's stopped or it runs out of restarts, and return its last exit code."""
+        delay = self.backoff_start
+        return_code = None
+        try:
+            while not self._stopping.is_set():
+                start = time.monotonic()
+                return_code = self._run_once()
+                if return_code is None or self._stopping.is_set():
+                    break
+                if time.monotonic() - start >= self.stable_after:
+                    delay = self.backoff_start
+                if return_code == 0:
+                    self._log("The server exited.")
+                else:
+                    self._log("The server crashed with exit code {}.".format(return_code))
+                if self.max_restarts is not None and self.restarts >= self.max_restarts:
+                    self._log("No restarts left, giving up.")
+                    break
+                self.restarts += 1
+                self._log("Restarting the server in {:g} seconds.".format(delay))
+                if self._stopping.wait(delay):
+                    break
+                delay = min(delay * 2, self.backoff_max)
+        finally:
+            self.logger.removeHandler(self._handler)
+            self._handler.close()
+        return return_code
+
+    def stop(self) -> None:
+        """Stop the server and the supervisor. Can be called from another thread or from a signal handler, so it never
+        takes the process lock: a server started meanwhile sees the stopping flag and gets terminated by _run_once."""
+        self._stopping.set()
+        process = self._process
+        if process is not None:
+            self._terminate_process(process)
+
+    def _terminate_process(self, process: subprocess.Popen) -> None:
+        """Terminate a running server, killing it if it didn't exit after stop_timeout seconds."""
+        if process.poll() is None:
+            process.terminate()
+            killer = Timer(self.stop_timeout, self._kill_process, [process])
+            killer.daemon = True
+            killer.start()
+
+    @staticmethod
+    def _kill_process(process: subprocess.Popen) -> None:
+        """Kill a stopping server that didn't exit in time."""
+        if process.poll() is None:
+            process.kill()
+
+    def _run_once(self) -> Union[int, None]:
+        """Run the server once, logging its output, and return its exit code or None if it could not start."""
+        self._log("Starting the server: {}".format(subprocess.list2cmdline(self.command)))
+        with self._process_lock:
+            if self._stopping.is_set():
+                return None
+            try:
+                self._process = subprocess.Popen(self.command, cwd=self.cwd, stdout=subprocess.PIPE,
+                                                 stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                                 preexec_fn=self._limit_process if os.name == "posix" else None)
+            except OSError as err:
+                self._log("Could not start the server: {}".format(err))
+                return None
+        process = self._process
+        if self._stopping.is_set():
+            self._terminate_process(process)
+        for line in process.stdout:
+            self.logger.info(line.decode("utf-8", errors="replace").rstrip())
+        try:
+            return process.wait(timeout=self.stop_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            return process.wait()
+
+    def _limit_process(self) -> None:
+        """Apply the CPU affinity and the memory limit to the server process, just before it starts."""
+        if self.cpus is not None:
+            os.sched_setaffinity(0, self.cpus)
+        if self.memory_limit is not None:
+            import resource
+            limit = self.memory_limit * 1024 ** 2
+            resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+
+    def _log(self, message: str) -> None:
+        """Log a supervisor event, both in the log file and on the console."""
+        self.logger.info("[ODKSM] {}".format(message))
+        print(" [SUPERVISOR] {}".format(message))
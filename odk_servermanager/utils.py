@@ -1,7 +1,10 @@
+import os
 import shutil
-from os import listdir
+from os import listdir, scandir
 from os.path import isdir, abspath, join
-from typing import Dict, List
+from typing import Callable, Dict, List, Union
+
+PROGRESS_CALLBACK = Union[Callable[[str, int], None], None]
 
 
 def symlink(source: str, link_name: str) -> None:
@@ -22,11 +25,101 @@ def symlink(source: str, link_name: str) -> None:
             raise ctypes.WinError()
 
 
-def copytree(source: str, dest: str) -> None:
-    """Copy a folder using shutil.copytree, and ensure we pass in absolute paths."""
+def copytree(source: str, dest: str, progress_callback: PROGRESS_CALLBACK = None) -> None:
+    """Copy a folder using shutil.copytree, and ensure we pass in absolute paths. If a progress_callback is provided,
+    it will be called with the file name and its size after every copied file."""
     source = abspath(source)
     dest = abspath(dest)
-    shutil.copytree(source, dest)
+    if progress_callback is None:
+        shutil.copytree(source, dest)
+    else:
+        shutil.copytree(source, dest, copy_function=lambda s, d: copy_with_progress(s, d, progress_callback))
+
+
+def copy_with_progress(source: str, dest: str, progress_callback: Callable[[str, int], None]) -> str:
+    """Copy a file with shutil.copy2, keeping its fast copy path, then call progress_callback with the file name and
+    its size."""
+    result = shutil.copy2(source, dest)
+    progress_callback(source, os.path.getsize(result))
+    return result
+
+
+def get_folder_size(folder: str) -> int:
+    """Return the size in bytes of all files in the given folder, recursively. Symlinks are not followed."""
+    size = 0
+    with scandir(folder) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                size += get_folder_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                size += entry.stat(follow_symlinks=False).st_size
+    return size
+
+
+def get_host_memory() -> int:
+    """Return the physical memory of the host, in bytes, both on Linux and Windows."""
+    if hasattr(os, "sysconf") and "SC_PHYS_PAGES" in os.sysconf_names:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    import ctypes
+
+    class MemoryStatusEx(ctypes.Structure):
+        _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+    status = MemoryStatusEx()
+    status.dwLength = ctypes.sizeof(MemoryStatusEx)
+    if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)) == 0:
+        raise ctypes.WinError()
+    return status.ullTotalPhys
+
+
+def parse_cpu_list(cpus: str) -> List[int]:
+    """Parse a CPU list like 0-3,8 into the list of CPU numbers."""
+    result = []
+    for part in cpus.replace(" ", "").split(","):
+        if part == "":
+            continue
+        first, _, last = part.partition("-")
+        try:
+            first_cpu = int(first)
+            last_cpu = int(last) if last != "" else first_cpu
+        except ValueError:
+            raise InvalidCpuList("'{}' is not a valid CPU list.".format(cpus))
+        if first_cpu < 0 or last_cpu < first_cpu:
+            raise InvalidCpuList("'{}' is not a valid CPU list.".format(cpus))
+        result += [x for x in range(first_cpu, last_cpu + 1) if x not in result]
+    return result
+
+
+def clone_file(source: str, dest: str) -> None:
+    """Copy a file trying a copy-on-write clone first (reflink, supported by filesystems like Btrfs or XFS) and falling
+    back to a regular shutil.copy2 when that's not possible."""
+    source = abspath(source)
+    dest = abspath(dest)
+    try:
+        import fcntl
+        ficlone = 0x40049409  # FICLONE ioctl request code, from linux/fs.h
+        with open(source, "rb") as src, open(dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), ficlone, src.fileno())
+        shutil.copystat(source, dest)
+    except (ImportError, OSError):
+        shutil.copy2(source, dest)
+
+
+def clonetree(source: str, dest: str, progress_callback: PROGRESS_CALLBACK = None) -> None:
+    """Clone a folder, preserving symlinks and cloning files with clone_file, and ensure we pass in absolute paths.
+    If a progress_callback is provided, it will be called with the file name and its size for every cloned file."""
+    source = abspath(source)
+    dest = abspath(dest)
+
+    def _clone_file(s: str, d: str) -> None:
+        clone_file(s, d)
+        if progress_callback is not None:
+            progress_callback(s, os.stat(d).st_size)
+    shutil.copytree(source, dest, symlinks=True, copy_function=_clone_file)
 
 
 def copy(source: str, dest: str) -> None:
@@ -42,11 +135,16 @@ def rmtree(target: str) -> None:
     shutil.rmtree(target)
 
 
-def compile_from_template(template_file_content: str, compiled_file: str, settings: Dict) -> None:
-    """Read a template file and compiled it with the provided settings"""
+def render_template(template_file_content: str, settings: Dict) -> str:
+    """Render a template with the provided settings and return the result."""
     from jinja2 import Template
     template = Template(template_file_content)
-    compiled = template.render(settings)
+    return template.render(settings)
+
+
+def compile_from_template(template_file_content: str, compiled_file: str, settings: Dict) -> None:
+    """Read a template file and compiled it with the provided settings"""
+    compiled = render_template(template_file_content, settings)
     with open(compiled_file, "w+") as f:
         f.write(compiled)
 
@@ -55,3 +153,49 @@ def symlink_everything_from_folder(origin: str, target: str, exception: List[str
     """Symlink every file and folder from a 'origin' folder to a 'target' folder. Accept an exception list."""
     for el in filter(lambda x: x not in exception, listdir(origin)):
         symlink(join(origin, el), join(target, el))
+
+
+def is_symlink_to(link_name: str, source: str) -> bool:
+    """Return True if link_name is a symlink pointing to source."""
+    if not os.path.islink(link_name):
+        return False
+    target = os.readlink(link_name)
+    if target.startswith("\\\\?\\"):
+        # windows may return the extended path form
+        target = target[4:]
+    return os.path.normcase(abspath(target)) == os.path.normcase(abspath(source))
+
+
+def sync_overlay(origin: str, target: str, aliases: Dict[str, str] = None) -> List[str]:
+    """Make 'target' a real folder holding a symlink to every file and folder of 'origin', plus the given aliases (alias
+    name -> name of the 'origin' entry to point to). Only the entries that differ get changed: missing links are added,
+    and outdated or unexpected entries are removed. Return the names of the entries that were changed."""
+    if os.path.islink(target) or (os.path.exists(target) and not isdir(target)):
+        os.unlink(target)
+    if not isdir(target):
+        os.mkdir(target)
+    wanted = {name: join(origin, name) for name in listdir(origin)}
+    for alias, name in (aliases or {}).items():
+        if name in wanted and alias not in wanted:
+            wanted[alias] = wanted[name]
+    changed = []
+    with scandir(target) as it:
+        entries = list(it)
+    for entry in entries:
+        if entry.name in wanted and is_symlink_to(entry.path, wanted[entry.name]):
+            del wanted[entry.name]
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
+        changed.append(entry.name)
+    for name, source in wanted.items():
+        symlink(source, join(target, name))
+        if name not in changed:
+            changed.append(name)
+    return changed
+
+
+class InvalidCpuList(Exception):
+    """"""
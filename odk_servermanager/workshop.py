@@ -0,0 +1,247 @@
+import heapq
+import json
+from os import makedirs, replace, scandir, stat
+from os.path import join, isdir, isfile, dirname
+from typing import Dict, List, Set, Tuple
+
+from odk_servermanager.arma_config import get_cfg_patches, parse_mod_cpp, InvalidConfig
+from odk_servermanager.pbo import PboFile, InvalidPbo
+
+
+class WorkshopIndex:
+    """Persistent cache of information about the mods in the !Workshop folder, stored in the __odksm__ folder in the
+    Arma root.
+
+    Every mod record holds its mod.cpp/meta.cpp data and, for every pbo in its addons folder, its prefix, its entries
+    table (names and sizes) and the addons it provides and requires (from its CfgPatches). Records are keyed by file
+    size and modification time, so that only changed files get parsed again.
+    """
+
+    folder_name = "__odksm__"
+    file_name = "workshop_index.json"
+    version = 2
+
+    def __init__(self, arma_folder: str):
+        self.workshop_folder = join(arma_folder, "!Workshop")
+        self.file = join(arma_folder, self.folder_name, self.file_name)
+        self.mods: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+
+    def get_mod(self, mod_name: str) -> Dict:
+        """Return the up to date record of the given mod, parsing again only what changed since the last time."""
+        mod_folder = join(self.workshop_folder, "@" + mod_name)
+        old_record = self.mods.get(mod_name, {})
+        record = {"meta": old_record.get("meta", {}), "meta_signature": old_record.get("meta_signature"),
+                  "pbos": {}}
+        if not isdir(mod_folder):
+            record["meta"] = {}
+            record["meta_signature"] = None
+        else:
+            self._update_meta(mod_folder, record)
+            old_pbos = old_record.get("pbos", {})
+            for entry in self._scan_pbos(mod_folder):
+                signature = [entry.stat().st_size, entry.stat().st_mtime_ns]
+                old_pbo = old_pbos.get(entry.name)
+                if old_pbo is not None and old_pbo["signature"] == signature:
+                    record["pbos"][entry.name] = old_pbo
+                else:
+                    record["pbos"][entry.name] = self._index_pbo(entry.path, signature)
+        if record != old_record:
+            self.mods[mod_name] = record
+            self._dirty = True
+        return record
+
+    def get_mods(self, mods: List[str]) -> Dict[str, Dict]:
+        """Return the up to date records of the given mods."""
+        return {mod: self.get_mod(mod) for mod in mods}
+
+    def get_all_mods(self) -> Dict[str, Dict]:
+        """Return the up to date records of every mod in the !Workshop folder, forgetting the removed ones."""
+        mods = []
+        if isdir(self.workshop_folder):
+            with scandir(self.workshop_folder) as it:
+                mods = [entry.name[1:] for entry in it if entry.name.startswith("@") and entry.is_dir()]
+        for removed in set(self.mods) - set(mods):
+            del self.mods[removed]
+            self._dirty = True
+        return self.get_mods(mods)
+
+    def save(self) -> None:
+        """Persist the index, if anything changed. The index is only a cache, so failing to save it is not an error."""
+        if not self._dirty:
+            return
+        try:
+            makedirs(dirname(self.file), exist_ok=True)
+            tmp_file = self.file + ".tmp"
+            with open(tmp_file, "w+") as f:
+                json.dump({"version": self.version, "mods": self.mods}, f)
+            replace(tmp_file, self.file)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _load(self) -> None:
+        """Load the index from disk, discarding it if unreadable or outdated."""
+        if not isfile(self.file):
+            return
+        try:
+            with open(self.file, "r") as f:
+                data = json.load(f)
+            if data.get("version") == self.version:
+                self.mods = data["mods"]
+        except (OSError, ValueError, KeyError):
+            self.mods = {}
+
+    @staticmethod
+    def _update_meta(mod_folder: str, record: Dict) -> None:
+        """Parse the mod.cpp and meta.cpp files of the mod, if they changed."""
+        signature = []
+        files = []
+        for file_name in ["mod.cpp", "meta.cpp"]:
+            file = join(mod_folder, file_name)
+            if isfile(file):
+                file_stat = stat(file)
+                signature.append([file_name, file_stat.st_size, file_stat.st_mtime_ns])
+                files.append(file)
+        if signature == record["meta_signature"]:
+            return
+        meta = {}
+        for file in files:
+            with open(file, "r", encoding="utf-8", errors="replace") as f:
+                meta.update(parse_mod_cpp(f.read()))
+        record["meta"] = meta
+        record["meta_signature"] = signature
+
+    @staticmethod
+    def _scan_pbos(mod_folder: str) -> List:
+        """Return the DirEntry of every pbo in the addons folder of the mod."""
+        pbos = []
+        with scandir(mod_folder) as it:
+            addons_folders = [entry.path for entry in it if entry.name.lower() == "addons" and entry.is_dir()]
+        for addons_folder in addons_folders:
+            with scandir(addons_folder) as it:
+                pbos += [entry for entry in it if entry.name.lower().endswith(".pbo") and entry.is_file()]
+        return sorted(pbos, key=lambda x: x.name)
+
+    @staticmethod
+    def _index_pbo(pbo_file: str, signature: List[int]) -> Dict:
+        """Parse the pbo header and its configs, recovering the prefix, the entries and the provided and required
+        addons. Only the header and the config entries are actually read from disk."""
+        record = {"signature": signature, "prefix": "", "entries": [], "provided_addons": [], "required_addons": []}
+        try:
+            with PboFile(pbo_file) as pbo:
+                record["prefix"] = pbo.header.prefix
+                record["entries"] = [[entry.name, entry.original_size or entry.data_size]
+                                     for entry in pbo.header.entries]
+                required = set()
+                for config_name in ["config.bin", "config.cpp"]:
+                    for entry in pbo.header.find_entries(config_name):
+                        data = pbo.read_entry(entry)
+                        if data is None:
+                            continue
+                        for addon, required_addons in get_cfg_patches(data).items():
+                            if addon not in record["provided_addons"]:
+                                record["provided_addons"].append(addon)
+                            required.update(required_addons)
+            record["required_addons"] = sorted(required - set(record["provided_addons"]))
+        except (OSError, InvalidPbo, InvalidConfig) as err:
+            record["error"] = str(err)
+        return record
+
+
+def get_provided_addons(record: Dict) -> Set[str]:
+    """Return all addons provided by a mod record."""
+    addons = set()
+    for pbo in record.get("pbos", {}).values():
+        addons.update(pbo.get("provided_addons", []))
+    return addons
+
+
+def get_required_addons(record: Dict) -> Set[str]:
+    """Return all addons required by a mod record and not provided by the mod itself."""
+    addons = set()
+    for pbo in record.get("pbos", {}).values():
+        addons.update(pbo.get("required_addons", []))
+    return addons - get_provided_addons(record)
+
+
+def find_addon_conflicts(records: Dict[str, Dict]) -> List[Tuple[str, str, List[str]]]:
+    """Return every pbo prefix, pbo file name and addon class (ignoring the case) shipped by more than one of the given
+    mods, as (kind, name, mods) tuples. Every name is hashed once, so this is linear in the total number of pbos."""
+    owners: Dict[Tuple[str, str], Dict[str, List[str]]] = {}
+
+    def add(kind: str, name: str, mod: str) -> None:
+        name_owners = owners.setdefault((kind, name.lower()), {"name": name, "mods": []})
+        if mod not in name_owners["mods"][-1:]:
+            name_owners["mods"].append(mod)
+
+    for mod, record in records.items():
+        for pbo_name, pbo in record.get("pbos", {}).items():
+            add("pbo", pbo_name, mod)
+            if pbo.get("prefix", "") != "":
+                add("pbo prefix", pbo["prefix"], mod)
+            for addon in pbo.get("provided_addons", []):
+                add("addon", addon, mod)
+    return [(kind, name_owners["name"], name_owners["mods"]) for (kind, _), name_owners in owners.items()
+            if len(name_owners["mods"]) > 1]
+
+
+class ModDependencyGraph:
+    """Dependency graph between the selected mods, built from their required and provided addons.
+
+    :records: the WorkshopIndex records of the selected mods, optionally of every mod in the !Workshop
+    :selected_mods: the mods that will be loaded by the server
+
+    Addons that no known mod provides are assumed to come from the game itself and are ignored. Addons provided only
+    by a mod that's not selected are collected in missing as (mod, addon, providing mod) tuples.
+    """
+
+    def __init__(self, records: Dict[str, Dict], selected_mods: List[str]):
+        self.dependencies: Dict[str, Set[str]] = {mod: set() for mod in selected_mods}
+        self.missing: List[Tuple[str, str, str]] = []
+        selected = set(selected_mods)
+        providers: Dict[str, List[str]] = {}
+        for mod, record in records.items():
+            for addon in get_provided_addons(record):
+                providers.setdefault(addon.lower(), []).append(mod)
+        for mod in self.dependencies:
+            for addon in sorted(get_required_addons(records.get(mod, {}))):
+                mod_providers = providers.get(addon.lower(), [])
+                if len(mod_providers) == 0 or mod in mod_providers:
+                    continue
+                selected_providers = list(filter(lambda x: x in selected, mod_providers))
+                if len(selected_providers) > 0:
+                    self.dependencies[mod].update(selected_providers)
+                else:
+                    self.missing.append((mod, addon, sorted(mod_providers)[0]))
+
+    def order(self, mods_list: List[str]) -> List[str]:
+        """Return the given mods sorted so that every mod comes after the mods it depends on. The sort is stable: mods
+        without dependencies between them keep their relative order. Mods in a dependency cycle keep their original
+        order after all the others."""
+        position = {}
+        for i, mod in enumerate(mods_list):
+            position.setdefault(mod, i)
+        dependents: Dict[str, List[str]] = {mod: [] for mod in position}
+        pending = {}
+        for mod in position:
+            dependencies = set(filter(lambda x: x in position and x != mod, self.dependencies.get(mod, set())))
+            pending[mod] = len(dependencies)
+            for dependency in dependencies:
+                dependents[dependency].append(mod)
+        if all(count == 0 for count in pending.values()):
+            # nothing to sort
+            return list(mods_list)
+        ready = [position[mod] for mod in position if pending[mod] == 0]
+        heapq.heapify(ready)
+        ordered = []
+        while len(ready) > 0:
+            mod = mods_list[heapq.heappop(ready)]
+            ordered.append(mod)
+            for dependent in dependents[mod]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, position[dependent])
+        done = set(ordered)
+        return ordered + [mod for mod in position if mod not in done]
@@ -13,7 +13,22 @@ def parse_cmdline() -> Dict:
     group.add_argument("-m", "--manage")
     group.add_argument("-b", "--bootstrap")
     group.add_argument("-c", "--config")  # DEPRECATED
+    group.add_argument("--check")
+    group.add_argument("--bulk-config")
+    group.add_argument("--bulk-bootstrap")
+    group.add_argument("--plan")
+    group.add_argument("--supervise")
+    parser.add_argument("--clone-from")
     parser.add_argument("--debug-logs-path")
+    parser.add_argument("--progress-json")
+    parser.add_argument("--repair", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--defaults")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--memory-budget", type=int)
+    parser.add_argument("--apply", action="store_true")
+    parser.add_argument("--server-binary", default="arma3server_x64")
+    parser.add_argument("--max-restarts", type=int)
     settings = parser.parse_args()
     if settings.manage is not None or settings.config is not None:
         # manage was set, so this is a manage op
@@ -23,23 +38,70 @@ def parse_cmdline() -> Dict:
         else:
             opts["config_file"] = abspath(settings.config)
             print("\n [WARN] Deprecated flag '--config' should be replaced with '--manage'.\n\n")
+        if settings.clone_from is not None:
+            opts["base_instance"] = abspath(settings.clone_from)
+    elif settings.check is not None:
+        opts["op"] = "check"
+        opts["config_file"] = abspath(settings.check)
+        opts["repair"] = settings.repair
+    elif settings.bulk_config is not None:
+        opts["op"] = "bulk_config"
+        opts["config_file"] = abspath(settings.bulk_config)
+        if settings.output is None:
+            parser.error("--bulk-config requires --output")
+        opts["output"] = abspath(settings.output)
+        opts["defaults"] = abspath(settings.defaults) if settings.defaults is not None else None
+    elif settings.bulk_bootstrap is not None:
+        opts["op"] = "bulk_bootstrap"
+        opts["config_file"] = abspath(settings.bulk_bootstrap)
+        if settings.defaults is None:
+            parser.error("--bulk-bootstrap requires --defaults")
+        opts["defaults"] = abspath(settings.defaults)
+        opts["workers"] = settings.workers
+    elif settings.plan is not None:
+        opts["op"] = "plan"
+        opts["instances_root"] = abspath(settings.plan)
+        opts["memory_budget"] = settings.memory_budget
+        opts["apply"] = settings.apply
+    elif settings.supervise is not None:
+        opts["op"] = "supervise"
+        opts["config_file"] = abspath(settings.supervise)
+        opts["server_binary"] = settings.server_binary
+        opts["max_restarts"] = settings.max_restarts
     else:
         # bootstrap was set instead
         opts["op"] = "bootstrap"
         opts["config_file"] = abspath(settings.bootstrap)
     opts["debug_logs_path"] = settings.debug_logs_path
+    opts["progress_json"] = abspath(settings.progress_json) if settings.progress_json is not None else None
     return opts
 
 
 def run() -> None:
     """Decide which operation is requested and execute it."""
     settings = parse_cmdline()
+    manager_args = {}
     if settings["debug_logs_path"] is not None:
-        sm = ServerManager(debug_logs_path=settings["debug_logs_path"])
-    else:
-        sm = ServerManager()
+        manager_args["debug_logs_path"] = settings["debug_logs_path"]
+    if settings["progress_json"] is not None:
+        manager_args["progress_json_path"] = settings["progress_json"]
+    sm = ServerManager(**manager_args)
     if settings["op"] == "manage":
-        sm.manage_instance(settings["config_file"])
+        if "base_instance" in settings:
+            sm.manage_instance(settings["config_file"], base_instance=settings["base_instance"])
+        else:
+            sm.manage_instance(settings["config_file"])
+    elif settings["op"] == "check":
+        sm.check_instance(settings["config_file"], repair=settings["repair"])
+    elif settings["op"] == "bulk_config":
+        sm.bulk_create_configs(settings["config_file"], settings["output"], default_config_file=settings["defaults"])
+    elif settings["op"] == "bulk_bootstrap":
+        sm.bulk_bootstrap(settings["config_file"], settings["defaults"], workers=settings["workers"])
+    elif settings["op"] == "plan":
+        sm.plan_instances(settings["instances_root"], memory_budget=settings["memory_budget"], apply=settings["apply"])
+    elif settings["op"] == "supervise":
+        sm.supervise_instance(settings["config_file"], executable=settings["server_binary"],
+                              max_restarts=settings["max_restarts"])
     elif settings["op"] == "bootstrap":
         sm.bootstrap(settings["config_file"])
 
@@ -11,8 +11,7 @@ setup(
         install_requires=[
             'beautifulsoup4>=4.8.2',
             'Jinja2>=2.11.1',
-            'python-box>=4.0.4',
-            "reusables>=0.9.5"
+            'python-box>=4.0.4'
             ],
         extras_require={
             'dev': [
@@ -20,7 +19,11 @@ setup(
                 'pytest-mock>=2.0.0',
                 'pytest-sugar>=0.9.2',
                 'pytest-cov>=2.8.1',
-                'coveralls>=1.11.1'
+                'coveralls>=1.11.1',
+                'pytest-xdist>=1.31.0'
+                ],
+            'fast-hashing': [
+                'xxhash>=1.4.0'
                 ]
             }
         )
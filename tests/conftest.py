@@ -1,32 +1,82 @@
 import os
+import struct
 from os.path import join
 
 import pytest
 import shutil
+import tempfile
 import zipfile
-from typing import Callable, List
+from typing import Callable, Dict, List, Union
 from unittest.mock import patch
 
 from odk_servermanager.settings import ServerBatSettings, ServerConfigSettings
+from synthetic import write_pbo
 
 test_resources = join("tests", "resources")
 test_preset_file_name = join(test_resources, "preset.html")
 test_preset_tofix_file_name = join(test_resources, "preset-tofix.html")
-test_folder_structure_name = join(test_resources, "Arma")
 test_folder_structure_zip = join(test_resources, "folder_structure.zip")
+# set by pytest-xdist: every parallel worker gets its own folder structure
+worker_id = os.getenv("PYTEST_XDIST_WORKER", "")
+
+
+def worker_folder_structure_name(worker: str) -> str:
+    """Return the folder structure used by the given worker (an empty string when not running in parallel)."""
+    return join(test_resources, "Arma" if worker == "" else "Arma_{}".format(worker))
+
+
+test_folder_structure_name = worker_folder_structure_name(worker_id)
+_session_folder: Union[str, None] = None
 
 
 def test_folder_structure_path(): return os.path.abspath(test_folder_structure_name)
 
 
+def _get_session_folder() -> str:
+    """Return a temporary folder that lives until the end of the test session."""
+    global _session_folder
+    if _session_folder is None or not os.path.isdir(_session_folder):
+        _session_folder = tempfile.mkdtemp(prefix="odksm-tests-")
+    return _session_folder
+
+
+def _get_pristine_folder_structure() -> str:
+    """Return the pristine folder structure, extracting the zip only the first time in the session."""
+    template = join(_get_session_folder(), "template")
+    if not os.path.isdir(join(template, "Arma")):
+        with zipfile.ZipFile(test_folder_structure_zip, 'r') as zip_ref:
+            zip_ref.extractall(template)
+    return join(template, "Arma")
+
+
 def _reset_folder_structure():
     """Reset the folder structure to test on"""
     # Delete the old folder if present
     if os.path.isdir(test_folder_structure_name):
         shutil.rmtree(test_folder_structure_name, ignore_errors=True)
-    # Extract a pristine folder structure
-    with zipfile.ZipFile(test_folder_structure_zip, 'r') as zip_ref:
-        zip_ref.extractall("./" + test_resources)
+    # Copy the pristine folder structure
+    shutil.copytree(_get_pristine_folder_structure(), test_folder_structure_name, symlinks=True)
+
+
+def worker_resource(file_name: str) -> str:
+    """Return the path of a resource file pointing to the folder structure. When running in parallel, that's a copy
+    of the file pointing to the folder structure of this worker."""
+    resource = join(test_resources, file_name)
+    if worker_id == "":
+        return resource
+    worker_file = join(_get_session_folder(), file_name)
+    if not os.path.isfile(worker_file):
+        with open(resource, "r") as f:
+            content = f.read()
+        with open(worker_file, "w+") as f:
+            f.write(content.replace("tests/resources/Arma", test_folder_structure_name.replace(os.sep, "/")))
+    return worker_file
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Delete the session temporary folder."""
+    if _session_folder is not None:
+        shutil.rmtree(_session_folder, ignore_errors=True)
 
 
 @pytest.fixture()
@@ -63,6 +113,45 @@ def touch(file_name: str, content: str = "") -> None:
         f.write(content)
 
 
+def make_pbo(file_name: str, entries: Dict[str, bytes], properties: Dict[str, str] = None) -> None:
+    """Helper function to write an uncompressed pbo with the given entries and header properties."""
+    write_pbo(file_name, entries, properties)
+
+
+def make_rapified_cfg_patches(patches: Dict[str, List[str]]) -> bytes:
+    """Helper function to build a rapified config.bin containing only the given CfgPatches."""
+    def asciiz(text: str) -> bytes:
+        return text.encode() + b"\0"
+    # root body: no parent, one class entry pointing to CfgPatches
+    root_size = 1 + 1 + 1 + len(asciiz("CfgPatches")) + 4
+    cfg_patches_offset = 16 + root_size
+    cfg_patches_size = 1 + 1 + sum(1 + len(asciiz(name)) + 4 for name in patches)
+    addon_bodies = []
+    addon_offsets = []
+    offset = cfg_patches_offset + cfg_patches_size
+    for required in patches.values():
+        body = b"\0" + bytes([1]) + b"\x02" + asciiz("requiredAddons") + bytes([len(required)])
+        body += b"".join(b"\0" + asciiz(addon) for addon in required)
+        addon_offsets.append(offset)
+        addon_bodies.append(body)
+        offset += len(body)
+    data = b"\0raP" + struct.pack("<3I", 0, 8, offset)
+    data += b"\0" + bytes([1]) + b"\0" + asciiz("CfgPatches") + struct.pack("<I", cfg_patches_offset)
+    data += b"\0" + bytes([len(patches)])
+    for name, addon_offset in zip(patches, addon_offsets):
+        data += b"\0" + asciiz(name) + struct.pack("<I", addon_offset)
+    return data + b"".join(addon_bodies)
+
+
+def make_rapified_mission(addons: List[str]) -> bytes:
+    """Helper function to build a rapified mission.sqm containing only the given addons list."""
+    def asciiz(text: str) -> bytes:
+        return text.encode() + b"\0"
+    body = b"\0" + bytes([1]) + b"\x02" + asciiz("addons") + bytes([len(addons)])
+    body += b"".join(b"\0" + asciiz(addon) for addon in addons)
+    return b"\0raP" + struct.pack("<3I", 0, 8, 16 + len(body)) + body
+
+
 @pytest.fixture()
 def assert_requires_arguments():
     """Helper fixture for asserting function argument requirements"""
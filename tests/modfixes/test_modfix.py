@@ -1,11 +1,15 @@
+from os import mkdir
+from os.path import join
 from typing import Callable, List
 
 import pytest
 
 from conftest import test_folder_structure_path
 from odksm_test import ODKSMTest
-from odk_servermanager.modfix import ModFix, register_fixes, NonExistingFixFile, MisconfiguredModFix, ErrorInModFix
+from odk_servermanager.modfix import ModFix, ModFixDispatcher, ModFixRegistry, get_registry, register_fixes, \
+    NonExistingFixFile, MisconfiguredModFix, ErrorInModFix
 from odk_servermanager.modfix.cba_a3 import ModFixCBA
+from odk_servermanager.scheduler import HookResources
 from odk_servermanager.settings import ServerInstanceSettings, ModFixSettings
 from odk_servermanager.instance import ServerInstance
 
@@ -53,6 +57,60 @@ class TestAModFix(ODKSMTest):
             register_fixes(["cba_a3"])
 
 
+class TestAModFixRegistry(ODKSMTest):
+    """Test: A ModFix Registry..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestAModFixRegistry setup"""
+        request.cls.plugins_folder = join(test_folder_structure_path(), "plugins")
+        mkdir(self.plugins_folder)
+        with open(join(self.plugins_folder, "my_fix.py"), "w+") as f:
+            f.write("from odk_servermanager.modfix import ModFix\n\n\n"
+                    "class MyFix(ModFix):\n    name = 'my_mod'\n\n\nto_be_registered = MyFix()\n")
+        get_registry.cache_clear()
+        yield
+        get_registry.cache_clear()
+
+    def test_should_be_built_only_once_per_plugins_folder(self):
+        """A ModFix registry should be built only once per plugins folder."""
+        assert get_registry() is get_registry()
+        assert get_registry(self.plugins_folder) is get_registry(self.plugins_folder)
+        assert get_registry() is not get_registry(self.plugins_folder)
+
+    def test_should_find_the_built_in_fixes_without_importing_them(self):
+        """A ModFix registry should find the built-in fixes without importing them."""
+        registry = ModFixRegistry()
+        assert registry.sources["gos"] == ("module", "odk_servermanager.modfix.gos")
+        assert "modfix" not in registry.sources and "__init__" not in registry.sources
+
+    def test_should_load_fixes_from_the_plugins_folder(self):
+        """A ModFix registry should load fixes from the plugins folder."""
+        registry = ModFixRegistry(self.plugins_folder)
+        assert registry.sources["my_fix"][0] == "file"
+        assert len(registry._plugin_modules) == 0
+        fix = registry.load("my_fix")
+        assert isinstance(fix, ModFix) and fix.name == "my_mod"
+        assert registry.load("my_fix") is fix
+        assert register_fixes(["cba_a3", "my_fix"], plugins_folder=self.plugins_folder)[1].name == "my_mod"
+        with pytest.raises(NonExistingFixFile):
+            register_fixes(["my_fix"])
+
+    def test_should_load_fixes_from_entry_points(self, mocker):
+        """A ModFix registry should load fixes from entry points."""
+        fix = ModFix()
+        entry_point = mocker.Mock()
+        entry_point.name = "external_fix"
+        entry_point.load.return_value = fix
+        iter_entry_points = mocker.patch("pkg_resources.iter_entry_points", return_value=[entry_point])
+        assert register_fixes(["external_fix"]) == [fix]
+        register_fixes(["external_fix"])
+        iter_entry_points.assert_called_once_with("odk_servermanager.modfix")
+        entry_point.load.side_effect = Exception
+        with pytest.raises(MisconfiguredModFix):
+            register_fixes(["external_fix"])
+
+
 class TestAServerInstance(ODKSMTest):
     """Test: A Server Instance ..."""
 
@@ -106,6 +164,85 @@ class TestAServerInstance(ODKSMTest):
         with pytest.raises(ErrorInModFix):
             self.instance._apply_hooks_and_do_op(stage, operation, mod_name)
 
+    def test_should_chain_the_hooks_of_every_fix_applying_to_a_mod(self, mocker):
+        """A server instance should chain the hooks of every fix applying to a mod."""
+        calls = []
+
+        class FirstModFix(ModFix):
+            name = "CBA_A3"
+
+            def hook_init_copy_pre(self, server_instance, call_data):
+                calls.append("first_pre")
+
+            def hook_init_copy_post(self, server_instance, call_data):
+                calls.append("first_post")
+
+        class SecondModFix(ModFix):
+            name = "CBA_A3"
+
+            def hook_init_copy_pre(self, server_instance, call_data):
+                calls.append("second_pre")
+
+            def hook_init_copy_replace(self, server_instance, call_data):
+                calls.append("second_replace")
+
+            def hook_init_copy_post(self, server_instance, call_data):
+                calls.append("second_post")
+
+        class ThirdModFix(ModFix):
+            name = "CBA_A3"
+
+            def hook_init_copy_replace(self, server_instance, call_data):
+                calls.append("third_replace")
+        default_op = mocker.patch.object(self.instance, "_do_default_op")
+        self.instance.registered_fix = [FirstModFix(), SecondModFix(), ThirdModFix()]
+        self.instance._apply_hooks_and_do_op("init", "copy", "CBA_A3")
+        assert calls == ["first_pre", "second_pre", "second_replace", "first_post", "second_post"]
+        default_op.assert_not_called()
+
+    def test_should_declare_the_paths_touched_by_its_hooks(self, monkeypatch):
+        """A server instance should declare the paths touched by its hooks."""
+        class UnsafeModFix(ModFix):
+            name = "CBA_A3"
+
+            def hook_init_link_post(self, server_instance, call_data):
+                pass
+        self.instance.registered_fix = [UnsafeModFix()]
+        resources = self.instance._get_mod_op_resources("init", "link", "CBA_A3")
+        assert not resources.thread_safe and resources.conflicts_with(
+            self.instance._get_mod_op_resources("init", "link", "ace"))
+        self.instance.registered_fix = [ModFixCBA()]
+        monkeypatch.setitem(self.instance.S.fix_settings.mod_fix_settings, "cba_settings",
+                            join(self.test_path, "cba_settings.sqf"))
+        resources = self.instance._get_mod_op_resources("init", "link", "CBA_A3")
+        assert resources.thread_safe
+        assert not resources.conflicts_with(self.instance._get_mod_op_resources("init", "link", "ace"))
+        assert resources.conflicts_with(HookResources(
+            writes=[join(self.instance.get_server_instance_path(), "userconfig")]))
+
+
+class TestAModFixDispatcher(ODKSMTest):
+    """Test: A ModFix Dispatcher..."""
+
+    def test_should_resolve_the_hooks_of_a_mod_only_once(self, mocker):
+        """A ModFix dispatcher should resolve the hooks of a mod only once."""
+        class ModFixTest(ModFix):
+            name = "ace"
+
+            def hook_update_link_post(self, server_instance, call_data):
+                pass
+        fix = ModFixTest()
+        does_apply = mocker.patch.object(fix, "does_apply_to_mod", side_effect=fix.does_apply_to_mod)
+        dispatcher = ModFixDispatcher([fix])
+        for stage in ["init", "update"]:
+            for operation in ["copy", "link"]:
+                dispatcher.get_hooks("ace", stage, operation)
+        does_apply.assert_called_once_with("ace")
+        pre, replace, post = dispatcher.get_hooks("ace", "update", "link")
+        assert pre == [] and replace is None and len(post) == 1
+        assert dispatcher.get_hooks("CBA_A3", "update", "link") == ([], None, [])
+        assert dispatcher.get_fixes("ace") == [fix]
+
 
 class TestACopyModFix(ODKSMTest):
     """Test: ACopyModFix..."""
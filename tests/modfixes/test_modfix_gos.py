@@ -1,3 +1,4 @@
+from os import lstat
 from os.path import islink, join
 
 import pytest
@@ -47,3 +48,11 @@ class TestAModfixGos(ODKSMTest):
         self.instance._clear_keys()
         self.instance._link_keys()
         assert islink(join(self.instance.get_server_instance_path(), "Keys", "GOSMAKHNO.bikey"))
+
+    def test_should_update_the_overlay_without_rebuilding_it(self):
+        """A modfix gos should update the overlay without rebuilding it."""
+        keys_link = join(self.moda_folder, "PublicKey_GOS_Makhno")
+        inode = lstat(keys_link).st_ino
+        self.instance._start_op_on_mods("update", ["G.O.S Dariyah"])
+        assert lstat(keys_link).st_ino == inode
+        assert islink(join(self.moda_folder, "Keys"))
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Stand-in for the Arma 3 Linux dedicated server, used to test the supervisor. It prints its arguments and its
+limits, then behaves as told by the ODKSM_STUB_* environment variables."""
+import os
+import sys
+import time
+
+print("args: {}".format(" ".join(sys.argv[1:])))
+if hasattr(os, "sched_getaffinity"):
+    print("affinity: {}".format(",".join(str(x) for x in sorted(os.sched_getaffinity(0)))))
+if os.name == "posix":
+    import resource
+    print("data limit: {}".format(resource.getrlimit(resource.RLIMIT_DATA)[0]))
+for i in range(int(os.environ.get("ODKSM_STUB_LINES", "0"))):
+    print("line {:06d} of the stub server output".format(i))
+sys.stdout.flush()
+time.sleep(float(os.environ.get("ODKSM_STUB_SLEEP", "0")))
+sys.exit(int(os.environ.get("ODKSM_STUB_EXIT_CODE", "0")))
@@ -0,0 +1,158 @@
+"""Generator of synthetic Arma 3 roots, shaped like the production ones (hundreds of mods, tens of thousands of files,
+every keys folder layout), to be used by scale tests and benchmarks."""
+import os
+import struct
+from os.path import join
+from typing import Dict, List
+
+KEY_LAYOUTS = ["Keys", "keys", "key", "PublicKey_GOS_Makhno"]
+ARMA_KEYS = ["a3.bikey", "a3c.bikey", "gm.bikey"]
+
+
+def write_pbo(file_name: str, entries: Dict[str, bytes], properties: Dict[str, str] = None, size: int = 0) -> None:
+    """Write an uncompressed pbo with the given entries and header properties. If size is bigger than the pbo, the
+    file gets extended to it with a sparse hole, so that big pbos cost no disk space."""
+    header = b""
+    if properties is not None:
+        header += b"\0" + struct.pack("<5I", 0x56657273, 0, 0, 0, 0)
+        for key, value in properties.items():
+            header += key.encode() + b"\0" + value.encode() + b"\0"
+        header += b"\0"
+    for name, data in entries.items():
+        header += name.encode() + b"\0" + struct.pack("<5I", 0, len(data), 0, 0, len(data))
+    header += b"\0" + struct.pack("<5I", 0, 0, 0, 0, 0)
+    with open(file_name, "wb") as f:
+        f.write(header + b"".join(entries.values()) + b"\0" + bytes(20))
+        if size > f.tell():
+            f.truncate(size)
+
+
+def write_key(file_name: str, authority: str) -> None:
+    """Write a fake .bikey or .bisign file: only the authority name at its start is meaningful."""
+    with open(file_name, "wb") as f:
+        f.write(authority.encode() + b"\0" + bytes(64))
+
+
+def write_preset(file_name: str, mods: List[str], preset_name: str = "Synthetic") -> None:
+    """Write an Arma 3 launcher preset selecting the given mods."""
+    rows = "".join('        <tr data-type="ModContainer">\n'
+                   '          <td data-type="DisplayName">{}</td>\n'
+                   '          <td><span class="from-steam">Steam</span></td>\n'
+                   '        </tr>\n'.format(mod) for mod in mods)
+    with open(file_name, "w+", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<html>\n  <head>\n'
+                '    <meta name="arma:Type" content="preset" />\n'
+                '    <meta name="arma:PresetName" content="{}" />\n  </head>\n  <body>\n'
+                '    <div class="mod-list">\n      <table>\n{}      </table>\n    </div>\n  </body>\n</html>\n'
+                .format(preset_name, rows))
+
+
+class SyntheticMod:
+    """A mod in a synthetic !Workshop.
+
+    :name: the mod name, without the leading @
+    :folder: the mod folder
+    :key_layout: the name of its keys folder
+    :authority: the authority of its key
+    :addons: the CfgPatches classes its pbos provide, one per pbo
+    :files_count: the number of files in the mod
+    """
+
+    __slots__ = ("name", "folder", "key_layout", "authority", "addons", "files_count")
+
+    def __init__(self, name: str, folder: str, key_layout: str, authority: str):
+        self.name = name
+        self.folder = folder
+        self.key_layout = key_layout
+        self.authority = authority
+        self.addons: List[str] = []
+        self.files_count = 0
+
+
+class SyntheticArma:
+    """A synthetic Arma 3 root.
+
+    :root: the Arma root folder
+    :mods: every mod in its !Workshop
+    """
+
+    def __init__(self, root: str, mods: List[SyntheticMod]):
+        self.root = root
+        self.mods = mods
+
+    @property
+    def mods_names(self) -> List[str]:
+        """Return the names of all mods."""
+        return [mod.name for mod in self.mods]
+
+    @property
+    def files_count(self) -> int:
+        """Return the number of files in the !Workshop."""
+        return sum(mod.files_count for mod in self.mods)
+
+    def write_preset(self, file_name: str, mods: List[str] = None) -> None:
+        """Write an Arma 3 launcher preset selecting the given mods, or all of them."""
+        write_preset(file_name, mods if mods is not None else self.mods_names)
+
+
+def build_arma_root(root: str, mods_count: int = 10, pbos_per_mod: int = 3, files_per_mod: int = 10, depth: int = 2,
+                    pbo_size: int = 0, key_layouts: List[str] = None, signed: bool = True,
+                    chained: bool = False, name_prefix: str = "Synthetic Mod") -> SyntheticArma:
+    """Build a synthetic Arma 3 root in the given (not yet existing) folder.
+
+    Every mod gets a mod.cpp, pbos_per_mod pbos (with a config.cpp declaring one CfgPatches class each, optionally
+    padded to pbo_size bytes with a sparse hole), their .bisign files if signed, a key in a keys folder (cycling
+    through key_layouts) and files_per_mod other files, spread in folders depth levels deep. If chained, every mod
+    requires an addon of the previous one.
+    """
+    key_layouts = key_layouts if key_layouts is not None else KEY_LAYOUTS
+    workshop = join(root, "!Workshop")
+    os.makedirs(join(workshop, "!DO_NOT_CHANGE_FILES_IN_THESE_FOLDERS"))
+    os.makedirs(join(root, "Keys"))
+    for key in ARMA_KEYS:
+        write_key(join(root, "Keys", key), key.split(".")[0])
+    os.makedirs(join(root, "userconfig"))
+    with open(join(root, "arma3server_x64.exe"), "wb"):
+        pass
+    mods = []
+    previous_addon = None
+    for i in range(mods_count):
+        name = "{} {:04d}".format(name_prefix, i)
+        mod = SyntheticMod(name, join(workshop, "@" + name), key_layouts[i % len(key_layouts)],
+                           "synthetic_{:04d}".format(i))
+        _build_mod(mod, pbos_per_mod, files_per_mod, depth, pbo_size, signed,
+                   previous_addon if chained else None)
+        previous_addon = mod.addons[-1] if len(mod.addons) > 0 else previous_addon
+        mods.append(mod)
+    return SyntheticArma(root, mods)
+
+
+def _build_mod(mod: SyntheticMod, pbos_count: int, files_count: int, depth: int, pbo_size: int, signed: bool,
+               required_addon: str = None) -> None:
+    """Write every file of a synthetic mod."""
+    addons_folder = join(mod.folder, "addons")
+    keys_folder = join(mod.folder, mod.key_layout)
+    os.makedirs(addons_folder)
+    os.makedirs(keys_folder)
+    with open(join(mod.folder, "mod.cpp"), "w+") as f:
+        f.write('name = "{}";\n'.format(mod.name))
+    write_key(join(keys_folder, "{}.bikey".format(mod.authority)), mod.authority)
+    mod.files_count = 2
+    slug = mod.authority
+    for i in range(pbos_count):
+        addon = "{}_addon_{}".format(slug, i)
+        required = "\"{}\"".format(required_addon) if required_addon is not None else ""
+        config = "class CfgPatches {{ class {} {{ requiredAddons[] = {{{}}}; }}; }};".format(addon, required)
+        pbo_name = "{}.pbo".format(addon)
+        write_pbo(join(addons_folder, pbo_name), {"config.cpp": config.encode()}, {"prefix": addon}, pbo_size)
+        mod.addons.append(addon)
+        mod.files_count += 1
+        if signed:
+            write_key(join(addons_folder, "{}.{}.bisign".format(pbo_name, mod.authority)), mod.authority)
+            mod.files_count += 1
+    for i in range(files_count):
+        folder = join(mod.folder, "data", *["level{}".format(level) for level in range(i % (depth + 1))])
+        os.makedirs(folder, exist_ok=True)
+        with open(join(folder, "file_{:05d}.paa".format(i)), "wb") as f:
+            f.write(bytes(16))
+        mod.files_count += 1
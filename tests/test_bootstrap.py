@@ -0,0 +1,73 @@
+import json
+from os import mkdir
+from os.path import join
+
+import pytest
+
+from conftest import test_folder_structure_path, touch
+from odk_servermanager.bootstrap import BootstrapManifest, BootstrapEntry, InvalidManifest
+from odksm_test import ODKSMTest
+
+
+class TestABootstrapManifest(ODKSMTest):
+    """Test: A bootstrap manifest..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestABootstrapManifest setup"""
+        request.cls.test_path = test_folder_structure_path()
+        request.cls.default_data = {"bat": {"server_port": "", "server_max_mem": "8192"}, "ODKSM": {}, "config": {}}
+
+    def test_should_read_a_csv_file(self):
+        """A bootstrap manifest should read a csv file."""
+        manifest_file = join(self.test_path, "manifest.csv")
+        touch(manifest_file, "name,port,preset,bat_template,hostname,config.password\n"
+                             "event1,2302,preset.html,y,Event One,secret\n,,,,,\nevent2,2312,,n,,\n")
+        manifest = BootstrapManifest.read_file(manifest_file)
+        assert [x.name for x in manifest.entries] == ["event1", "event2"]
+        first = manifest.entries[0]
+        assert first.port == "2302" and first.bat_template and not first.config_template
+        assert first.preset == join(self.test_path, "preset.html")
+        assert first.entries == {"hostname": "Event One", "config.password": "secret"}
+        assert manifest.entries[1].entries == {}
+
+    def test_should_read_a_json_file(self):
+        """A bootstrap manifest should read a json file."""
+        manifest_file = join(self.test_path, "manifest.json")
+        touch(manifest_file, json.dumps([{"name": "event1", "port": 2302, "config_template": True,
+                                          "user_mods_list": ["ace", "CBA_A3"]}]))
+        entry = BootstrapManifest.read_file(manifest_file).entries[0]
+        assert entry.port == "2302" and entry.config_template
+        data = entry.get_config_data(self.default_data)
+        assert data["ODKSM"]["user_mods_list"] == "ace, CBA_A3" and data["bat"]["server_port"] == "2302"
+        assert self.default_data["bat"]["server_port"] == ""
+        touch(manifest_file, json.dumps({"name": "event1"}))
+        with pytest.raises(InvalidManifest):
+            BootstrapManifest.read_file(manifest_file)
+
+    def test_should_report_every_problem_at_once(self):
+        """A bootstrap manifest should report every problem at once."""
+        mkdir(join(self.test_path, "existing"))
+        manifest = BootstrapManifest([
+            BootstrapEntry("event1", "2302"),
+            BootstrapEntry("event1", "2402"),
+            BootstrapEntry("", "2502"),
+            BootstrapEntry("existing", "2602"),
+            BootstrapEntry("event2", "2602", entries={"not_an_entry": "1"}),
+            BootstrapEntry("event3", "2306"),
+            BootstrapEntry("event4", "not_a_port"),
+            BootstrapEntry("event5", "2702", preset=join(self.test_path, "missing.html")),
+        ])
+        errors = manifest.validate(self.test_path, self.default_data)
+        assert len(errors) == 8
+        assert "repeated" in errors[0] and "no name" in errors[1] and "already present" in errors[2]
+        assert "'not_an_entry'" in errors[3] and "collide" in errors[4] and "'existing'" in errors[4]
+        assert "collide" in errors[5] and "'event1'" in errors[5] and "no valid port" in errors[6]
+        assert "preset" in errors[7]
+
+    def test_should_fall_back_to_the_default_port(self):
+        """A bootstrap manifest should fall back to the default port."""
+        manifest = BootstrapManifest([BootstrapEntry("event1"), BootstrapEntry("event2")])
+        self.default_data["bat"]["server_port"] = "2302"
+        errors = manifest.validate(self.test_path, self.default_data)
+        assert len(errors) == 1 and "collide" in errors[0]
@@ -2,8 +2,8 @@ from os.path import join, isfile
 
 import pytest
 
-from conftest import test_resources, test_folder_structure_path
-from odk_servermanager.config_ini import ConfigIni
+from conftest import test_resources, test_folder_structure_path, touch
+from odk_servermanager.config_ini import ConfigIni, MissingConfigSection, split_list, UnknownConfigEntry
 from odksm_test import ODKSMTest
 
 
@@ -114,3 +114,79 @@ class TestAConfigIni(ODKSMTest):
         bootstrap_file = join(test_resources, "bootstrap.ini")
         data = ConfigIni.read_file(bootstrap_file, bootstrap=True)
         assert data["bootstrap"]["instances_root"] == "tests/resources/Arma"
+
+    def test_should_load_the_sections_into_a_slotted_container(self):
+        """A config ini should load the sections into a slotted container."""
+        parsed = ConfigIni.load(join(test_resources, "config.ini"))
+        assert parsed.bat["server_title"] == "TEST SERVER"
+        assert parsed.bootstrap is None
+        with pytest.raises(AttributeError):
+            parsed.something_else = True
+
+    def test_should_complain_about_missing_sections(self, reset_folder_structure):
+        """A config ini should complain about missing sections."""
+        config_file = join(self.test_path, "broken.ini")
+        touch(config_file, "[odksm]\nuser_mods_list = ace\n[BAT]\n[config]\n")
+        with pytest.raises(MissingConfigSection):
+            ConfigIni.read_file(config_file)
+        touch(config_file, "[odksm]\nuser_mods_list = ace\n[BAT]\n[config]\n[mod_fix_settings]\n")
+        assert ConfigIni.read_file(config_file)["ODKSM"]["user_mods_list"] == ["ace"]
+
+    def test_should_split_lists_like_the_old_parser(self):
+        """A config ini should split lists like the old parser."""
+        assert split_list("[ace, CBA_A3 ,, Mod, With Spaces]") == ["ace", "CBA_A3", "Mod", "With Spaces"]
+        assert split_list("") == []
+
+    def test_should_not_leak_content_between_files(self, reset_folder_structure):
+        """A config ini should not leak content between files."""
+        config_ini = ConfigIni()
+        first = join(self.test_path, "first.ini")
+        second = join(self.test_path, "second.ini")
+        config_ini.create_file(first, {"ODKSM": {"server_instance_name": "first"}}, add_comments=False)
+        config_ini.create_file(second, {"ODKSM": {"server_instance_name": "second"}}, add_comments=False)
+        with open(second, "r") as f:
+            content = f.read()
+        assert "server_instance_name = second" in content and "first" not in content
+        assert content.count("[ODKSM]") == 1
+
+    def test_should_parse_the_config_structure_only_once(self, mocker):
+        """A config ini should parse the config structure only once."""
+        ConfigIni._get_config_structure()
+        resource_string = mocker.patch("pkg_resources.resource_string")
+        for _ in range(3):
+            ConfigIni().render({"config": {"hostname": "test"}})
+        resource_string.assert_not_called()
+
+    def test_should_read_the_data_of_many_config_files_from_a_csv(self, reset_folder_structure):
+        """A config ini should read the data of many config files from a csv."""
+        csv_file = join(self.test_path, "events.csv")
+        touch(csv_file, "server_instance_name,config.hostname,server_port,user_mods_list\n"
+                        "event1,Event One,2302,\"ace, CBA_A3\"\n\n"
+                        "event2,Event Two,,\n")
+        rows = ConfigIni.read_csv(csv_file, {"bat": {"server_port": "2202"}})
+        assert len(rows) == 2
+        assert rows[0]["ODKSM"] == {"server_instance_name": "event1", "user_mods_list": "ace, CBA_A3"}
+        assert rows[0]["config"]["hostname"] == "Event One" and rows[0]["bat"]["server_port"] == "2302"
+        assert rows[1]["bat"]["server_port"] == "2202"
+        config_file = join(self.test_path, "event1.ini")
+        ConfigIni().create_file(config_file, rows[0])
+        assert ConfigIni.read_file(config_file)["ODKSM"]["user_mods_list"] == ["ace", "CBA_A3"]
+        touch(csv_file, "server_instance_name,not_an_entry\nevent1,1\n")
+        with pytest.raises(UnknownConfigEntry):
+            ConfigIni.read_csv(csv_file)
+
+    def test_should_update_an_existing_file_in_place(self, reset_folder_structure):
+        """A config ini should update an existing file in place."""
+        config_file = join(self.test_path, "update.ini")
+        ConfigIni().create_file(config_file, {"bat": {"server_port": "2302"}, "config": {"hostname": "test"}})
+        ConfigIni.update_file(config_file, {"bat": {"server_port": "2402", "server_max_mem": "4096"},
+                                            "ODKSM": {"not_in_the_structure": "1"}})
+        with open(config_file, "r") as f:
+            content = f.read()
+        assert "server_port = 2402" in content and "2302" not in content
+        assert "server_max_mem = 4096" in content and ";server_max_mem" not in content
+        assert ";; " in content
+        data = ConfigIni.read_file(config_file)
+        assert data["config"]["hostname"] == "test" and data["ODKSM"]["not_in_the_structure"] == "1"
+        with pytest.raises(MissingConfigSection):
+            ConfigIni.update_file(config_file, {"not_a_section": {"a": "b"}})
@@ -1,6 +1,8 @@
-from conftest import _reset_folder_structure, test_folder_structure_name
+from conftest import _reset_folder_structure, test_folder_structure_name, worker_folder_structure_name, worker_resource
 import os
 import shutil
+from os.path import join
+from unittest.mock import patch
 
 
 class TestFolderStructureReset:
@@ -15,8 +17,21 @@ class TestFolderStructureReset:
     def test_should_reset_the_structure_if_already_there(self):
         # ensure there's a folder structure to begin with
         _reset_folder_structure()
-        testfile = "tests/resources/Arma/testfile.txt"
+        testfile = join(test_folder_structure_name, "testfile.txt")
         with open(testfile, "w+") as f:
             f.write("Hello there!")
         _reset_folder_structure()
         assert not os.path.isfile(testfile)
+
+    def test_should_extract_the_zip_only_once(self):
+        _reset_folder_structure()
+        with patch("zipfile.ZipFile") as zip_file:
+            _reset_folder_structure()
+        zip_file.assert_not_called()
+        assert os.path.isdir(join(test_folder_structure_name, "!Workshop"))
+
+    def test_should_give_every_parallel_worker_its_own_structure(self):
+        assert worker_folder_structure_name("") == join("tests", "resources", "Arma")
+        assert worker_folder_structure_name("gw1") == join("tests", "resources", "Arma_gw1")
+        with open(worker_resource("config.ini"), "r") as f:
+            assert "arma_folder = {}\n".format(test_folder_structure_name.replace(os.sep, "/")) in f.read()
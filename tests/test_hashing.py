@@ -0,0 +1,76 @@
+import hashlib
+import zlib
+from os import mkdir, utime, stat
+from os.path import join
+from unittest.mock import patch
+
+import pytest
+
+from conftest import test_folder_structure_path, touch
+from odksm_test import ODKSMTest
+from odk_servermanager.hashing import TreeHasher, hash_file, UnsupportedHashAlgorithm
+
+
+class TestTheHashFileFunction(ODKSMTest):
+    """Test: The hash file function..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestTheHashFileFunction setup"""
+        request.cls.file = join(test_folder_structure_path(), "data.bin")
+        request.cls.content = bytes(range(256)) * 1000
+        with open(self.file, "wb") as f:
+            f.write(self.content)
+
+    def test_should_compute_sha256_and_crc32_digests(self):
+        """The hash file function should compute sha256 and crc32 digests."""
+        assert hash_file(self.file) == hashlib.sha256(self.content).hexdigest()
+        assert hash_file(self.file, "crc32") == "{:08x}".format(zlib.crc32(self.content))
+
+    def test_should_give_the_same_digest_when_memory_mapping_big_files(self):
+        """The hash file function should give the same digest when memory mapping big files."""
+        assert hash_file(self.file, chunk_size=4096) == hashlib.sha256(self.content).hexdigest()
+
+    def test_should_refuse_unknown_algorithms(self):
+        """The hash file function should refuse unknown algorithms."""
+        with pytest.raises(UnsupportedHashAlgorithm):
+            hash_file(self.file, "md4")
+
+
+class TestATreeHasher(ODKSMTest):
+    """Test: A tree hasher..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestATreeHasher setup"""
+        request.cls.test_path = test_folder_structure_path()
+        request.cls.mod_folder = join(self.test_path, "!Workshop", "@CBA_A3")
+        request.cls.cache_file = join(self.test_path, "__odksm__", "hash_cache.json")
+        mkdir(join(self.mod_folder, "addons"))
+        for i in range(4):
+            touch(join(self.mod_folder, "addons", "cba_{}.pbo".format(i)), "pbo content {}".format(i))
+
+    def test_should_hash_every_file_in_the_tree(self):
+        """A tree hasher should hash every file in the tree."""
+        hashes = TreeHasher(max_workers=1).hash_tree(self.mod_folder)
+        assert hashes["addons/cba_1.pbo"] == hashlib.sha256(b"pbo content 1").hexdigest()
+        assert "keys/cba_3.14.0.200207.bikey" in hashes and len(hashes) == 6
+
+    def test_should_only_rehash_changed_files_across_runs(self):
+        """A tree hasher should only rehash changed files across runs."""
+        hasher = TreeHasher(cache_file=self.cache_file, max_workers=1)
+        digest = hasher.hash_tree_digest(self.mod_folder)
+        hasher.save()
+        changed_file = join(self.mod_folder, "addons", "cba_2.pbo")
+        touch(changed_file, "new pbo content")
+        utime(changed_file, ns=(stat(changed_file).st_atime_ns, stat(changed_file).st_mtime_ns + 10 ** 9))
+        hasher = TreeHasher(cache_file=self.cache_file, max_workers=1)
+        with patch("odk_servermanager.hashing.hash_file", wraps=hash_file) as hash_file_fun:
+            assert hasher.hash_tree_digest(self.mod_folder) != digest
+        hash_file_fun.assert_called_once_with(changed_file, "sha256")
+
+    def test_should_give_the_same_results_with_a_process_pool(self):
+        """A tree hasher should give the same results with a process pool."""
+        serial = TreeHasher(algorithm="crc32", max_workers=1).hash_tree(self.mod_folder)
+        parallel = TreeHasher(algorithm="crc32", max_workers=2, min_parallel_bytes=0).hash_tree(self.mod_folder)
+        assert serial == parallel
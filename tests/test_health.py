@@ -0,0 +1,71 @@
+from os import remove, unlink, rename
+from os.path import join, islink, isdir
+
+import pytest
+
+from conftest import test_folder_structure_path, touch
+from odksm_test import ODKSMTest
+from odk_servermanager.health import InstanceHealthChecker
+from odk_servermanager.instance import ServerInstance
+from odk_servermanager.settings import ServerInstanceSettings
+
+
+class TestAnInstanceHealthChecker(ODKSMTest):
+    """Test: An instance health checker..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure, sc_stub, sb_stub):
+        """TestAnInstanceHealthChecker setup"""
+        request.cls.test_path = test_folder_structure_path()
+        settings = ServerInstanceSettings("TestServer1", sb_stub, sc_stub,
+                                          arma_folder=self.test_path, server_instance_root=self.test_path,
+                                          mods_to_be_copied=["CBA_A3"], user_mods_list=["ace", "CBA_A3"],
+                                          server_mods_list=["ODKMIN"])
+        request.cls.instance = ServerInstance(settings)
+        self.instance.init()
+        request.cls.root = self.instance.get_server_instance_path()
+        request.cls.checker = InstanceHealthChecker(self.instance)
+
+    def kinds(self):
+        return sorted((issue.kind, issue.path) for issue in self.checker.check())
+
+    def test_should_find_nothing_wrong_in_a_fresh_instance(self):
+        """An instance health checker should find nothing wrong in a fresh instance."""
+        assert self.checker.check() == []
+
+    def test_should_find_dangling_and_missing_links(self):
+        """An instance health checker should find dangling and missing links."""
+        unlink(join(self.root, "TestFolder1"))
+        rename(join(self.test_path, "!Workshop", "@ace"), join(self.test_path, "!Workshop", "@ace_moved"))
+        unlink(join(self.root, "!Mods_linked", "@ODKMIN"))
+        assert self.kinds() == [("dangling_link", join(self.root, "!Mods_linked", "@ace")),
+                                ("dangling_link", join(self.root, "Keys", "ace_3.13.0.45.bikey")),
+                                ("missing_core_link", join(self.root, "TestFolder1")),
+                                ("missing_mod", join(self.root, "!Mods_linked", "@ODKMIN"))]
+
+    def test_should_find_copied_mods_that_drifted_from_the_workshop(self):
+        """An instance health checker should find copied mods that drifted from the workshop."""
+        touch(join(self.test_path, "!Workshop", "@CBA_A3", "new_file.txt"), "new")
+        issues = self.checker.check()
+        assert [issue.kind for issue in issues] == ["drifted_mod"]
+        assert "new_file.txt" in issues[0].message
+
+    def test_should_find_stale_compiled_files(self):
+        """An instance health checker should find stale compiled files."""
+        self.instance.S.config_settings.hostname = "A new hostname"
+        remove(join(self.root, "run_server.bat"))
+        assert self.kinds() == [("missing_compiled_file", join(self.root, "run_server.bat")),
+                                ("stale_compiled_file", join(self.root, "serverConfig.cfg"))]
+
+    def test_should_repair_what_it_finds(self):
+        """An instance health checker should repair what it finds."""
+        unlink(join(self.root, "TestFolder1"))
+        unlink(join(self.root, "!Mods_linked", "@ODKMIN"))
+        touch(join(self.test_path, "!Workshop", "@CBA_A3", "new_file.txt"), "new")
+        self.instance.S.user_mods_list.remove("ace")
+        remove(join(self.root, "run_server.bat"))
+        assert self.checker.repair(self.checker.check()) == []
+        assert self.checker.check() == []
+        assert islink(join(self.root, "TestFolder1"))
+        assert not islink(join(self.root, "!Mods_linked", "@ace"))
+        assert isdir(join(self.root, "!Mods_copied", "@CBA_A3"))
@@ -0,0 +1,62 @@
+from os import listdir, remove
+from os.path import isfile, join
+
+from conftest import test_folder_structure_path
+from odk_servermanager.host import get_cpu_count, get_ex_threads, HostProfile, STORAGE_PROFILE_FILE
+
+
+class TestTheHostProfile:
+    """Test: The host profile..."""
+
+    def test_should_count_the_cores_a_server_can_use(self, mocker):
+        """The host profile should count the cores a server can use."""
+        mocker.patch("odk_servermanager.host.os.cpu_count", return_value=12)
+        assert get_cpu_count() == 12
+        assert get_cpu_count([0, 1, 4]) == 3
+        mocker.patch("odk_servermanager.host.os.cpu_count", return_value=None)
+        assert get_cpu_count() == 1
+
+    def test_should_give_extra_threads_only_with_spare_cores(self):
+        """The host profile should give extra threads only with spare cores."""
+        assert [get_ex_threads(x) for x in [1, 2, 3, 4, 16]] == [0, 3, 3, 7, 7]
+
+    def test_should_detect_the_host(self, reset_folder_structure):
+        """The host profile should detect the host."""
+        profile = HostProfile.detect(test_folder_structure_path())
+        assert len(profile.cpus) > 0 and set(profile.physical_cores) == set(profile.cpus)
+        assert sorted(x for node in profile.numa_nodes for x in node) == profile.cpus
+        assert profile.memory > 0 and profile.storage_throughput > 0
+        assert not any(x.startswith(".odksm_probe_") for x in listdir(test_folder_structure_path()))
+        assert HostProfile.detect().storage_throughput is None
+
+    def test_should_measure_the_storage_only_once(self, reset_folder_structure, mocker):
+        """The host profile should measure the storage only once."""
+        measure = mocker.patch("odk_servermanager.host.measure_storage_throughput", return_value=20.5)
+        assert HostProfile.detect(test_folder_structure_path()).storage_throughput == 20.5
+        assert HostProfile.detect(test_folder_structure_path()).storage_throughput == 20.5
+        measure.assert_called_once()
+        profile_file = join(test_folder_structure_path(), STORAGE_PROFILE_FILE)
+        assert isfile(profile_file)
+        remove(profile_file)
+        HostProfile.detect(test_folder_structure_path())
+        assert measure.call_count == 2
+
+    def test_should_recommend_flags_from_the_topology(self):
+        """The host profile should recommend flags from the topology."""
+        profile = HostProfile(list(range(8)), {x: str(x // 2) for x in range(8)}, [list(range(8))], 16384)
+        assert profile.recommend() == {"cpuCount": "4", "exThreads": "7", "enableHT": ""}
+        assert profile.recommend([0, 2]) == {"cpuCount": "2", "exThreads": "3"}
+        assert profile.recommend([0], windows_malloc="tbb4malloc_bi_x64")["malloc"] == "tbb4malloc_bi_x64"
+        assert profile.pick_numa_node("training") is None
+        assert profile.recommend_max_mem() == 14336
+        profile.storage_throughput = 1000
+        assert "loadMissionToMemory" not in profile.recommend()
+        profile.storage_throughput = 20
+        assert "loadMissionToMemory" in profile.recommend()
+
+    def test_should_pick_a_stable_numa_node(self):
+        """The host profile should pick a stable numa node."""
+        profile = HostProfile(list(range(4)), {x: str(x) for x in range(4)}, [[0, 1], [2, 3]], 16384)
+        picks = {name: profile.pick_numa_node(name) for name in ["a", "b", "c", "d", "e", "f"]}
+        assert picks == {name: profile.pick_numa_node(name) for name in picks}
+        assert [[0, 1], [2, 3]] == sorted(map(list, {tuple(x) for x in picks.values()}))
@@ -1,12 +1,14 @@
 from os.path import isdir, isfile, islink, join, splitdrive
-from os import listdir, mkdir
+from os import listdir, mkdir, access, X_OK
 from unittest.mock import call
 
 import pytest
 
 from conftest import test_folder_structure_path, spy, touch, test_resources
 from odksm_test import ODKSMTest
+from odk_servermanager.host import HostProfile
 from odk_servermanager.instance import ServerInstance
+from odk_servermanager.scheduler import ModOpScheduler
 from odk_servermanager.settings import ServerInstanceSettings, ServerBatSettings, ServerConfigSettings
 
 
@@ -67,6 +69,23 @@ class TestWhenConfigComposingTheServerInstance(ODKSMTest):
         with open(self.compiled_config, "r") as compiled:
             assert compiled.read() == "TRAINING SERVER\n123\nabc\nmission.name"
 
+    def test_should_generate_the_cfg_file_from_a_network_profile(self):
+        """When config composing the server instance should generate the cfg file from a network profile."""
+        compiled_cfg = join(self.instance.get_server_instance_path(), self.instance.S.bat_settings.server_cfg_file_name)
+        assert not isfile(compiled_cfg)
+        bat_settings = self.instance.S.bat_settings
+        bat_settings.network_profile, bat_settings.network_uplink, bat_settings.network_players = "100mbit", "50", "20"
+        try:
+            self.instance._compile_config_file()
+        finally:
+            bat_settings.network_profile, bat_settings.network_uplink, bat_settings.network_players = "", "", ""
+        with open(compiled_cfg, "r") as compiled:
+            content = compiled.read()
+        assert "MaxBandwidth = 50000000;" in content
+        assert "MinBandwidth = 10240000;" in content
+        assert "MaxMsgSend = 244;" in content
+        assert "MinErrorToSend = 0.003;" in content
+
 
 class TestWhenBatComposingTheServerInstance(ODKSMTest):
     """Test: when bat composing bat the server instance..."""
@@ -120,6 +139,86 @@ class TestWhenBatComposingTheServerInstance(ODKSMTest):
         with open(self.compiled_bat, "r") as compiled:
             assert compiled.read() == "ODK Training Server\n2202\nserverTraining.cfg\nArma3Training.cfg\n8192"
 
+    def test_should_compose_the_same_command_line_as_the_sh_file(self, mocker):
+        """When bat composing the server instance should compose the same command line as the sh file."""
+        mocker.patch("odk_servermanager.host.os.cpu_count", return_value=2)
+        command = self.instance.get_server_command()
+        assert command[0] == join(self.instance.get_server_instance_path(), "arma3server_x64")
+        assert command[1:11] == ["-name=training", "-port=2202", "-config=serverTraining.cfg",
+                                 "-cfg=Arma3Training.cfg", "-maxMem=8192", "-cpuCount=2", "-exThreads=3",
+                                 "-filePatching", "-autoinit", "-enableHT"]
+        assert command[11] == "-mod=!Mods_linked/@ace;!Mods_copied/@CBA_A3;!Mods_linked/@ODKAI;"
+        assert command[12] == "-servermod=!Mods_linked/@AdvProp;!Mods_linked/@ODKMIN;"
+        assert self.instance.get_server_cpus() == []
+
+    def test_should_tune_the_flags_on_the_host_profile_when_asked_to(self, mocker):
+        """When bat composing the server instance should tune the flags on the host profile when asked to."""
+        profile = HostProfile([0, 1, 2, 3, 4, 5, 6, 7], {x: str(x % 4) for x in range(8)}, [[0, 1, 4, 5], [2, 3, 6, 7]],
+                              32768, storage_throughput=50)
+        mocker.patch.object(self.instance, "host_profile", profile)
+        mocker.patch.object(self.instance, "_get_windows_malloc", return_value="tbb4malloc_bi_x64")
+        bat_settings = self.instance.S.bat_settings
+        bat_settings.server_autotune = "True"
+        bat_settings.server_max_mem = "auto"
+        bat_settings.server_flags = "-exThreads=1"
+        bat_template = bat_settings.bat_template
+        bat_settings.bat_template = ""
+        try:
+            bat = self.instance._render_bat_file()
+            command = self.instance.get_server_command()
+            cpus = self.instance.get_server_cpus()
+        finally:
+            bat_settings.server_autotune = "False"
+            bat_settings.server_max_mem = "8192"
+            bat_settings.server_flags = "-filePatching -autoinit -enableHT"
+            bat_settings.bat_template = bat_template
+        assert "-maxMem=30720 -cpuCount=4 -enableHT -malloc=tbb4malloc_bi_x64 -loadMissionToMemory -exThreads=1 " in bat
+        assert cpus in [[0, 1, 4, 5], [2, 3, 6, 7]]
+        assert command[5:10] == ["-maxMem=30720", "-cpuCount=2", "-enableHT", "-loadMissionToMemory", "-exThreads=1"]
+
+    def test_should_compile_a_linux_sh_file_with_the_same_mods(self, mocker):
+        """When bat composing the server instance should compile a linux sh file with the same mods."""
+        mocker.patch("odk_servermanager.host.os.cpu_count", return_value=16)
+        self.instance._compile_sh_file()
+        sh_file = join(self.instance.get_server_instance_path(), "run_server.sh")
+        with open(sh_file, "r", newline="") as f:
+            content = f.read()
+        assert content.startswith("#!/bin/sh\n") and "\r" not in content
+        assert 'cd "{}" || exit 1'.format(self.instance.get_server_instance_path()) in content
+        assert "taskset" not in content and "GLIBC_TUNABLES" not in content
+        assert '-maxMem=8192 -cpuCount=16 -exThreads=7 -filePatching -autoinit -enableHT' in content
+        assert '-mod="!Mods_linked/@ace;!Mods_copied/@CBA_A3;!Mods_linked/@ODKAI;"' in content
+        assert '-serverMod="!Mods_linked/@AdvProp;!Mods_linked/@ODKMIN;"' in content
+
+    def test_should_tune_the_sh_file_on_the_pinned_cpus(self):
+        """When bat composing the server instance should tune the sh file on the pinned cpus."""
+        bat_settings = self.instance.S.bat_settings
+        bat_settings.server_cpus = "2-3"
+        bat_settings.server_hugepages = "True"
+        bat_settings.server_flags = "-exThreads=1"
+        try:
+            content = self.instance._render_sh_file()
+        finally:
+            bat_settings.server_cpus = ""
+            bat_settings.server_hugepages = "False"
+            bat_settings.server_flags = "-filePatching -autoinit -enableHT"
+        assert "taskset -c 2,3 ./arma3server_x64" in content
+        assert "export GLIBC_TUNABLES=glibc.malloc.hugetlb=1\nwhile true; do" in content
+        assert "-cpuCount=2 -hugepages -exThreads=1" in content and "-exThreads=3" not in content
+
+    def test_should_keep_server_flags_that_are_not_a_valid_command_line(self):
+        """When bat composing the server instance should keep server flags that are not a valid command line."""
+        bat_settings = self.instance.S.bat_settings
+        bat_settings.server_flags = '-profiles=C:\\odk\\profiles -exThreads=1 -name="odk'
+        try:
+            sh = self.instance._render_sh_file()
+            command = self.instance.get_server_command()
+        finally:
+            bat_settings.server_flags = "-filePatching -autoinit -enableHT"
+        assert ' -profiles=C:\\odk\\profiles -exThreads=1 -name="odk' in sh and sh.count("-exThreads") == 1
+        assert command[7:10] == ["-profiles=C:\\odk\\profiles", "-exThreads=1", '-name="odk']
+        assert "-exThreads=7" not in command
+
 
 class TestOurTestServerInstance(ODKSMTest):
     """Test: our test server instance..."""
@@ -220,6 +319,22 @@ class TestOurTestServerInstance(ODKSMTest):
         assert islink(join(server_folder, "!Mods_linked", "@ODKAI"))
         assert islink(join(server_folder, "!Mods_linked", "!DO_NOT_CHANGE_FILES_IN_THESE_FOLDERS"))
 
+    def test_should_init_mods_concurrently_when_allowed(self, reset_folder_structure, mocker):
+        """Our test server instance should init mods concurrently when allowed."""
+        server_folder = join(self.test_path, "__server__" + self.instance.S.server_instance_name)
+        mkdir(join(server_folder, "!Mods_copied"))
+        mkdir(join(server_folder, "!Mods_linked"))
+        self.instance.S.mods_workers = 3
+        scheduler_run = mocker.patch("odk_servermanager.instance.ModOpScheduler.run",
+                                     autospec=True, side_effect=ModOpScheduler.run)
+        self.instance._start_op_on_mods("init", ["ace", "CBA_A3", "ODKAI"])
+        scheduler, jobs = scheduler_run.call_args[0]
+        assert scheduler.max_workers == 3 and len(jobs) == 3
+        assert not any(x[0].conflicts_with(y[0]) for x in jobs for y in jobs if x is not y)
+        assert isdir(join(server_folder, "!Mods_copied", "@CBA_A3"))
+        assert islink(join(server_folder, "!Mods_linked", "@ace"))
+        assert islink(join(server_folder, "!Mods_linked", "@ODKAI"))
+
     def test_should_be_able_to_create_mods_relative_paths(self):
         """Our test server instance should be able to create mods relative paths."""
         assert self.instance._compose_relative_path_copied_mods("CBA_A3") == "!Mods_copied/@CBA_A3"
@@ -317,14 +432,14 @@ class TestOurTestServerInstance(ODKSMTest):
         """Our test server instance should be able to clean linked mods."""
         linked_mods = join(self.instance.get_server_instance_path(), self.instance.S.linked_mod_folder_name)
         mkdir(linked_mods)
-        mocker.patch.dict(self.instance.S, {"mods_to_be_copied": []})
-        mocker.patch.dict(self.instance.S, {"user_mods_list": ["ace", "CBA_A3", "ODKAI"]})
+        mocker.patch.object(self.instance.S, "mods_to_be_copied", [])
+        mocker.patch.object(self.instance.S, "user_mods_list", ["ace", "CBA_A3", "ODKAI"])
         self.instance._start_op_on_mods("init", ["ace", "CBA_A3", "ODKAI"])
         assert islink(join(linked_mods, "@ace"))
         assert islink(join(linked_mods, "@CBA_A3"))
         assert islink(join(linked_mods, "@ODKAI"))
-        mocker.patch.dict(self.instance.S, {"mods_to_be_copied": ["CBA_A3"]})
-        mocker.patch.dict(self.instance.S, {"user_mods_list": ["CBA_A3", "ODKAI"]})
+        mocker.patch.object(self.instance.S, "mods_to_be_copied", ["CBA_A3"])
+        mocker.patch.object(self.instance.S, "user_mods_list", ["CBA_A3", "ODKAI"])
         self.instance._clear_old_linked_mods()
         assert not islink(join(linked_mods, "@ace"))
         assert not islink(join(linked_mods, "@CBA_A3"))
@@ -409,6 +524,37 @@ class TestOurTestServerInstance(ODKSMTest):
         assert not isfile(join(self.instance.get_server_instance_path(), "run_server.bat"))
         assert not isfile(join(self.instance.get_server_instance_path(), self.instance.S.bat_settings.server_config_file_name))
 
+    def test_should_replace_the_linked_cfg_file_with_a_generated_one(self, reset_folder_structure):
+        """Our test server instance should replace the linked cfg file with a generated one."""
+        arma_cfg = join(self.test_path, self.sb.server_cfg_file_name)
+        touch(arma_cfg, "original")
+        self.instance._prepare_server_core()
+        compiled_cfg = join(self.instance.get_server_instance_path(), self.sb.server_cfg_file_name)
+        assert islink(compiled_cfg)
+        self.sb.network_profile = "lan"
+        self.instance._compile_config_file()
+        assert not islink(compiled_cfg) and isfile(compiled_cfg)
+        with open(arma_cfg, "r") as f:
+            assert f.read() == "original"
+        assert not self.instance._filter_symlinks(self.sb.server_cfg_file_name)
+        self.instance._clear_compiled_files()
+        assert not isfile(compiled_cfg)
+
+    def test_should_link_the_cfg_file_again_when_the_network_profile_is_off(self, reset_folder_structure):
+        """Our test server instance should link the cfg file again when the network profile is off."""
+        arma_cfg = join(self.test_path, self.sb.server_cfg_file_name)
+        touch(arma_cfg, "original")
+        self.sb.network_profile = "lan"
+        self.instance._prepare_server_core()
+        self.instance._update_compiled_files()
+        compiled_cfg = join(self.instance.get_server_instance_path(), self.sb.server_cfg_file_name)
+        assert not islink(compiled_cfg)
+        self.sb.network_profile = ""
+        self.instance._update_compiled_files()
+        assert islink(compiled_cfg)
+        with open(compiled_cfg, "r") as f:
+            assert f.read() == "original"
+
     def test_should_be_able_to_update_compiled_files(self, reset_folder_structure):
         """Our test server instance should be able to update compiled files."""
         self.instance._prepare_server_core()
@@ -583,11 +729,23 @@ class TestServerInstanceInit(ODKSMTest):
         self.compiled_bat_fun.assert_called()
         assert isfile(join(self.instance_folder, "run_server.bat"))
 
+    def test_should_generate_the_sh_file(self):
+        """Server instance init should generate the sh file."""
+        sh_file = join(self.instance_folder, "run_server.sh")
+        assert isfile(sh_file) and access(sh_file, X_OK)
+
     def test_should_generate_the_config_file(self):
         """Server instance init should generate the config file."""
         self.compiled_config_fun.assert_called()
         assert isfile(join(self.instance_folder, self.instance.S.bat_settings.server_config_file_name))
 
+    def test_should_track_the_mods_copy_progress(self):
+        """Server instance init should track the mods copy progress."""
+        progress = self.instance.progress
+        assert progress.done
+        assert progress.total_bytes > 0
+        assert progress.copied_bytes == progress.total_bytes
+
 
 class TestAnInstanceWithANonExistingMod(ODKSMTest):
     """Test: An instance with a non existing mod..."""
@@ -619,3 +777,268 @@ class TestAnInstanceWithANonExistingMod(ODKSMTest):
             self.instance.init()
         check_fun.assert_called()
         assert not isdir(self.instance.get_server_instance_path())
+
+
+class TestAClonedServerInstance(ODKSMTest):
+    """Test: A cloned server instance..."""
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup(self, request, class_reset_folder_structure, c_sc_stub, c_sb_stub):
+        """TestAClonedServerInstance setup"""
+        request.cls.test_path = test_folder_structure_path()
+        base_settings = ServerInstanceSettings(
+            "BaseServer", c_sb_stub, c_sc_stub,
+            arma_folder=self.test_path,
+            server_instance_root=self.test_path,
+            mods_to_be_copied=["CBA_A3", "ace"],
+            user_mods_list=["ace", "CBA_A3"],
+            server_mods_list=["ODKMIN"],
+        )
+        request.cls.base_instance = ServerInstance(base_settings)
+        self.base_instance.init()
+        # customize a copied mod in the base instance: the clone should inherit it
+        touch(join(self.base_instance.get_server_instance_path(), "!Mods_copied", "@CBA_A3", "custom.txt"))
+        settings = ServerInstanceSettings(
+            "ClonedServer", c_sb_stub, c_sc_stub,
+            arma_folder=self.test_path,
+            server_instance_root=self.test_path,
+            mods_to_be_copied=["CBA_A3", "AdvProp"],
+            user_mods_list=["CBA_A3", "AdvProp", "ODKAI"],
+            server_mods_list=["ODKMIN"],
+        )
+        request.cls.instance = ServerInstance(settings)
+        with spy(self.instance.init) as request.cls.init_fun:
+            self.instance.clone(self.base_instance.get_server_instance_path())
+        request.cls.instance_folder = self.instance.get_server_instance_path()
+
+    def test_should_go_through_the_regular_init(self):
+        """A cloned server instance should go through the regular init."""
+        self.init_fun.assert_called_once()
+        assert isfile(join(self.instance_folder, "run_server.bat"))
+        assert self.instance.base_instance_path is None
+
+    def test_should_clone_copied_mods_from_the_base_instance(self):
+        """A cloned server instance should clone copied mods from the base instance."""
+        cba_folder = join(self.instance_folder, "!Mods_copied", "@CBA_A3")
+        assert isdir(cba_folder) and not islink(cba_folder)
+        assert isfile(join(cba_folder, "custom.txt"))
+
+    def test_should_only_apply_its_own_mods_list(self):
+        """A cloned server instance should only apply its own mods list."""
+        assert not isdir(join(self.instance_folder, "!Mods_copied", "@ace"))
+        assert isdir(join(self.instance_folder, "!Mods_copied", "@AdvProp"))
+        assert islink(join(self.instance_folder, "!Mods_linked", "@ODKAI"))
+
+    def test_should_refuse_an_invalid_base_instance(self, c_sc_stub, c_sb_stub):
+        """A cloned server instance should refuse an invalid base instance."""
+        from odk_servermanager.instance import InvalidBaseInstance
+        settings = ServerInstanceSettings("AnotherServer", c_sb_stub, c_sc_stub,
+                                          arma_folder=self.test_path, server_instance_root=self.test_path)
+        instance = ServerInstance(settings)
+        with pytest.raises(InvalidBaseInstance):
+            instance.clone(join(self.test_path, "TestFolder1"))
+        assert not isdir(instance.get_server_instance_path())
+
+
+class TestAnInterruptedServerInstanceInit(ODKSMTest):
+    """Test: An interrupted server instance init..."""
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup(self, request, class_reset_folder_structure, c_sc_stub, c_sb_stub):
+        """TestAnInterruptedServerInstanceInit setup"""
+        request.cls.test_path = test_folder_structure_path()
+        settings = ServerInstanceSettings(
+            "InterruptedServer", c_sb_stub, c_sc_stub,
+            arma_folder=self.test_path,
+            server_instance_root=self.test_path,
+            mods_to_be_copied=["CBA_A3", "ace"],
+            user_mods_list=["ODKAI", "CBA_A3", "ace"],
+        )
+        request.cls.instance = ServerInstance(settings)
+        request.cls.instance_folder = self.instance.get_server_instance_path()
+        original_copy = self.instance._copy_mod
+
+        def broken_copy(mod_name):
+            original_copy(mod_name)
+            if mod_name == "CBA_A3":
+                # simulate an init killed halfway through a mod copy
+                touch(join(self.instance_folder, "!Mods_copied", "@CBA_A3", "partial"))
+                raise KeyboardInterrupt
+        self.instance._copy_mod = broken_copy
+        with pytest.raises(KeyboardInterrupt):
+            self.instance.init()
+        del self.instance._copy_mod
+
+    def test_should_be_recognized(self):
+        """An interrupted server instance init should be recognized."""
+        assert self.instance.is_folder_instance_already_there()
+        assert self.instance.is_init_interrupted()
+
+    def test_should_be_resumed_redoing_only_what_was_not_completed(self):
+        """An interrupted server instance init should be resumed redoing only what was not completed."""
+        with spy(self.instance._prepare_server_core) as prepare_server_fun, \
+                spy(self.instance._apply_hooks_and_do_op) as apply_hooks_fun:
+            self.instance.init()
+        prepare_server_fun.assert_not_called()
+        apply_hooks_fun.assert_has_calls([call("init", "copy", "CBA_A3"), call("init", "copy", "ace")])
+        assert apply_hooks_fun.call_count == 2
+        assert not isfile(join(self.instance_folder, "!Mods_copied", "@CBA_A3", "partial"))
+        assert isdir(join(self.instance_folder, "!Mods_copied", "@ace"))
+        assert isfile(join(self.instance_folder, "run_server.bat"))
+        assert not self.instance.is_init_interrupted()
+
+
+class TestAServerInstanceWithModsDependencies(ODKSMTest):
+    """Test: A server instance with mods dependencies..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure, sc_stub, sb_stub):
+        """TestAServerInstanceWithModsDependencies setup"""
+        from conftest import make_pbo, make_rapified_cfg_patches
+        request.cls.test_path = test_folder_structure_path()
+        for mod_name, patches in [("ace", {"ace_main": ["cba_main"]}), ("CBA_A3", {"cba_main": []}),
+                                  ("AdvProp", {"advprop": ["ace_main"]})]:
+            addons_folder = join(self.test_path, "!Workshop", "@" + mod_name, "addons")
+            mkdir(addons_folder)
+            make_pbo(join(addons_folder, mod_name.lower() + ".pbo"), {"config.bin": make_rapified_cfg_patches(patches)})
+        settings = ServerInstanceSettings("TestServer1", sb_stub, sc_stub,
+                                          arma_folder=self.test_path, server_instance_root=self.test_path,
+                                          user_mods_list=["AdvProp", "ace", "ODKAI"])
+        request.cls.instance = ServerInstance(settings)
+        self.instance.warnings = []
+
+    def test_should_warn_about_missing_dependencies_when_checking_mods_addons(self):
+        """A server instance with mods dependencies should warn about missing dependencies when checking mods addons."""
+        self.instance._check_mods_addons()
+        assert len(self.instance.warnings) == 1
+        assert "cba_main" in self.instance.warnings[0] and "CBA_A3" in self.instance.warnings[0]
+
+    def test_should_index_the_whole_workshop_only_to_trace_missing_addons(self, mocker):
+        """A server instance with mods dependencies should index the whole workshop only to trace missing addons."""
+        index = self.instance._get_workshop_index()
+        get_all_mods_fun = mocker.spy(index, "get_all_mods")
+        self.instance.S.user_mods_list = ["AdvProp", "ace", "CBA_A3"]
+        self.instance._check_mods_addons()
+        assert self.instance.warnings == []
+        get_all_mods_fun.assert_not_called()
+        self.instance.S.user_mods_list = ["AdvProp", "ace"]
+        self.instance._check_mods_addons()
+        get_all_mods_fun.assert_called_once()
+        assert "cba_main" in self.instance.warnings[0] and "CBA_A3" in self.instance.warnings[0]
+
+    def test_should_load_mods_after_their_dependencies(self):
+        """A server instance with mods dependencies should load mods after their dependencies."""
+        self.instance.S.user_mods_list = ["AdvProp", "ODKAI", "ace", "CBA_A3"]
+        assert self.instance._compose_relative_path_mods(self.instance.S.user_mods_list) == \
+            "!Mods_linked/@ODKAI;!Mods_linked/@CBA_A3;!Mods_linked/@ace;!Mods_linked/@AdvProp;"
+
+    def test_should_warn_about_addons_provided_by_more_than_one_mod(self):
+        """A server instance with mods dependencies should warn about addons provided by more than one mod."""
+        from conftest import make_pbo, make_rapified_cfg_patches
+        mkdir(join(self.test_path, "!Workshop", "@ODKAI", "addons"))
+        make_pbo(join(self.test_path, "!Workshop", "@ODKAI", "addons", "ace_fork.pbo"),
+                 {"config.bin": make_rapified_cfg_patches({"ace_main": []})})
+        self.instance.S.user_mods_list = ["CBA_A3", "ODKAI", "ace"]
+        self.instance._check_mods_addons()
+        assert self.instance.warnings == ["The mods 'ODKAI', 'ace' all provide the addon 'ace_main': only one of them "
+                                          "will be used!"]
+
+
+class TestAServerInstanceCheckingSignatures(ODKSMTest):
+    """Test: A server instance checking signatures..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure, sc_stub, sb_stub):
+        """TestAServerInstanceCheckingSignatures setup"""
+        request.cls.test_path = test_folder_structure_path()
+        ace_folder = join(self.test_path, "!Workshop", "@ace")
+        mkdir(join(ace_folder, "addons"))
+        for pbo in ["ace_main.pbo", "ace_common.pbo", "ace_rogue.pbo"]:
+            touch(join(ace_folder, "addons", pbo))
+        # the mod ships the real ace_3.13.0.45-d0601857 key
+        for pbo in ["ace_main.pbo", "ace_common.pbo"]:
+            touch(join(ace_folder, "addons", pbo + ".ace_3.13.0.45-d0601857.bisign"),
+                  "ace_3.13.0.45-d0601857\0signature")
+        touch(join(ace_folder, "addons", "ace_rogue.pbo.rogue.bisign"), "rogue\0signature")
+        settings = ServerInstanceSettings("TestServer1", sb_stub, sc_stub,
+                                          arma_folder=self.test_path, server_instance_root=self.test_path,
+                                          user_mods_list=["ace", "CBA_A3"])
+        request.cls.instance = ServerInstance(settings)
+        self.instance.warnings = []
+
+    def test_should_warn_about_pbos_not_signed_by_the_mod_keys(self):
+        """A server instance checking signatures should warn about pbos not signed by the mod keys."""
+        self.instance._check_mods_signatures()
+        assert self.instance.warnings == ["The mod 'ace' has pbos not signed by any of its keys "
+                                          "(ace_3.13.0.45-d0601857): ace_rogue.pbo"]
+
+    def test_should_ignore_mods_whose_keys_are_skipped(self):
+        """A server instance checking signatures should ignore mods whose keys are skipped."""
+        self.instance.S.skip_keys.append("ace")
+        self.instance._check_mods_signatures()
+        assert self.instance.warnings == []
+
+
+class TestAServerInstanceWithMissions(ODKSMTest):
+    """Test: A server instance with missions..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure, sc_stub, sb_stub):
+        """TestAServerInstanceWithMissions setup"""
+        from conftest import make_pbo, make_rapified_cfg_patches, make_rapified_mission
+        request.cls.test_path = test_folder_structure_path()
+        request.cls.missions_folder = join(self.test_path, "MPMissions")
+        mkdir(self.missions_folder)
+        for mission, addons in [("missionName.Altis", ["A3_Characters_F", "ace_main"]),
+                                ("tvt.Stratis", ["rhs_main"]), ("unused.Altis", [])]:
+            make_pbo(join(self.missions_folder, mission + ".pbo"), {"mission.sqm": make_rapified_mission(addons)})
+        mkdir(join(self.test_path, "!Workshop", "@ace", "addons"))
+        make_pbo(join(self.test_path, "!Workshop", "@ace", "addons", "ace.pbo"),
+                 {"config.bin": make_rapified_cfg_patches({"ace_main": []})})
+        sc_stub.mission_template = "missionName.Altis"
+        settings = ServerInstanceSettings("TestServer1", sb_stub, sc_stub,
+                                          arma_folder=self.test_path, server_instance_root=self.test_path,
+                                          user_mods_list=["ace"])
+        request.cls.instance = ServerInstance(settings)
+        request.cls.instance_missions = join(self.instance.get_server_instance_path(), "MPMissions")
+        self.instance.warnings = []
+        self.instance._new_server_folder()
+
+    def test_should_link_only_the_needed_missions(self):
+        """A server instance with missions should link only the needed missions."""
+        self.instance.S.config_settings.missions_list = "tvt.Stratis.pbo, ghost"
+        self.instance._prepare_server_core()
+        assert not islink(self.instance_missions)
+        self.instance._link_missions()
+        assert sorted(listdir(self.instance_missions)) == ["missionName.Altis.pbo", "tvt.Stratis.pbo"]
+        assert islink(join(self.instance_missions, "tvt.Stratis.pbo"))
+        self.instance.S.config_settings.missions_list = ""
+        self.instance._link_missions()
+        assert listdir(self.instance_missions) == ["missionName.Altis.pbo"]
+
+    def test_should_replace_a_link_to_the_whole_missions_folder(self):
+        """A server instance with missions should replace a link to the whole missions folder."""
+        self.instance.S.config_settings.missions_list = "*"
+        self.instance._prepare_server_core()
+        assert islink(self.instance_missions)
+        self.instance._link_missions()
+        assert islink(self.instance_missions)
+        self.instance.S.config_settings.missions_list = ""
+        self.instance._link_missions()
+        assert not islink(self.instance_missions) and listdir(self.instance_missions) == ["missionName.Altis.pbo"]
+        assert len(listdir(self.missions_folder)) == 3
+        self.instance.S.config_settings.missions_list = "*"
+        self.instance._link_missions()
+        assert islink(self.instance_missions) and len(listdir(self.instance_missions)) == 3
+        assert len(listdir(self.missions_folder)) == 3
+
+    def test_should_warn_about_missing_missions_and_addons(self):
+        """A server instance with missions should warn about missing missions and addons."""
+        self.instance._check_missions()
+        assert self.instance.warnings == []
+        self.instance.S.config_settings.missions_list = "tvt.Stratis, ghost.Altis"
+        self.instance._check_missions()
+        assert self.instance.warnings == [
+            "The mission 'tvt.Stratis.pbo' requires addons not provided by the mods lists: rhs_main",
+            "Could not find the mission 'ghost.Altis' in the MPMissions folder!"]
+        assert isfile(join(self.test_path, "__odksm__", "missions_index.json"))
@@ -0,0 +1,47 @@
+from os import mkdir
+from os.path import join, isdir
+
+import pytest
+
+from conftest import test_folder_structure_path
+from odksm_test import ODKSMTest
+from odk_servermanager.journal import InitJournal
+
+
+class TestAnInitJournal(ODKSMTest):
+    """Test: An init journal..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestAnInitJournal setup"""
+        request.cls.instance_path = join(test_folder_structure_path(), "__server__journal")
+        mkdir(self.instance_path)
+        request.cls.journal = InitJournal(self.instance_path)
+
+    def test_should_be_persisted_in_the_instance_folder(self):
+        """An init journal should be persisted in the instance folder."""
+        assert not self.journal.exists()
+        self.journal.start()
+        self.journal.mark_phase_done("core")
+        self.journal.mark_mod_started("ace")
+        assert self.journal.exists()
+        journal = InitJournal(self.instance_path)
+        journal.load()
+        assert journal.is_phase_done("core")
+        assert not journal.is_phase_done("mods")
+
+    def test_should_know_which_mods_were_interrupted(self):
+        """An init journal should know which mods were interrupted."""
+        self.journal.start()
+        self.journal.mark_mod_started("ace")
+        self.journal.mark_mod_done("ace")
+        self.journal.mark_mod_started("CBA_A3")
+        assert self.journal.is_mod_done("ace")
+        assert self.journal.get_interrupted_mods() == ["CBA_A3"]
+
+    def test_should_clean_up_after_itself_when_completed(self):
+        """An init journal should clean up after itself when completed."""
+        self.journal.start()
+        self.journal.complete()
+        assert not self.journal.exists()
+        assert not isdir(join(self.instance_path, "__odksm__"))
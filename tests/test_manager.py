@@ -1,14 +1,16 @@
+from os import remove, mkdir, listdir
 from os.path import join, isfile, isdir, abspath
 
 import pytest
 
-from conftest import test_preset_file_name, test_resources, test_folder_structure_path, test_preset_tofix_file_name
+from conftest import test_preset_file_name, test_folder_structure_path, test_preset_tofix_file_name, \
+    test_folder_structure_name, worker_resource, touch, test_resources
 from odk_servermanager.config_ini import ConfigIni
 from odk_servermanager.manager import ServerManager
 from odk_servermanager.settings import ServerInstanceSettings, ServerBatSettings, ServerConfigSettings, ModFixSettings
 from odk_servermanager.modfix import MisconfiguredModFix, NonExistingFixFile, ModFix
 from odksm_test import ODKSMTest
-from odk_servermanager.utils import rmtree
+from odk_servermanager.utils import rmtree, copy
 
 
 class TestPresetImporting(ODKSMTest):
@@ -57,7 +59,7 @@ class TestThePresetManager:
     def test_should_be_able_to_read_a_config_file(self):
         """The preset manager should be able to read a config file."""
         sm = ServerManager()
-        sm.config_file = join(test_resources, "config.ini")
+        sm.config_file = worker_resource("config.ini")
         sm._parse_config()
         assert isinstance(sm.settings, ServerInstanceSettings)
         assert isinstance(sm.settings.bat_settings, ServerBatSettings)
@@ -78,7 +80,7 @@ class TestThePresetManager:
             data["mod_fix_settings"].pop("enabled_fixes")
             return data
         sm = ServerManager()
-        sm.config_file = join(test_resources, "config.ini")
+        sm.config_file = worker_resource("config.ini")
         # simulate a missing 'enabled_fixes' keyword in the read_file output
         patch_with_hook(function_to_mock=ConfigIni.read_file,
                         function_to_mock_name="odk_servermanager.manager.ConfigIni.read_file",
@@ -88,7 +90,7 @@ class TestThePresetManager:
     def test_should_read_the_config_and_parse_the_preset_if_present_at_init(self):
         """The preset manager should read the config and parse the preset if present at init."""
         sm = ServerManager()
-        sm.config_file = join(test_resources, "config.ini")
+        sm.config_file = worker_resource("config.ini")
         sm._recover_settings()
         assert isinstance(sm.settings, ServerInstanceSettings)
         assert len(sm.settings.user_mods_list) == 6
@@ -102,9 +104,9 @@ class TestThePresetManager:
         copied = self._prepare_mod_fix_with_dummy_hook(
             "CBA_A3", "hook_init_copy_replace")
         mocker.patch("odk_servermanager.modfix.register_fixes",
-                     side_effect=lambda x: [linked, not_there, copied])
+                     side_effect=lambda x, plugins_folder="": [linked, not_there, copied])
         sm = ServerManager()
-        sm.config_file = join(test_resources, "config.ini")
+        sm.config_file = worker_resource("config.ini")
         sm._parse_config()
         assert "NotThere" not in sm.settings.mods_to_be_copied
         assert "ODKMIN" not in sm.settings.mods_to_be_copied
@@ -126,7 +128,7 @@ class TestAServerManagerAtInit(ODKSMTest):
     @pytest.fixture(scope="class", autouse=True)
     def setup(self, request, class_reset_folder_structure):
         """TestAServerManagerAtInit setup"""
-        request.cls.config_file = join(test_resources, "config.ini")
+        request.cls.config_file = worker_resource("config.ini")
         request.cls.sm = ServerManager()
 
     def test_should_init_the_server_instance(self, reset_folder_structure, mocker):
@@ -201,11 +203,11 @@ class TestAServerManagerAtInit(ODKSMTest):
         def broken_fixes(error):
             raise error("something went wrong")
         mocker.patch("odk_servermanager.modfix.register_fixes",
-                     side_effect=lambda x: broken_fixes(MisconfiguredModFix))
+                     side_effect=lambda x, plugins_folder="": broken_fixes(MisconfiguredModFix))
         self._assert_aborting(self.sm.manage_instance, {
                               "config_file": self.config_file})
         mocker.patch("odk_servermanager.modfix.register_fixes",
-                     side_effect=lambda x: broken_fixes(NonExistingFixFile))
+                     side_effect=lambda x, plugins_folder="": broken_fixes(NonExistingFixFile))
         self._assert_aborting(self.sm.manage_instance, {
                               "config_file": self.config_file})
 
@@ -238,6 +240,37 @@ class TestAServerManagerAtInit(ODKSMTest):
         self._assert_aborting(self.sm.manage_instance, {
                               "config_file": self.config_file})
 
+    def test_should_check_and_repair_an_instance(self, reset_folder_structure, mocker, capsys):
+        """A server manager at init should check and repair an instance."""
+        mocker.patch("builtins.input", return_value="y")
+        self.sm.manage_instance(self.config_file)
+        self.sm.check_instance(self.config_file)
+        assert "is healthy" in capsys.readouterr().out
+        remove(join(self.sm.instance.get_server_instance_path(), "run_server.bat"))
+        with pytest.raises(SystemExit):
+            self.sm.check_instance(self.config_file)
+        assert "run_server.bat" in capsys.readouterr().out
+        self.sm.check_instance(self.config_file, repair=True)
+        assert isfile(join(self.sm.instance.get_server_instance_path(), "run_server.bat"))
+        mocker.patch("odk_servermanager.manager.InstanceHealthChecker.check", side_effect=OSError("missing template"))
+        with pytest.raises(SystemExit):
+            self.sm.check_instance(self.config_file)
+        assert "Error while checking the instance" in capsys.readouterr().out
+
+    def test_should_supervise_an_instance(self, reset_folder_structure, mocker):
+        """A server manager at init should supervise an instance."""
+        with pytest.raises(SystemExit):
+            self.sm.supervise_instance(self.config_file, executable="stub_server.py", max_restarts=0)
+        mocker.patch("builtins.input", return_value="y")
+        self.sm.manage_instance(self.config_file)
+        instance_path = self.sm.instance.get_server_instance_path()
+        copy(join(test_resources, "stub_server.py"), join(instance_path, "stub_server.py"))
+        signal_fun = mocker.patch("odk_servermanager.manager.signal.signal")
+        self.sm.supervise_instance(self.config_file, executable="stub_server.py", max_restarts=0)
+        assert signal_fun.call_count == 2
+        with open(join(instance_path, "logs", "server.log"), "r") as f:
+            assert "-port=2202" in f.read()
+
     def _assert_aborting(self, function, args):
         """Helper to test that the given function is actually making the manager abort."""
         from unittest.mock import patch
@@ -254,7 +287,7 @@ class TestWhenBootstrapping(ODKSMTest):
     def setup(self, request, class_reset_folder_structure):
         """TestWhenBootstrapping setup"""
         request.cls.sm = ServerManager()
-        request.cls.default_file = join(test_resources, "bootstrap.ini")
+        request.cls.default_file = worker_resource("bootstrap.ini")
         request.cls.test_path = test_folder_structure_path()
 
     def test_it_should_abort_if_there_are_missing_fields_in_the_default_config_ini(self, mocker):
@@ -286,7 +319,7 @@ class TestWhenBootstrapping(ODKSMTest):
         assert data["bat"]["server_max_mem"] == "8192"
         assert data["ODKSM"]["server_instance_name"] == "training"
         assert data["ODKSM"]["server_instance_root"] == abspath(
-            join("tests/resources/Arma", "training"))
+            join(test_folder_structure_name, "training"))
 
     def test_should_compile_the_odksm_bat_file(self, reset_folder_structure, mocker):
         """When bootstrapping should compile the odksm.bat file."""
@@ -325,6 +358,113 @@ class TestWhenBootstrapping(ODKSMTest):
             abort.assert_called()
 
 
+class TestWhenBulkBootstrapping(ODKSMTest):
+    """Test: when bulk bootstrapping..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestWhenBulkBootstrapping setup"""
+        request.cls.sm = ServerManager()
+        request.cls.default_file = worker_resource("bootstrap.ini")
+        request.cls.test_path = test_folder_structure_path()
+        request.cls.manifest_file = join(self.test_path, "manifest.csv")
+
+    def test_should_create_every_instance_folder(self):
+        """When bulk bootstrapping should create every instance folder."""
+        touch(self.manifest_file, "name,port,bat_template,hostname\n" + "".join(
+            "event{0},{1},{2},Event {0}\n".format(i, 2302 + i * 10, "y" if i == 0 else "n") for i in range(20)))
+        self.sm.bulk_bootstrap(self.manifest_file, self.default_file)
+        for i in range(20):
+            instance_folder = join(self.test_path, "event{}".format(i))
+            data = ConfigIni.read_file(join(instance_folder, "config.ini"))
+            assert data["bat"]["server_port"] == str(2302 + i * 10)
+            assert data["bat"]["server_max_mem"] == "8192"
+            assert data["config"]["hostname"] == "Event {}".format(i)
+            assert data["ODKSM"]["server_instance_name"] == "event{}".format(i)
+            assert data["ODKSM"]["server_instance_root"] == abspath(instance_folder)
+            assert isfile(join(instance_folder, "ODKSM.bat"))
+            assert isfile(join(instance_folder, "run_server_template.txt")) == (i == 0)
+
+    def test_should_abort_before_creating_anything_on_colliding_ports(self):
+        """When bulk bootstrapping should abort before creating anything on colliding ports."""
+        touch(self.manifest_file, "name,port\nevent1,2302\nevent2,2304\n")
+        with pytest.raises(SystemExit):
+            self.sm.bulk_bootstrap(self.manifest_file, self.default_file)
+        assert not isdir(join(self.test_path, "event1")) and not isdir(join(self.test_path, "event2"))
+
+    def test_should_abort_on_ports_used_by_existing_instances(self):
+        """When bulk bootstrapping should abort on ports used by existing instances."""
+        mkdir(join(self.test_path, "existing"))
+        ConfigIni().create_file(join(self.test_path, "existing", "config.ini"), {"bat": {"server_port": "2302"}})
+        touch(self.manifest_file, "name,port\nevent1,2306\n")
+        with pytest.raises(SystemExit):
+            self.sm.bulk_bootstrap(self.manifest_file, self.default_file)
+        assert not isdir(join(self.test_path, "event1"))
+
+
+class TestWhenPlanningInstances(ODKSMTest):
+    """Test: when planning instances..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestWhenPlanningInstances setup"""
+        request.cls.sm = ServerManager()
+        request.cls.root = join(test_folder_structure_path(), "instances")
+        mkdir(self.root)
+        for name in ["a", "b"]:
+            mkdir(join(self.root, name))
+            ConfigIni().create_file(join(self.root, name, "config.ini"),
+                                    {"bat": {"server_port": "2302", "server_max_mem": "4096"}})
+
+    def test_should_only_write_the_plan_when_asked_to(self, capsys):
+        """When planning instances should only write the plan when asked to."""
+        config_file = join(self.root, "b", "config.ini")
+        self.sm.plan_instances(self.root, memory_budget=16384)
+        assert "'a' (2302) and 'b' (2302) collide" in capsys.readouterr().out
+        assert ConfigIni.read_file(config_file)["bat"]["server_port"] == "2302"
+        self.sm.plan_instances(self.root, memory_budget=16384, apply=True)
+        assert ConfigIni.read_file(config_file)["bat"]["server_port"] == "2312"
+
+    def test_should_abort_if_the_budget_is_too_small(self):
+        """When planning instances should abort if the budget is too small."""
+        with pytest.raises(SystemExit):
+            self.sm.plan_instances(self.root, memory_budget=1024)
+
+
+class TestWhenBulkCreatingConfigs(ODKSMTest):
+    """Test: when bulk creating configs..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestWhenBulkCreatingConfigs setup"""
+        request.cls.sm = ServerManager()
+        request.cls.test_path = test_folder_structure_path()
+        request.cls.csv_file = join(self.test_path, "events.csv")
+        request.cls.output = join(self.test_path, "events")
+        mkdir(self.output)
+
+    def test_should_create_a_config_ini_for_every_row(self):
+        """When bulk creating configs should create a config ini for every row."""
+        touch(self.csv_file, "server_instance_name,hostname\n" +
+              "".join("event{0},Event {0}\n".format(i) for i in range(50)))
+        self.sm.bulk_create_configs(self.csv_file, self.output, worker_resource("bootstrap.ini"))
+        for i in [0, 49]:
+            data = ConfigIni.read_file(join(self.output, "event{}".format(i), "config.ini"))
+            assert data["config"]["hostname"] == "Event {}".format(i)
+            assert data["bat"]["server_max_mem"] == "8192"
+            assert data["ODKSM"]["server_instance_root"] == abspath(join(self.output, "event{}".format(i)))
+
+    def test_should_abort_on_missing_or_repeated_names(self):
+        """When bulk creating configs should abort on missing or repeated names."""
+        touch(self.csv_file, "server_instance_name,hostname\nevent,Event\nevent,Again\n")
+        with pytest.raises(SystemExit):
+            self.sm.bulk_create_configs(self.csv_file, self.output)
+        touch(self.csv_file, "server_instance_name,hostname\n,Event\n")
+        with pytest.raises(SystemExit):
+            self.sm.bulk_create_configs(self.csv_file, self.output)
+        assert listdir(self.output) == []
+
+
 class TestWhenDebugging:
     """Test: When debugging..."""
 
@@ -0,0 +1,90 @@
+from os import mkdir
+from os.path import join, isfile
+from unittest.mock import patch
+
+import pytest
+
+from conftest import test_folder_structure_path, make_pbo, make_rapified_mission, touch
+from odksm_test import ODKSMTest
+from odk_servermanager.arma_config import get_mission_addons
+from odk_servermanager.missions import MissionIndex, get_missing_addons
+
+
+class TestTheMissionAddonsParser(ODKSMTest):
+    """Test: The mission addons parser..."""
+
+    def test_should_read_the_addons_of_a_rapified_mission(self):
+        """The mission addons parser should read the addons of a rapified mission."""
+        assert get_mission_addons(make_rapified_mission(["A3_Characters_F", "ace_main"])) == \
+            ["A3_Characters_F", "ace_main"]
+
+    def test_should_read_the_addons_of_a_text_mission(self):
+        """The mission addons parser should read the addons of a text mission."""
+        text = b"""
+        version = 53;
+        // addons[] = {"commented"};
+        addons[] = {"A3_Characters_F", "cba_main"};
+        addonsAuto[] = {"not_this_one"};
+        class Mission { addOns[] = {"cba_main", "old_format"}; };
+        """
+        assert get_mission_addons(text) == ["A3_Characters_F", "cba_main", "old_format"]
+
+
+class TestAMissionIndex(ODKSMTest):
+    """Test: A mission index..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestAMissionIndex setup"""
+        request.cls.test_path = test_folder_structure_path()
+        request.cls.missions_folder = join(self.test_path, "MPMissions")
+        mkdir(self.missions_folder)
+        make_pbo(join(self.missions_folder, "coop.Altis.pbo"),
+                 {"mission.sqm": make_rapified_mission(["A3_Characters_F", "ace_main"])})
+        mkdir(join(self.missions_folder, "tvt.Stratis"))
+        touch(join(self.missions_folder, "tvt.Stratis", "mission.sqm"), 'addons[] = {"cba_main"};')
+        touch(join(self.missions_folder, "readme.txt"))
+
+    def test_should_find_missions_pbos_and_folders(self):
+        """A mission index should find missions pbos and folders."""
+        index = MissionIndex(self.test_path)
+        assert index.list_missions() == ["coop.Altis.pbo", "tvt.Stratis"]
+        assert index.find_missions(["COOP.Altis", "tvt.Stratis", "coop.Altis.pbo", "ghost"]) == \
+            {"COOP.Altis": "coop.Altis.pbo", "tvt.Stratis": "tvt.Stratis", "coop.Altis.pbo": "coop.Altis.pbo",
+             "ghost": None}
+
+    def test_should_index_the_required_addons(self):
+        """A mission index should index the required addons."""
+        records = MissionIndex(self.test_path).get_all_missions()
+        assert records["coop.Altis.pbo"]["required_addons"] == ["A3_Characters_F", "ace_main"]
+        assert records["tvt.Stratis"]["required_addons"] == ["cba_main"]
+        assert records["coop.Altis.pbo"]["size"] > 0 and "mtime" in records["coop.Altis.pbo"]
+
+    def test_should_be_persisted_and_only_parse_changed_missions(self):
+        """A mission index should be persisted and only parse changed missions."""
+        index = MissionIndex(self.test_path)
+        index.get_all_missions()
+        index.save()
+        assert isfile(join(self.test_path, "__odksm__", "missions_index.json"))
+        index = MissionIndex(self.test_path)
+        with patch.object(index, "_index_mission", wraps=index._index_mission) as index_mission_fun:
+            index.get_all_missions()
+        index_mission_fun.assert_not_called()
+        make_pbo(join(self.missions_folder, "coop.Altis.pbo"), {"mission.sqm": make_rapified_mission(["rhs_main"])})
+        with patch.object(index, "_index_mission", wraps=index._index_mission) as index_mission_fun:
+            record = index.get_mission("coop.Altis.pbo")
+        index_mission_fun.assert_called_once()
+        assert record["required_addons"] == ["rhs_main"]
+
+    def test_should_record_broken_missions_without_failing(self):
+        """A mission index should record broken missions without failing."""
+        touch(join(self.missions_folder, "broken.Altis.pbo"), "not a pbo")
+        make_pbo(join(self.missions_folder, "empty.Altis.pbo"), {"description.ext": b""})
+        index = MissionIndex(self.test_path)
+        assert "error" in index.get_mission("broken.Altis.pbo")
+        assert "error" in index.get_mission("empty.Altis.pbo")
+
+    def test_should_find_the_addons_missing_from_the_mods(self):
+        """A mission index should find the addons missing from the mods."""
+        record = {"required_addons": ["A3_Characters_F", "3DEN", "ace_main", "CBA_Main", "rhs_main"]}
+        assert get_missing_addons(record, {"ace_main", "cba_main"}) == ["rhs_main"]
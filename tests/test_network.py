@@ -0,0 +1,39 @@
+import pytest
+
+from odk_servermanager.network import get_network_settings, InvalidNetworkSettings
+
+
+class TestTheNetworkSettings:
+    """Test: The network settings..."""
+
+    def test_should_fill_the_uplink_of_the_profile(self):
+        """The network settings should fill the uplink of the profile."""
+        settings = get_network_settings("100mbit")
+        assert settings["max_bandwidth"] == "100000000"
+        assert settings["max_msg_send"] == "488"
+        assert settings["max_size_guaranteed"] == "512"
+        assert settings["min_error_to_send"] == "0.003" and settings["min_error_to_send_near"] == "0.03"
+        assert get_network_settings("1GBIT")["max_msg_send"] == "2048"
+        assert get_network_settings("lan")["max_size_guaranteed"] == "1024"
+
+    def test_should_guarantee_bandwidth_to_the_expected_players(self):
+        """The network settings should guarantee bandwidth to the expected players."""
+        assert get_network_settings("1gbit", players="10")["min_bandwidth"] == "5120000"
+        assert get_network_settings("100mbit", players="200")["min_bandwidth"] == "80000000"
+        assert get_network_settings("100mbit", uplink="1", players="4")["min_bandwidth"] == "800000"
+        assert get_network_settings("100mbit", uplink="0.1", players="1")["min_bandwidth"] == "131072"
+
+    def test_should_honor_the_declared_uplink(self):
+        """The network settings should honor the declared uplink."""
+        settings = get_network_settings("100mbit", uplink="20")
+        assert settings["max_bandwidth"] == "20000000"
+        assert settings["max_msg_send"] == "128"
+
+    def test_should_refuse_invalid_values(self):
+        """The network settings should refuse invalid values."""
+        with pytest.raises(InvalidNetworkSettings):
+            get_network_settings("dialup")
+        with pytest.raises(InvalidNetworkSettings):
+            get_network_settings("lan", uplink="fast")
+        with pytest.raises(InvalidNetworkSettings):
+            get_network_settings("lan", players="-4")
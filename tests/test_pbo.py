@@ -0,0 +1,56 @@
+import struct
+from os.path import join
+
+import pytest
+
+from conftest import test_folder_structure_path, make_pbo, touch
+from odksm_test import ODKSMTest
+from odk_servermanager.pbo import PboFile, read_pbo_header, InvalidPbo, PBO_COMPRESSED_MAGIC
+
+
+class TestAPboFile(ODKSMTest):
+    """Test: A pbo file..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestAPboFile setup"""
+        request.cls.pbo_file = join(test_folder_structure_path(), "test.pbo")
+        make_pbo(self.pbo_file, {"config.cpp": b"class CfgPatches {};", "data\\texture.paa": b"0123456789"},
+                 {"prefix": "x\\test\\addons\\main", "Version": "1.0"})
+
+    def test_should_parse_the_header_properties_and_entries(self):
+        """A pbo file should parse the header properties and entries."""
+        with PboFile(self.pbo_file) as pbo:
+            assert pbo.header.prefix == "x\\test\\addons\\main"
+            assert pbo.header.properties["version"] == "1.0"
+            assert [(x.name, x.data_size) for x in pbo.header.entries] == [("config.cpp", 20),
+                                                                          ("data\\texture.paa", 10)]
+            assert pbo.header.entries[1].offset == pbo.header.entries[0].offset + 20
+
+    def test_should_read_only_the_requested_entry_data(self):
+        """A pbo file should read only the requested entry data."""
+        with PboFile(self.pbo_file) as pbo:
+            assert pbo.read_entry(pbo.header.find_entries("TEXTURE.paa")[0]) == b"0123456789"
+            assert pbo.read_entry(pbo.header.find_entries("config.cpp")[0]) == b"class CfgPatches {};"
+
+    def test_should_not_need_the_payload_to_parse_the_header(self):
+        """A pbo file should not need the payload to parse the header."""
+        with open(self.pbo_file, "rb") as f:
+            data = f.read()
+        header = read_pbo_header(data[:-40])
+        assert len(header.entries) == 2
+
+    def test_should_skip_compressed_entries(self):
+        """A pbo file should skip compressed entries."""
+        with PboFile(self.pbo_file) as pbo:
+            entry = pbo.header.entries[0]
+            entry.packing_method = PBO_COMPRESSED_MAGIC
+            assert pbo.read_entry(entry) is None
+
+    def test_should_refuse_empty_or_truncated_files(self):
+        """A pbo file should refuse empty or truncated files."""
+        touch(self.pbo_file)
+        with pytest.raises(InvalidPbo):
+            PboFile(self.pbo_file).__enter__()
+        with pytest.raises(InvalidPbo):
+            read_pbo_header(b"config.cpp\0" + struct.pack("<2I", 0, 1))
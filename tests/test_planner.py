@@ -0,0 +1,111 @@
+from os import mkdir
+from os.path import join
+
+import pytest
+
+from conftest import test_folder_structure_path, touch
+from odk_servermanager.config_ini import ConfigIni
+from odk_servermanager.planner import InstancesPlanner, PlanningError, MIN_MAX_MEM
+from odksm_test import ODKSMTest
+
+
+def make_instance(root: str, name: str, port: str = "", max_mem: str = "") -> str:
+    """Create an instance folder with a config.ini holding the given port and max memory."""
+    folder = join(root, name)
+    mkdir(folder)
+    bat = {}
+    if port != "":
+        bat["server_port"] = port
+    if max_mem != "":
+        bat["server_max_mem"] = max_mem
+    config_file = join(folder, "config.ini")
+    ConfigIni().create_file(config_file, {"bat": bat, "ODKSM": {"server_instance_name": name}})
+    return config_file
+
+
+class TestAnInstancesPlanner(ODKSMTest):
+    """Test: An instances planner..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestAnInstancesPlanner setup"""
+        request.cls.root = join(test_folder_structure_path(), "instances")
+        mkdir(self.root)
+
+    def test_should_read_every_instance_under_the_root(self):
+        """An instances planner should read every instance under the root."""
+        make_instance(self.root, "b", "2402", "4096")
+        make_instance(self.root, "a", "not_a_port")
+        mkdir(join(self.root, "not_an_instance"))
+        mkdir(join(self.root, "broken"))
+        touch(join(self.root, "broken", "config.ini"), "[bat]\n")
+        planner = InstancesPlanner(self.root)
+        instances = planner.read_instances()
+        assert [(x.name, x.port, x.max_mem) for x in instances] == [("a", None, None), ("b", 2402, 4096)]
+        assert len(planner.warnings) == 1 and "broken" in planner.warnings[0]
+
+    def test_should_find_colliding_port_ranges(self):
+        """An instances planner should find colliding port ranges."""
+        make_instance(self.root, "a", "2302")
+        make_instance(self.root, "b", "2306")
+        make_instance(self.root, "c", "2307")
+        make_instance(self.root, "d", "2402")
+        planner = InstancesPlanner(self.root)
+        collisions = planner.find_collisions(planner.read_instances())
+        assert [(a.name, b.name) for a, b in collisions] == [("a", "b"), ("b", "c")]
+
+    def test_should_assign_free_ranges_to_colliding_instances(self):
+        """An instances planner should assign free ranges to colliding instances."""
+        make_instance(self.root, "a", "2302")
+        make_instance(self.root, "b", "2304")
+        make_instance(self.root, "c", "2312")
+        make_instance(self.root, "d")
+        planner = InstancesPlanner(self.root, base_port=2302, port_step=10)
+        assert planner.plan_ports(planner.read_instances()) == {"b": 2322, "d": 2332}
+
+    def test_should_fit_the_max_memory_in_the_budget(self):
+        """An instances planner should fit the max memory in the budget."""
+        make_instance(self.root, "a", "2302", "8192")
+        make_instance(self.root, "b", "2312", "8192")
+        make_instance(self.root, "c", "2322")
+        planner = InstancesPlanner(self.root, memory_budget=12288)
+        plan = planner.plan_memory(planner.read_instances())
+        assert plan == {"a": 4864, "b": 4864, "c": 2304}
+        assert sum(plan.values()) <= 12288
+        planner.memory_budget = 32768
+        assert planner.plan_memory(planner.read_instances()) == {"c": 10752}
+        planner.memory_budget = MIN_MAX_MEM * 2
+        with pytest.raises(PlanningError):
+            planner.plan_memory(planner.read_instances())
+
+    def test_should_fit_the_budget_even_when_clamping_a_small_instance(self):
+        """An instances planner should fit the budget even when clamping a small instance."""
+        make_instance(self.root, "a", "2302", "8000")
+        make_instance(self.root, "b", "2312", "200")
+        planner = InstancesPlanner(self.root, memory_budget=3000)
+        plan = planner.plan_memory(planner.read_instances())
+        assert plan == {"a": 1792, "b": MIN_MAX_MEM}
+        assert sum(plan.values()) <= 3000
+
+    def test_should_leave_an_auto_max_memory_alone(self):
+        """An instances planner should leave an auto max memory alone."""
+        make_instance(self.root, "a", "2302", "auto")
+        make_instance(self.root, "b", "2312")
+        planner = InstancesPlanner(self.root, memory_budget=8192)
+        instances = planner.read_instances()
+        assert instances[0].auto_mem and not instances[1].auto_mem
+        assert planner.plan_memory(instances) == {"b": 8192}
+        assert len(planner.warnings) == 1 and "'a'" in planner.warnings[0]
+        assert "a" not in planner.plan()
+
+    def test_should_write_the_plan_back_into_the_config_files(self):
+        """An instances planner should write the plan back into the config files."""
+        config_a = make_instance(self.root, "a", "2302", "4096")
+        config_b = make_instance(self.root, "b", "2302", "4096")
+        planner = InstancesPlanner(self.root, memory_budget=16384)
+        plan = planner.plan()
+        assert plan == {"b": {"server_port": "2312"}}
+        planner.apply(plan)
+        assert ConfigIni.read_file(config_b)["bat"]["server_port"] == "2312"
+        assert ConfigIni.read_file(config_a)["bat"]["server_port"] == "2302"
+        assert planner.plan() == {}
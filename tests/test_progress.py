@@ -0,0 +1,104 @@
+import json
+from io import StringIO
+from os.path import join
+
+import pytest
+
+from conftest import test_folder_structure_path, touch
+from odksm_test import ODKSMTest
+from odk_servermanager.progress import CopyProgress, ConsoleProgressRenderer, JsonProgressWriter, format_bytes
+from odk_servermanager.utils import copytree
+
+
+class FakeClock:
+    """Manually driven clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestACopyProgress(ODKSMTest):
+    """Test: A copy progress..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request):
+        """TestACopyProgress setup"""
+        request.cls.clock = FakeClock()
+        request.cls.progress = CopyProgress(total_bytes=1000, clock=self.clock)
+
+    def test_should_compute_speed_and_eta(self):
+        """A copy progress should compute speed and eta."""
+        self.progress.start()
+        assert self.progress.eta() is None
+        self.clock.now = 2.0
+        self.progress.update("file", 250)
+        assert self.progress.bytes_per_second() == 125
+        assert self.progress.eta() == 6
+        assert self.progress.percent() == 25
+
+    def test_should_notify_its_listeners(self):
+        """A copy progress should notify its listeners."""
+        snapshots = []
+        self.progress.listeners.append(lambda p: snapshots.append(p.to_dict()))
+        self.progress.start()
+        self.progress.update("file", 1000)
+        self.progress.finish()
+        assert len(snapshots) == 3
+        assert snapshots[1]["current_file"] == "file"
+        assert snapshots[2]["done"]
+        assert snapshots[2]["percent"] == 100
+
+
+class TestTheProgressListeners(ODKSMTest):
+    """Test: The progress listeners..."""
+
+    def test_console_renderer_should_throttle_and_render_a_line(self):
+        """The progress listeners console renderer should throttle and render a line."""
+        clock = FakeClock()
+        stream = StringIO()
+        progress = CopyProgress(total_bytes=2048, clock=clock,
+                                listeners=[ConsoleProgressRenderer(stream=stream, min_interval=1, clock=clock)])
+        progress.start()
+        clock.now = 0.5
+        progress.update("file", 1024)  # throttled
+        clock.now = 1.5
+        progress.update("file", 1024)
+        progress.finish()
+        lines = stream.getvalue().split("\r")[1:]
+        assert len(lines) == 3
+        assert "100.0%" in lines[-1] and lines[-1].endswith("\n")
+
+    def test_json_writer_should_dump_a_snapshot(self, reset_folder_structure):
+        """The progress listeners json writer should dump a snapshot."""
+        json_file = join(test_folder_structure_path(), "progress.json")
+        progress = CopyProgress(total_bytes=10, listeners=[JsonProgressWriter(json_file)])
+        progress.start()
+        progress.update("file", 10)
+        progress.finish()
+        with open(json_file, "r") as f:
+            data = json.load(f)
+        assert data["copied_bytes"] == 10
+        assert data["done"]
+
+    def test_should_format_bytes(self):
+        """The progress listeners should format bytes."""
+        assert format_bytes(512) == "512.0 B"
+        assert format_bytes(1536) == "1.5 KB"
+        assert format_bytes(3 * 1024 ** 3) == "3.0 GB"
+
+
+class TestACopyWithProgress(ODKSMTest):
+    """Test: A copy with progress..."""
+
+    def test_should_report_every_copied_byte(self, reset_folder_structure):
+        """A copy with progress should report every copied byte."""
+        test_path = test_folder_structure_path()
+        reported = []
+        copytree(join(test_path, "TestFolder1"), join(test_path, "TestFolderCopy"),
+                 progress_callback=lambda f, b: reported.append((f, b)))
+        assert len(reported) == 1
+        assert reported[0][0].endswith("testFile1.txt")
+        assert reported[0][1] == 5
@@ -63,6 +63,62 @@ class TestWhenParsingCmdLine:
         assert opts["config_file"] == abs_config_file
         assert opts["op"] == "manage"
 
+    def test_should_accept_a_base_instance_to_clone_from(self, mocker):
+        """When parsing cmd line should accept a base instance to clone from."""
+        abs_config_file = join(getcwd(), "config.ini")
+        base_instance = join(getcwd(), "__server__base")
+        mocker.patch("sys.argv", ["run.py", "--manage", abs_config_file, "--clone-from", base_instance])
+        opts = parse_cmdline()
+        assert opts["op"] == "manage"
+        assert opts["base_instance"] == base_instance
+
+    def test_should_recognize_the_check_parameter_and_the_repair_flag(self, mocker):
+        """When parsing cmd line should recognize the check parameter and the repair flag."""
+        abs_config_file = join(getcwd(), "config.ini")
+        mocker.patch("sys.argv", ["run.py", "--check", abs_config_file])
+        opts = parse_cmdline()
+        assert opts["op"] == "check" and opts["config_file"] == abs_config_file and not opts["repair"]
+        mocker.patch("sys.argv", ["run.py", "--check", abs_config_file, "--repair"])
+        assert parse_cmdline()["repair"]
+
+    def test_should_recognize_the_bulk_config_parameter(self, mocker):
+        """When parsing cmd line should recognize the bulk config parameter."""
+        csv_file = join(getcwd(), "events.csv")
+        mocker.patch("sys.argv", ["run.py", "--bulk-config", csv_file, "--output", "events"])
+        opts = parse_cmdline()
+        assert opts["op"] == "bulk_config" and opts["config_file"] == csv_file
+        assert opts["output"] == join(getcwd(), "events") and opts["defaults"] is None
+        mocker.patch("sys.argv", ["run.py", "--bulk-config", csv_file])
+        with pytest.raises(SystemExit, match="2"):
+            parse_cmdline()
+
+    def test_should_recognize_the_bulk_bootstrap_parameter(self, mocker):
+        """When parsing cmd line should recognize the bulk bootstrap parameter."""
+        manifest_file = join(getcwd(), "manifest.csv")
+        defaults = join(getcwd(), "bootstrap.ini")
+        mocker.patch("sys.argv", ["run.py", "--bulk-bootstrap", manifest_file, "--defaults", defaults])
+        opts = parse_cmdline()
+        assert opts["op"] == "bulk_bootstrap" and opts["config_file"] == manifest_file
+        assert opts["defaults"] == defaults and opts["workers"] == 4
+        mocker.patch("sys.argv", ["run.py", "--bulk-bootstrap", manifest_file])
+        with pytest.raises(SystemExit, match="2"):
+            parse_cmdline()
+
+    def test_should_recognize_the_plan_parameter(self, mocker):
+        """When parsing cmd line should recognize the plan parameter."""
+        mocker.patch("sys.argv", ["run.py", "--plan", "instances", "--memory-budget", "16384", "--apply"])
+        opts = parse_cmdline()
+        assert opts["op"] == "plan" and opts["instances_root"] == join(getcwd(), "instances")
+        assert opts["memory_budget"] == 16384 and opts["apply"]
+
+    def test_should_recognize_the_supervise_parameter(self, mocker):
+        """When parsing cmd line should recognize the supervise parameter."""
+        abs_config_file = join(getcwd(), "config.ini")
+        mocker.patch("sys.argv", ["run.py", "--supervise", abs_config_file, "--max-restarts", "3"])
+        opts = parse_cmdline()
+        assert opts["op"] == "supervise" and opts["config_file"] == abs_config_file
+        assert opts["server_binary"] == "arma3server_x64" and opts["max_restarts"] == 3
+
 
 class TestWhenRunningTheTool:
     """Test: When running the tool..."""
@@ -78,6 +134,15 @@ class TestWhenRunningTheTool:
         # check that manage_instance has been called correctly
         assert call().manage_instance(abs_config_file) in sm.method_calls
 
+    def test_should_call_manage_with_the_base_instance_when_cloning(self, mocker):
+        """When running the tool should call manage with the base instance when cloning."""
+        abs_config_file = join(getcwd(), "config.ini")
+        base_instance = join(getcwd(), "__server__base")
+        mocker.patch("sys.argv", ["run.py", "--manage", abs_config_file, "--clone-from", base_instance])
+        sm = mocker.patch("run.ServerManager", autospec=True)
+        run()
+        assert call().manage_instance(abs_config_file, base_instance=base_instance) in sm.method_calls
+
     def test_it_should_pick_up_debug_flags(self, mocker):
         """When running the tool it should pick up debug flags."""
         abs_config_file = join(getcwd(), "config.ini")
@@ -86,6 +151,23 @@ class TestWhenRunningTheTool:
         run()
         sm.assert_called_once_with(debug_logs_path="this_file")
 
+    def test_it_should_pick_up_the_progress_json_path(self, mocker):
+        """When running the tool it should pick up the progress json path."""
+        abs_config_file = join(getcwd(), "config.ini")
+        abs_progress_file = join(getcwd(), "progress.json")
+        mocker.patch("sys.argv", ["run.py", "--manage", abs_config_file, "--progress-json", abs_progress_file])
+        sm = mocker.patch("run.ServerManager", autospec=True)
+        run()
+        sm.assert_called_once_with(progress_json_path=abs_progress_file)
+
+    def test_should_call_check_when_so_instructed(self, mocker):
+        """When running the tool should call check when so instructed."""
+        abs_config_file = join(getcwd(), "config.ini")
+        mocker.patch("sys.argv", ["run.py", "--check", abs_config_file, "--repair"])
+        sm = mocker.patch("run.ServerManager", autospec=True)
+        run()
+        assert call().check_instance(abs_config_file, repair=True) in sm.method_calls
+
     def test_should_call_bootstrap_with_a_config_file_when_instructed_to_do_so(self, mocker):
         """When running the tool should call bootstrap with a config file when instructed to do so."""
         abs_config_file = join(getcwd(), "config.ini")
@@ -94,3 +176,39 @@ class TestWhenRunningTheTool:
         run()
         sm.assert_called_once()
         assert call().bootstrap(abs_config_file) in sm.method_calls
+
+    def test_should_call_bulk_create_configs_when_instructed_to_do_so(self, mocker):
+        """When running the tool should call bulk create configs when instructed to do so."""
+        csv_file = join(getcwd(), "events.csv")
+        defaults = join(getcwd(), "defaults.ini")
+        mocker.patch("sys.argv", ["run.py", "--bulk-config", csv_file, "--output", "events", "--defaults", defaults])
+        sm = mocker.patch("run.ServerManager", autospec=True)
+        run()
+        assert call().bulk_create_configs(csv_file, join(getcwd(), "events"), default_config_file=defaults) \
+            in sm.method_calls
+
+    def test_should_call_bulk_bootstrap_when_instructed_to_do_so(self, mocker):
+        """When running the tool should call bulk bootstrap when instructed to do so."""
+        manifest_file = join(getcwd(), "manifest.json")
+        defaults = join(getcwd(), "bootstrap.ini")
+        mocker.patch("sys.argv", ["run.py", "--bulk-bootstrap", manifest_file, "--defaults", defaults,
+                                  "--workers", "8"])
+        sm = mocker.patch("run.ServerManager", autospec=True)
+        run()
+        assert call().bulk_bootstrap(manifest_file, defaults, workers=8) in sm.method_calls
+
+    def test_should_call_plan_instances_when_instructed_to_do_so(self, mocker):
+        """When running the tool should call plan instances when instructed to do so."""
+        mocker.patch("sys.argv", ["run.py", "--plan", "instances"])
+        sm = mocker.patch("run.ServerManager", autospec=True)
+        run()
+        assert call().plan_instances(join(getcwd(), "instances"), memory_budget=None, apply=False) in sm.method_calls
+
+
+    def test_should_call_supervise_instance_when_instructed_to_do_so(self, mocker):
+        """When running the tool should call supervise instance when instructed to do so."""
+        abs_config_file = join(getcwd(), "config.ini")
+        mocker.patch("sys.argv", ["run.py", "--supervise", abs_config_file, "--server-binary", "stub"])
+        sm = mocker.patch("run.ServerManager", autospec=True)
+        run()
+        assert call().supervise_instance(abs_config_file, executable="stub", max_restarts=None) in sm.method_calls
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from odksm_test import ODKSMTest
+from odk_servermanager.scheduler import HookResources, ModOpScheduler
+
+
+class TestHookResources(ODKSMTest):
+    """Test: Hook Resources..."""
+
+    def test_should_conflict_only_when_writing_a_path_the_other_touches(self):
+        """Hook resources should conflict only when writing a path the other touches."""
+        workshop_reader = HookResources(reads=["/arma/!Workshop/@ace"], writes=["/instance/!Mods_linked/@ace"])
+        other_reader = HookResources(reads=["/arma/!Workshop/@ace"], writes=["/instance/!Mods_linked/@CBA_A3"])
+        folder_writer = HookResources(writes=["/instance/!Mods_linked"])
+        assert not workshop_reader.conflicts_with(other_reader)
+        assert folder_writer.conflicts_with(workshop_reader)
+        assert workshop_reader.conflicts_with(folder_writer)
+        assert not HookResources(writes=["/instance/!Mods"]).conflicts_with(folder_writer)
+
+    def test_should_always_conflict_when_not_thread_safe(self):
+        """Hook resources should always conflict when not thread safe."""
+        unsafe = HookResources(thread_safe=False)
+        assert unsafe.conflicts_with(HookResources())
+        assert HookResources().conflicts_with(unsafe)
+        assert not HookResources().merge(unsafe).thread_safe
+
+
+class TestAModOpScheduler(ODKSMTest):
+    """Test: A ModOp Scheduler..."""
+
+    @staticmethod
+    def _job(name: str, log: list, wait: float = 0.0):
+        def job():
+            log.append(("start", name))
+            time.sleep(wait)
+            log.append(("end", name))
+        return job
+
+    def test_should_run_jobs_one_after_the_other_by_default(self):
+        """A ModOp scheduler should run jobs one after the other by default."""
+        log = []
+        ModOpScheduler().run([(HookResources(), self._job("a", log)), (HookResources(), self._job("b", log))])
+        assert log == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b")]
+
+    def test_should_run_non_conflicting_jobs_at_the_same_time(self):
+        """A ModOp scheduler should run non conflicting jobs at the same time."""
+        barrier = threading.Barrier(2, timeout=5)
+        jobs = [(HookResources(writes=["/a"]), lambda: barrier.wait()),
+                (HookResources(writes=["/b"]), lambda: barrier.wait())]
+        ModOpScheduler(max_workers=2).run(jobs)
+
+    def test_should_serialize_conflicting_jobs_keeping_their_order(self):
+        """A ModOp scheduler should serialize conflicting jobs keeping their order."""
+        log = []
+        ModOpScheduler(max_workers=4).run([
+            (HookResources(writes=["/shared"]), self._job("first", log, 0.05)),
+            (HookResources(writes=["/other"]), self._job("free", log)),
+            (HookResources(reads=["/shared/file"]), self._job("second", log)),
+            (HookResources(thread_safe=False), self._job("alone", log))])
+        assert log.index(("end", "first")) < log.index(("start", "second"))
+        assert log.index(("end", "second")) < log.index(("start", "alone"))
+        assert log.index(("end", "free")) < log.index(("start", "alone"))
+        assert log.index(("start", "free")) < log.index(("end", "first"))
+
+    def test_should_raise_the_first_error_and_stop_scheduling(self):
+        """A ModOp scheduler should raise the first error and stop scheduling."""
+        log = []
+
+        def broken():
+            raise ValueError("broken")
+        with pytest.raises(ValueError):
+            ModOpScheduler(max_workers=2).run([(HookResources(writes=["/a"]), broken),
+                                               (HookResources(writes=["/a"]), self._job("never", log))])
+        assert log == []
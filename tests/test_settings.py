@@ -1,7 +1,8 @@
 import pytest
 from box import Box
 
-from odk_servermanager.settings import ServerConfigSettings, ServerBatSettings, ServerInstanceSettings, ModFixSettings
+from odk_servermanager.settings import ServerConfigSettings, ServerBatSettings, ServerInstanceSettings, ModFixSettings, \
+    ModList, InvalidSettings, validate_config_data
 
 
 class TestAServerConfigSettings:
@@ -122,6 +123,7 @@ class TestAServerInstanceSettings:
         assert isinstance(si.fix_settings, ModFixSettings)
         assert si.fix_settings.enabled_fixes == []
         assert si.fix_settings.mod_fix_settings == {}
+        assert si.mods_workers == 1
 
     def test_should_set_its_fields(self):
         """A server instance settings should set its fields."""
@@ -157,6 +159,35 @@ class TestAServerInstanceSettings:
         assert si.server_drive == "c:"  # this is computed
         assert si.fix_settings == self.mf
 
+    def test_should_keep_mods_lists_as_mod_lists(self):
+        """A server instance settings should keep mods lists as mod lists."""
+        si = ServerInstanceSettings("testing", bat_settings=self.sb, config_settings=self.sc, arma_folder="arma",
+                                    user_mods_list=["ace"])
+        assert isinstance(si.user_mods_list, ModList)
+        si.user_mods_list = si.user_mods_list + ["CBA_A3"]
+        assert isinstance(si.user_mods_list, ModList) and "CBA_A3" in si.user_mods_list
+        copy = si.copy()
+        copy.user_mods_list.append("ODKAI")
+        assert "ODKAI" in copy.user_mods_list and "ODKAI" not in si.user_mods_list
+
+    def test_should_report_every_invalid_value_at_once(self):
+        """A server instance settings should report every invalid value at once."""
+        with pytest.raises(InvalidSettings) as err:
+            ServerInstanceSettings("bad/name", bat_settings=self.sc, config_settings=self.sc, arma_folder="arma",
+                                   user_mods_list="ace", mods_workers="none")
+        for field in ["server_instance_name", "bat_settings", "user_mods_list", "mods_workers"]:
+            assert field in err.value.args[0]
+
+    def test_should_report_invalid_cpus_and_network_settings(self):
+        """A server instance settings should report invalid cpus and network settings."""
+        for fields, field in [({"server_cpus": "3-1"}, "server_cpus"), ({"network_profile": "dialup"}, "dialup"),
+                              ({"network_profile": "lan", "network_uplink": "fast"}, "network_uplink"),
+                              ({"network_profile": "lan", "network_players": "-4"}, "network_players")]:
+            sb = ServerBatSettings("title", "2302", "server.config", "server.cfg", "8192", **fields)
+            with pytest.raises(InvalidSettings) as err:
+                ServerInstanceSettings("testing", bat_settings=sb, config_settings=self.sc, arma_folder="arma")
+            assert field in err.value.args[0]
+
     def test_should_accept_other_settings_container(self):
         """A server instance settings should accept other settings container."""
         si = ServerInstanceSettings("testing", bat_settings=self.sb, config_settings=self.sc)
@@ -188,3 +219,35 @@ class TestAModFixSettings:
         mf = ModFixSettings(enabled_fixes=enabled_fixes, mod_fix_settings=mod_fix_settings)
         assert mf.enabled_fixes == enabled_fixes
         assert mf.mod_fix_settings == mod_fix_settings
+
+
+class TestAModList:
+    """Test: A ModList..."""
+
+    def test_should_keep_its_membership_view_up_to_date(self):
+        """A mod list should keep its membership view up to date."""
+        mods = ModList(["ace", "CBA_A3"])
+        assert "ace" in mods and "ODKAI" not in mods
+        mods.append("ODKAI")
+        mods.remove("ace")
+        assert "ODKAI" in mods and "ace" not in mods
+        mods += ["AdvProp"]
+        mods[0] = "ODKMIN"
+        assert "AdvProp" in mods and "ODKMIN" in mods and "CBA_A3" not in mods
+        del mods[0]
+        mods.clear()
+        assert "ODKAI" not in mods and mods == []
+
+
+class TestTheConfigDataValidation:
+    """Test: The config data validation..."""
+
+    def test_should_report_every_missing_field_at_once(self):
+        """The config data validation should report every missing field at once."""
+        data = {"ODKSM": {}, "bat": {"server_title": "title", "server_config_file_name": "", "server_cfg_file_name": ""},
+                "config": {"hostname": "host", "password_admin": "admin", "mission_template": "m"}}
+        with pytest.raises(InvalidSettings) as err:
+            validate_config_data(data)
+        for field in ["server_instance_name", "server_port", "server_max_mem", "password"]:
+            assert "'{}'".format(field) in err.value.args[0]
+        assert "hostname" not in err.value.args[0]
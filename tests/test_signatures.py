@@ -0,0 +1,52 @@
+from os import mkdir
+from os.path import join, isfile
+from unittest.mock import patch
+
+import pytest
+
+from conftest import test_folder_structure_path, touch
+from odksm_test import ODKSMTest
+from odk_servermanager.signatures import SignaturesVerifier, read_authority, InvalidSignatureFile
+
+
+class TestASignaturesVerifier(ODKSMTest):
+    """Test: A signatures verifier..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestASignaturesVerifier setup"""
+        request.cls.test_path = test_folder_structure_path()
+        cba_folder = join(self.test_path, "!Workshop", "@CBA_A3")
+        mkdir(join(cba_folder, "addons"))
+        for pbo in ["cba_main.pbo", "cba_xeh.pbo", "cba_unsigned.pbo"]:
+            touch(join(cba_folder, "addons", pbo))
+        for pbo in ["cba_main.pbo", "cba_xeh.pbo"]:
+            touch(join(cba_folder, "addons", pbo + ".cba_3.14.0.200207-215118a2.bisign"),
+                  "cba_3.14.0.200207-215118a2\0signature")
+
+    def test_should_read_the_authority_of_keys_and_signatures(self):
+        """A signatures verifier should read the authority of keys and signatures."""
+        key = join(self.test_path, "!Workshop", "@ace", "keys", "ace_3.13.0.45.bikey")
+        assert read_authority(key) == "ace_3.13.0.45-d0601857"
+        touch(key, "no authority here")
+        with pytest.raises(InvalidSignatureFile):
+            read_authority(key)
+
+    def test_should_find_pbos_without_a_matching_signature(self):
+        """A signatures verifier should find pbos without a matching signature."""
+        results = SignaturesVerifier(self.test_path).verify_mods(["CBA_A3", "ace", "CBA_A3"])
+        assert [x.mod_name for x in results] == ["CBA_A3", "ace"]
+        assert results[0].keys == ["cba_3.14.0.200207-215118a2"]
+        assert results[0].bad_pbos == ["cba_unsigned.pbo"]
+        assert results[1].bad_pbos == []
+
+    def test_should_cache_the_authorities_by_file_fingerprint(self):
+        """A signatures verifier should cache the authorities by file fingerprint."""
+        verifier = SignaturesVerifier(self.test_path)
+        verifier.verify_mods(["CBA_A3"])
+        verifier.save()
+        assert isfile(join(self.test_path, "__odksm__", "signatures_cache.json"))
+        with patch("odk_servermanager.signatures.read_authority") as read_authority_fun:
+            results = SignaturesVerifier(self.test_path).verify_mods(["CBA_A3"])
+        read_authority_fun.assert_not_called()
+        assert results[0].bad_pbos == ["cba_unsigned.pbo"]
@@ -0,0 +1,104 @@
+import os
+import sys
+from os.path import isfile, join
+from threading import Thread, Timer
+from unittest.mock import call
+
+import pytest
+
+from conftest import test_folder_structure_path, test_resources
+from odk_servermanager.supervisor import ServerSupervisor
+from odksm_test import ODKSMTest
+
+stub_server = join(test_resources, "stub_server.py")
+
+
+class TestAServerSupervisor(ODKSMTest):
+    """Test: A server supervisor..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestAServerSupervisor setup"""
+        request.cls.test_path = test_folder_structure_path()
+        request.cls.log_file = join(self.test_path, "server.log")
+        request.cls.command = [sys.executable, os.path.abspath(stub_server), "-port=2302"]
+
+    def _read_log(self) -> str:
+        """Return the content of the log file."""
+        with open(self.log_file, "r") as f:
+            return f.read()
+
+    def test_should_log_the_server_output(self):
+        """A server supervisor should log the server output."""
+        supervisor = ServerSupervisor(self.command, self.test_path, self.log_file, max_restarts=0)
+        assert supervisor.run() == 0
+        log = self._read_log()
+        assert "args: -port=2302" in log
+        assert "[ODKSM] The server exited." in log and "No restarts left" in log
+
+    def test_should_restart_a_crashing_server_with_backoff(self, monkeypatch, mocker):
+        """A server supervisor should restart a crashing server with backoff."""
+        monkeypatch.setenv("ODKSM_STUB_EXIT_CODE", "3")
+        supervisor = ServerSupervisor(self.command, self.test_path, self.log_file, max_restarts=3, backoff_start=5,
+                                      backoff_max=12)
+        wait = mocker.patch.object(supervisor._stopping, "wait", return_value=False)
+        assert supervisor.run() == 3
+        assert wait.call_args_list == [call(5), call(10), call(12)]
+        assert supervisor.restarts == 3
+        log = self._read_log()
+        assert log.count("args: -port=2302") == 4 and log.count("crashed with exit code 3") == 4
+
+    def test_should_reset_the_backoff_once_the_server_was_stable(self, mocker):
+        """A server supervisor should reset the backoff once the server was stable."""
+        supervisor = ServerSupervisor(self.command, self.test_path, self.log_file, max_restarts=2, backoff_start=5,
+                                      stable_after=0)
+        wait = mocker.patch.object(supervisor._stopping, "wait", return_value=False)
+        supervisor.run()
+        assert wait.call_args_list == [call(5), call(5)]
+
+    def test_should_rotate_the_log_files(self, monkeypatch):
+        """A server supervisor should rotate the log files."""
+        monkeypatch.setenv("ODKSM_STUB_LINES", "200")
+        supervisor = ServerSupervisor(self.command, self.test_path, self.log_file, max_restarts=0,
+                                      log_max_bytes=2048, log_backups=2)
+        supervisor.run()
+        assert isfile(self.log_file + ".1") and isfile(self.log_file + ".2")
+        assert not isfile(self.log_file + ".3")
+        assert "line 000199" in self._read_log()
+
+    @pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="Linux only")
+    def test_should_apply_the_cpu_affinity_and_the_memory_limit(self):
+        """A server supervisor should apply the cpu affinity and the memory limit."""
+        supervisor = ServerSupervisor(self.command, self.test_path, self.log_file, max_restarts=0, cpus=[0],
+                                      memory_limit=4096)
+        supervisor.run()
+        log = self._read_log()
+        assert "affinity: 0\n" in log and "data limit: {}".format(4096 * 1024 ** 2) in log
+
+    def test_should_stop_the_server_without_restarting_it(self, monkeypatch):
+        """A server supervisor should stop the server without restarting it."""
+        monkeypatch.setenv("ODKSM_STUB_SLEEP", "30")
+        supervisor = ServerSupervisor(self.command, self.test_path, self.log_file)
+        Timer(0.5, supervisor.stop).start()
+        supervisor.run()
+        assert supervisor.restarts == 0
+        assert "Restarting" not in self._read_log()
+
+    def test_should_stop_without_waiting_for_the_process_lock(self, monkeypatch):
+        """A server supervisor should stop without waiting for the process lock."""
+        monkeypatch.setenv("ODKSM_STUB_SLEEP", "30")
+        supervisor = ServerSupervisor(self.command, self.test_path, self.log_file)
+        with supervisor._process_lock:
+            # like a signal handler interrupting _run_once while it's starting the server
+            stopper = Thread(target=supervisor.stop, daemon=True)
+            stopper.start()
+            stopper.join(5)
+            assert not stopper.is_alive()
+        assert supervisor.run() is None
+        assert "args: -port=2302" not in self._read_log()
+
+    def test_should_give_up_if_the_server_can_not_start(self):
+        """A server supervisor should give up if the server can not start."""
+        supervisor = ServerSupervisor([join(self.test_path, "missing")], self.test_path, self.log_file)
+        assert supervisor.run() is None
+        assert "Could not start the server" in self._read_log()
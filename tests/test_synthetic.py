@@ -0,0 +1,100 @@
+from os import stat
+from os.path import isdir, isfile, join
+
+import pytest
+
+from conftest import test_folder_structure_path
+from odksm_test import ODKSMTest
+from odk_servermanager.instance import ServerInstance
+from odk_servermanager.manager import ServerManager
+from odk_servermanager.settings import ServerInstanceSettings
+from odk_servermanager.signatures import SignaturesVerifier
+from odk_servermanager.utils import symlink
+from odk_servermanager.workshop import WorkshopIndex, ModDependencyGraph
+from synthetic import build_arma_root, KEY_LAYOUTS
+
+
+class TestTheSyntheticArmaGenerator(ODKSMTest):
+    """Test: The synthetic Arma generator..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestTheSyntheticArmaGenerator setup"""
+        request.cls.root = join(test_folder_structure_path(), "Synthetic")
+        request.cls.arma = build_arma_root(self.root, mods_count=8, pbos_per_mod=2, files_per_mod=5,
+                                           pbo_size=64 * 1024 * 1024, chained=True)
+
+    def test_should_build_every_mod_with_every_key_layout(self):
+        """The synthetic Arma generator should build every mod with every key layout."""
+        assert len(self.arma.mods) == 8
+        assert {mod.key_layout for mod in self.arma.mods} == set(KEY_LAYOUTS)
+        for mod in self.arma.mods:
+            assert isdir(join(mod.folder, mod.key_layout))
+            assert isfile(join(mod.folder, "mod.cpp"))
+        assert self.arma.files_count == 8 * (2 + 2 * 2 + 5)
+        assert isfile(join(self.root, "Keys", "a3.bikey"))
+
+    def test_should_write_sparse_pbos_that_can_be_indexed(self):
+        """The synthetic Arma generator should write sparse pbos that can be indexed."""
+        mod = self.arma.mods[1]
+        pbo = join(mod.folder, "addons", mod.addons[0] + ".pbo")
+        assert stat(pbo).st_size == 64 * 1024 * 1024
+        records = WorkshopIndex(self.root).get_all_mods()
+        assert records[mod.name]["pbos"][mod.addons[0] + ".pbo"]["provided_addons"] == [mod.addons[0]]
+        graph = ModDependencyGraph(records, self.arma.mods_names)
+        assert graph.dependencies[mod.name] == {self.arma.mods[0].name}
+
+    def test_should_sign_the_pbos_with_the_mod_key(self):
+        """The synthetic Arma generator should sign the pbos with the mod key."""
+        results = SignaturesVerifier(self.root).verify_mods(self.arma.mods_names)
+        for mod, result in zip(self.arma.mods, results):
+            if mod.key_layout.lower() in ("keys", "key"):
+                assert result.keys == [mod.authority] and result.bad_pbos == []
+
+    def test_should_write_a_matching_preset(self):
+        """The synthetic Arma generator should write a matching preset."""
+        preset = join(self.root, "preset.html")
+        self.arma.write_preset(preset, self.arma.mods_names[:3])
+        assert ServerManager()._parse_mods_preset(preset) == self.arma.mods_names[:3]
+
+
+class TestAtScale(ODKSMTest):
+    """Test: At scale..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure, sc_stub, sb_stub):
+        """TestAtScale setup"""
+        request.cls.sc = sc_stub
+        request.cls.sb = sb_stub
+
+    def _init_instance(self, mods_count: int, mocker) -> int:
+        """Init the mods of an instance on a synthetic root and return how many symlinks it took."""
+        root = join(test_folder_structure_path(), "Synthetic{}".format(mods_count))
+        arma = build_arma_root(root, mods_count=mods_count, key_layouts=["Keys"])
+        settings = ServerInstanceSettings("scale", self.sb, self.sc, arma_folder=root, server_instance_root=root,
+                                          user_mods_list=arma.mods_names, mods_to_be_copied=arma.mods_names[:2])
+        instance = ServerInstance(settings)
+        symlink_fun = mocker.patch("odk_servermanager.instance.symlink", side_effect=symlink)
+        instance._new_server_folder()
+        instance._prepare_server_core()
+        instance._start_op_on_mods("init", arma.mods_names)
+        instance._link_keys()
+        return symlink_fun.call_count
+
+    def test_init_cost_should_grow_linearly_with_the_mods(self, mocker):
+        """At scale init cost should grow linearly with the mods."""
+        small = self._init_instance(20, mocker)
+        big = self._init_instance(40, mocker)
+        huge = self._init_instance(80, mocker)
+        assert big - small == (huge - big) / 2
+
+    def test_the_workshop_index_should_parse_every_pbo_only_once(self, mocker):
+        """At scale the workshop index should parse every pbo only once."""
+        root = join(test_folder_structure_path(), "Synthetic")
+        arma = build_arma_root(root, mods_count=60, pbos_per_mod=5)
+        index = WorkshopIndex(root)
+        index_pbo = mocker.patch.object(index, "_index_pbo", wraps=index._index_pbo)
+        index.get_mods(arma.mods_names)
+        assert index_pbo.call_count == 60 * 5
+        index.get_mods(arma.mods_names)
+        assert index_pbo.call_count == 60 * 5
@@ -1,11 +1,12 @@
-from os import mkdir
+from os import mkdir, remove
 
 import pytest
 
 from conftest import test_folder_structure_path, test_resources, touch
 from os.path import islink, isfile, join, abspath
 
-from odk_servermanager.utils import symlink, compile_from_template, symlink_everything_from_folder
+from odk_servermanager.utils import symlink, compile_from_template, symlink_everything_from_folder, clonetree, \
+    sync_overlay, get_host_memory, parse_cpu_list, InvalidCpuList
 from odksm_test import ODKSMTest
 
 
@@ -92,3 +93,79 @@ class TestSymlinkEverythingFromDir(ODKSMTest):
         assert islink(join(self.target, "folderC"))
         assert isfile(join(self.target, "folderC", "testB"))
         assert islink(join(self.target, "testC"))
+
+
+class TestSyncOverlay(ODKSMTest):
+    """Test: SyncOverlay..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestSyncOverlay setup"""
+        request.cls.test_path = test_folder_structure_path()
+        request.cls.target = join(self.test_path, "folderT")
+        request.cls.origin = join(self.test_path, "folderA")
+        mkdir(self.origin)
+        mkdir(join(self.origin, "oddKeys"))
+        touch(join(self.origin, "oddKeys", "key.bikey"))
+        touch(join(self.origin, "testA"))
+
+    def test_should_create_the_overlay_with_its_aliases(self):
+        """Sync overlay should create the overlay with its aliases."""
+        changed = sync_overlay(self.origin, self.target, {"Keys": "oddKeys", "Missing": "notThere"})
+        assert sorted(changed) == ["Keys", "oddKeys", "testA"]
+        assert not islink(self.target)
+        assert islink(join(self.target, "oddKeys")) and islink(join(self.target, "testA"))
+        assert isfile(join(self.target, "Keys", "key.bikey"))
+        assert not islink(join(self.target, "Missing"))
+
+    def test_should_only_touch_the_entries_that_changed(self):
+        """Sync overlay should only touch the entries that changed."""
+        sync_overlay(self.origin, self.target, {"Keys": "oddKeys"})
+        touch(join(self.origin, "testB"))
+        remove(join(self.origin, "testA"))
+        touch(join(self.target, "leftover"))
+        mkdir(join(self.target, "leftoverFolder"))
+        changed = sync_overlay(self.origin, self.target, {"Keys": "oddKeys"})
+        assert sorted(changed) == ["leftover", "leftoverFolder", "testA", "testB"]
+        assert islink(join(self.target, "testB"))
+        for name in ["testA", "leftover", "leftoverFolder"]:
+            assert not islink(join(self.target, name)) and not isfile(join(self.target, name))
+        assert sync_overlay(self.origin, self.target, {"Keys": "oddKeys"}) == []
+
+
+class TestCloneTree(ODKSMTest):
+    """Test: CloneTree..."""
+
+    def test_should_clone_files_and_preserve_symlinks(self, reset_folder_structure):
+        """Clone tree should clone files and preserve symlinks."""
+        test_path = test_folder_structure_path()
+        origin = join(test_path, "folderA")
+        target = join(test_path, "folderB")
+        mkdir(origin)
+        touch(join(origin, "testA"), "content")
+        symlink(join(test_path, "TestFolder1"), join(origin, "linked"))
+        clonetree(origin, target)
+        assert isfile(join(target, "testA")) and not islink(join(target, "testA"))
+        with open(join(target, "testA"), "r") as f:
+            assert f.read() == "content"
+        assert islink(join(target, "linked"))
+
+
+class TestGetHostMemory:
+    """Test: Get host memory..."""
+
+    def test_should_return_the_physical_memory(self, mocker):
+        """Get host memory should return the physical memory."""
+        assert get_host_memory() > 0
+        mocker.patch("os.sysconf", side_effect=lambda name: {"SC_PAGE_SIZE": 4096, "SC_PHYS_PAGES": 1024}[name])
+        assert get_host_memory() == 4096 * 1024
+
+
+def test_cpu_lists_should_be_parsed():
+    """Cpu lists should be parsed."""
+    assert parse_cpu_list("") == []
+    assert parse_cpu_list("0-3, 8,2") == [0, 1, 2, 3, 8]
+    with pytest.raises(InvalidCpuList):
+        parse_cpu_list("3-1")
+    with pytest.raises(InvalidCpuList):
+        parse_cpu_list("a")
@@ -0,0 +1,156 @@
+from os import mkdir
+from os.path import join, isfile
+from unittest.mock import patch
+
+import pytest
+
+from conftest import test_folder_structure_path, make_pbo, make_rapified_cfg_patches, touch
+from odksm_test import ODKSMTest
+from odk_servermanager.arma_config import get_cfg_patches, parse_mod_cpp
+from odk_servermanager.workshop import WorkshopIndex, ModDependencyGraph, find_addon_conflicts
+
+
+def add_mod(arma_folder: str, mod_name: str, patches, config_name: str = "config.bin") -> None:
+    """Create a mod in the !Workshop folder with a single pbo providing the given CfgPatches."""
+    addons_folder = join(arma_folder, "!Workshop", "@" + mod_name, "addons")
+    mkdir(join(arma_folder, "!Workshop", "@" + mod_name))
+    mkdir(addons_folder)
+    if config_name == "config.bin":
+        config = make_rapified_cfg_patches(patches)
+    else:
+        config = "class CfgPatches {{ {} }};".format(" ".join(
+            "class {} {{ units[] = {{}}; requiredAddons[] = {{{}}}; }};".format(
+                name, ", ".join("\"{}\"".format(x) for x in required)) for name, required in patches.items())).encode()
+    make_pbo(join(addons_folder, mod_name.lower() + ".pbo"), {config_name: config}, {"prefix": mod_name.lower()})
+
+
+class TestTheArmaConfigParser(ODKSMTest):
+    """Test: The arma config parser..."""
+
+    def test_should_read_cfg_patches_from_a_rapified_config(self):
+        """The arma config parser should read cfg patches from a rapified config."""
+        data = make_rapified_cfg_patches({"mod_a_main": ["A3_Data_F"], "mod_a_extra": ["mod_a_main", "cba_main"]})
+        assert get_cfg_patches(data) == {"mod_a_main": ["A3_Data_F"], "mod_a_extra": ["mod_a_main", "cba_main"]}
+
+    def test_should_read_cfg_patches_from_a_text_config(self):
+        """The arma config parser should read cfg patches from a text config."""
+        text = b"""
+        // a comment with class Fake {
+        class CfgPatches {
+            class mod_b_main : Base {
+                units[] = {};
+                requiredAddons[] = {"cba_main", "A3_Data_F"};
+                class Nested { requiredAddons[] = {"nope"}; };
+            };
+            class mod_b_empty {};
+        };
+        class CfgVehicles { class Car; };
+        """
+        assert get_cfg_patches(text) == {"mod_b_main": ["cba_main", "A3_Data_F"], "mod_b_empty": []}
+
+    def test_should_parse_a_mod_cpp(self):
+        """The arma config parser should parse a mod cpp."""
+        meta = parse_mod_cpp('protocol = 1;\npublishedid = 450814997;\nname = "CBA_A3 ""quoted""";\n')
+        assert meta == {"protocol": "1", "publishedid": "450814997", "name": "CBA_A3 \"quoted\""}
+
+
+class TestAWorkshopIndex(ODKSMTest):
+    """Test: A workshop index..."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, request, reset_folder_structure):
+        """TestAWorkshopIndex setup"""
+        request.cls.test_path = test_folder_structure_path()
+        add_mod(self.test_path, "ModA", {"mod_a": ["A3_Data_F"]})
+        add_mod(self.test_path, "ModB", {"mod_b": ["mod_a"]}, config_name="config.cpp")
+        touch(join(self.test_path, "!Workshop", "@ModA", "meta.cpp"), 'publishedid = 123;\nname = "Mod A";')
+
+    def test_should_index_mods_addons_and_metadata(self):
+        """A workshop index should index mods addons and metadata."""
+        index = WorkshopIndex(self.test_path)
+        record = index.get_mod("ModB")
+        assert record["pbos"]["modb.pbo"]["provided_addons"] == ["mod_b"]
+        assert record["pbos"]["modb.pbo"]["required_addons"] == ["mod_a"]
+        assert index.get_mod("ModA")["meta"]["publishedid"] == "123"
+
+    def test_should_be_persisted_and_only_parse_changed_pbos(self):
+        """A workshop index should be persisted and only parse changed pbos."""
+        index = WorkshopIndex(self.test_path)
+        index.get_all_mods()
+        index.save()
+        assert isfile(join(self.test_path, "__odksm__", "workshop_index.json"))
+        index = WorkshopIndex(self.test_path)
+        with patch.object(index, "_index_pbo", wraps=index._index_pbo) as index_pbo_fun:
+            index.get_mod("ModA")
+        index_pbo_fun.assert_not_called()
+        make_pbo(join(self.test_path, "!Workshop", "@ModA", "addons", "moda.pbo"),
+                 {"config.bin": make_rapified_cfg_patches({"mod_a": ["cba_main"], "mod_a_new": []})})
+        with patch.object(index, "_index_pbo", wraps=index._index_pbo) as index_pbo_fun:
+            record = index.get_mod("ModA")
+        index_pbo_fun.assert_called_once()
+        assert record["pbos"]["moda.pbo"]["provided_addons"] == ["mod_a", "mod_a_new"]
+
+    def test_should_record_broken_pbos_without_failing(self):
+        """A workshop index should record broken pbos without failing."""
+        touch(join(self.test_path, "!Workshop", "@ModA", "addons", "broken.pbo"), "not a pbo")
+        record = WorkshopIndex(self.test_path).get_mod("ModA")
+        assert "error" in record["pbos"]["broken.pbo"]
+
+    def test_should_record_the_pbo_prefix_and_entries(self):
+        """A workshop index should record the pbo prefix and entries."""
+        record = WorkshopIndex(self.test_path).get_mod("ModA")
+        assert record["pbos"]["moda.pbo"]["prefix"] == "moda"
+        assert record["pbos"]["moda.pbo"]["entries"][0][0] == "config.bin"
+
+class TestAModDependencyGraph(ODKSMTest):
+    """Test: A mod dependency graph..."""
+
+    @staticmethod
+    def record(provided, required):
+        return {"pbos": {"a.pbo": {"provided_addons": provided, "required_addons": required}}}
+
+    def test_should_order_mods_after_their_dependencies_keeping_the_order_otherwise(self):
+        """A mod dependency graph should order mods after their dependencies keeping the order otherwise."""
+        records = {"ace": self.record(["ace_main"], ["cba_main"]), "CBA_A3": self.record(["cba_main"], []),
+                   "ODKAI": self.record(["odkai"], []), "ace_compat": self.record(["compat"], ["ace_main"])}
+        graph = ModDependencyGraph(records, ["ODKAI", "ace_compat", "ace", "CBA_A3"])
+        assert graph.order(["ODKAI", "ace_compat", "ace", "CBA_A3"]) == ["ODKAI", "CBA_A3", "ace", "ace_compat"]
+        assert graph.order(["ODKAI", "CBA_A3"]) == ["ODKAI", "CBA_A3"]
+
+    def test_should_report_addons_provided_by_mods_not_selected(self):
+        """A mod dependency graph should report addons provided by mods not selected."""
+        records = {"ace": self.record(["ace_main"], ["cba_main", "A3_Data_F"]), "CBA_A3": self.record(["cba_main"], [])}
+        graph = ModDependencyGraph(records, ["ace"])
+        assert graph.missing == [("ace", "cba_main", "CBA_A3")]
+
+    def test_should_survive_dependency_cycles(self):
+        """A mod dependency graph should survive dependency cycles."""
+        records = {"a": self.record(["a"], ["b"]), "b": self.record(["b"], ["a"]), "c": self.record(["c"], [])}
+        graph = ModDependencyGraph(records, ["a", "b", "c"])
+        assert graph.order(["a", "b", "c"]) == ["c", "a", "b"]
+
+
+
+class TestTheAddonConflictsFinder(ODKSMTest):
+    """Test: The addon conflicts finder..."""
+
+    def test_should_find_prefixes_pbos_and_addons_shipped_by_more_than_one_mod(self):
+        """The addon conflicts finder should find prefixes pbos and addons shipped by more than one mod."""
+        records = {
+            "ModA": {"pbos": {"common.pbo": {"prefix": "x\\a", "provided_addons": ["a_main", "shared"]},
+                              "a.pbo": {"prefix": "x\\a2", "provided_addons": ["a_extra"]}}},
+            "ModB": {"pbos": {"Common.pbo": {"prefix": "x\\b", "provided_addons": ["SHARED"]}}},
+            "ModC": {"pbos": {"c.pbo": {"prefix": "X\\A2", "provided_addons": ["c_main"]}}},
+        }
+        conflicts = find_addon_conflicts(records)
+        assert sorted(conflicts) == sorted([("pbo", "common.pbo", ["ModA", "ModB"]),
+                                            ("addon", "shared", ["ModA", "ModB"]),
+                                            ("pbo prefix", "x\\a2", ["ModA", "ModC"])])
+
+    def test_should_handle_big_presets(self):
+        """The addon conflicts finder should handle big presets."""
+        records = {"Mod{}".format(i): {"pbos": {"mod{}.pbo".format(i): {
+            "prefix": "x\\mod{}".format(i), "provided_addons": ["mod{}_{}".format(i, j) for j in range(50)]}}}
+            for i in range(500)}
+        records["Mod499"]["pbos"]["mod499.pbo"]["provided_addons"].append("mod0_0")
+        assert find_addon_conflicts(records) == [("addon", "mod0_0", ["Mod0", "Mod499"])]